@@ -4,307 +4,718 @@
 import sys
 import os
 import json
+import math
+import time
+import asyncio
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional, Tuple
 
-from fastapi import FastAPI, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import APIRouter, FastAPI, Request, Form, HTTPException
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
+from jinja2 import FileSystemBytecodeCache
 import uuid
+import atexit
+import threading
+from contextlib import asynccontextmanager
+
+from ml_platform.core.entities.user import User
+from ml_platform.core.entities.project import Project
+from ml_platform.core.entities.experiment import Experiment
+from ml_platform.core.entities.model import TrainedModel
+from ml_platform.core.entities.sweep import Sweep
+from ml_platform.core.entities.dataset import Dataset
+from ml_platform.core.repositories.backends import create_backend
+from ml_platform.core.services.deployment_service import DeploymentService, ModelNotServable
+from ml_platform.core.services.experiment_service import ExperimentRunner, Job, JobStatus
+from ml_platform.core.services.live_service import LiveHub
+from ml_platform.core.services.monitoring_service import (
+    DURATION_BUCKETS, DriftMonitor, MetricsMiddleware, MetricsRegistry
+)
+from ml_platform.core.services.sweep_service import SweepService
+from ml_platform.infrastructure.compute.resource_manager import ResourceManager
+from ml_platform.infrastructure.storage.artifact_store import CODECS, ArtifactInfo, ArtifactStore
+from ml_platform.infrastructure.storage.csv_parser import parse_csv
+from ml_platform.infrastructure.storage.dataset_cache import SharedDatasetCache
+from ml_platform.infrastructure.storage.file_manager import FileManager, UploadConflict, UploadSession
+from ml_platform.infrastructure.storage.metric_store import MetricBatch, MetricStore
+from ml_platform.infrastructure.storage.persistence_writer import PersistenceWriter
 
 # ============ НАСТРОЙКА ПУТЕЙ ============
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-print(f"📁 Рабочая директория: {BASE_DIR}")
+DATA_DIR = os.environ.get("ML_PLATFORM_DATA_DIR", "data")
+# Режим самопроверки: после каждой мутации счетчики сверяются с полным пересчетом
+CHECK_COUNTERS = os.environ.get("ML_PLATFORM_CHECK_COUNTERS") == "1"
+# Бэкенд хранения: sqlite (по умолчанию) или memory (в памяти + журнал изменений)
+STORAGE_BACKEND = os.environ.get("ML_PLATFORM_STORAGE", "sqlite")
+# Окно, за которое изменения собираются в одну фоновую запись (секунды)
+FLUSH_WINDOW = float(os.environ.get("ML_PLATFORM_FLUSH_WINDOW", "0.02"))
+# Ресурсы хоста для обучения (по умолчанию - все ядра и вся память машины)
+COMPUTE_CPUS = int(os.environ.get("ML_PLATFORM_CPUS", "0")) or None
+COMPUTE_MEMORY_MB = int(os.environ.get("ML_PLATFORM_MEMORY_MB", "0")) or None
+# Бюджет общего кэша подготовленных датасетов (в /dev/shm, если есть)
+DATASET_CACHE_MB = int(os.environ.get("ML_PLATFORM_DATASET_CACHE_MB", "1024"))
+# Сжатие артефактов по умолчанию: gzip, bz2, xz или пусто (без сжатия)
+ARTIFACT_COMPRESSION = os.environ.get("ML_PLATFORM_ARTIFACT_COMPRESSION") or None
+# Сборка запросов на предсказание в пачки: предельный размер и ожидание после первого
+SERVING_MAX_BATCH = int(os.environ.get("ML_PLATFORM_SERVING_MAX_BATCH", "64"))
+SERVING_MAX_WAIT_MS = float(os.environ.get("ML_PLATFORM_SERVING_MAX_WAIT_MS", "2"))
+# Бюджет памяти загруженных для предсказаний моделей
+MODEL_CACHE_MB = int(os.environ.get("ML_PLATFORM_MODEL_CACHE_MB", "512"))
+# Пороги и листья компилированных деревьев во float32 (вдвое меньше памяти)
+SERVING_FLOAT32 = os.environ.get("ML_PLATFORM_SERVING_FLOAT32") == "1"
+# Живые обновления: состояние темы рассылается не чаще раза в интервал
+LIVE_INTERVAL_MS = float(os.environ.get("ML_PLATFORM_LIVE_INTERVAL_MS", "250"))
+# Демо-данные в пустую базу - только по явному запросу
+SEED_DEMO = os.environ.get("ML_PLATFORM_SEED_DEMO") == "1"
+# Шаблоны перечитываются при изменении файла (для разработки); иначе компилируются один раз
+TEMPLATE_RELOAD = os.environ.get("ML_PLATFORM_TEMPLATE_RELOAD") == "1"
+# Шаблоны и статика лежат рядом с модулем и не зависят от рабочего каталога
+TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
+STATIC_DIR = os.path.join(BASE_DIR, "static")
 
-app = FastAPI(
-    title="ML Platform",
-    description="Платформа для создания и тестирования алгоритмов машинного обучения",
-    version="1.0.0"
-)
+# Маршруты собираются в роутер и подключаются к приложению в create_app
+router = APIRouter()
+templates = Jinja2Templates(directory=TEMPLATES_DIR)
+templates.env.auto_reload = TEMPLATE_RELOAD
+
+# ============ МЕТРИКИ ============
+
+metrics = MetricsRegistry()
+flush_seconds = metrics.histogram("ml_persistence_flush_seconds", "Время записи пачки изменений на диск")
+flushed_records = metrics.counter("ml_persistence_flushed_records_total", "Изменения сущностей, записанные на диск")
+training_duration = metrics.histogram("ml_training_duration_seconds", "Длительность запуска от старта до завершения",
+                                      ("algorithm", "status"), DURATION_BUCKETS)
+training_stage = metrics.histogram("ml_training_stage_seconds", "Этапы запуска в процессе обучения",
+                                   ("stage",), DURATION_BUCKETS)
+
+def _observe_flush(records: int, seconds: float):
+    flushed_records.inc(records)
+    flush_seconds.observe(seconds)
+
+# ============ ПОДСИСТЕМЫ ============
+
+class _Lazy:
+    """Подсистема, которая создается при первом обращении к ней
+
+    Импорт модуля не открывает хранилище и не запускает потоки: каждый
+    воркер сервера платит за подсистему, только когда она нужна (или
+    заранее - при старте приложения, см. lifespan).
+    """
+
+    __slots__ = ("_lazy_factory", "_lazy_instance", "_lazy_lock")
+
+    def __init__(self, factory):
+        self._lazy_factory = factory
+        self._lazy_instance = None
+        self._lazy_lock = threading.Lock()
 
-# Создаем необходимые директории
-os.makedirs("static", exist_ok=True)
-os.makedirs("templates", exist_ok=True)
-os.makedirs("data", exist_ok=True)
-
-# Подключаем статические файлы и шаблоны
-app.mount("/static", StaticFiles(directory="static"), name="static")
-templates = Jinja2Templates(directory="templates")
-
-# ============ МОДЕЛИ ДАННЫХ ============
-class User:
-    def __init__(self, name: str, email: str, role: str = "Data Scientist"):
-        self.id = str(uuid.uuid4())
-        self.name = name
-        self.email = email
-        self.role = role
-        self.created_at = datetime.now()
-
-class Project:
-    def __init__(self, name: str, description: str, owner: User):
-        self.id = str(uuid.uuid4())
-        self.name = name
-        self.description = description
-        self.owner = owner
-        self.status = "active"
-        self.created_at = datetime.now()
-        self.updated_at = datetime.now()
-        self.experiments = []
-        self.tags = []
-
-class Experiment:
-    def __init__(self, name: str, algorithm: str, dataset: str, project_id: str):
-        self.id = str(uuid.uuid4())
-        self.name = name
-        self.algorithm = algorithm
-        self.dataset = dataset
-        self.project_id = project_id
-        self.status = "created"
-        self.created_at = datetime.now()
-        self.started_at = None
-        self.completed_at = None
-        self.metrics = {}
-        self.hyperparameters = {}
-        self.artifact_path = None
-
-class TrainedModel:
-    def __init__(self, name: str, description: str, experiment_id: str):
-        self.id = str(uuid.uuid4())
-        self.name = name
-        self.description = description
-        self.experiment_id = experiment_id
-        self.status = "development"
-        self.version = "1.0.0"
-        self.created_at = datetime.now()
-        self.metrics = {}
-        self.deployment_status = None
+    def _lazy_get(self):
+        instance = self._lazy_instance
+        if instance is None:
+            with self._lazy_lock:
+                if self._lazy_instance is None:
+                    self._lazy_instance = self._lazy_factory()
+                instance = self._lazy_instance
+        return instance
+
+    @property
+    def _lazy_loaded(self) -> bool:
+        return self._lazy_instance is not None
+
+    def __getattr__(self, name):
+        return getattr(self._lazy_get(), name)
 
 # ============ ХРАНИЛИЩЕ ДАННЫХ ============
 class Database:
-    _instance = None
+    """Фасад над бэкендом хранения с O(1) счетчиками для дашборда"""
+    _instances = {}
+    
+    def __new__(cls, data_dir: str = DATA_DIR, backend: str = STORAGE_BACKEND, seed_demo: bool = SEED_DEMO):
+        # Один экземпляр на каталог данных: два писателя в одно хранилище недопустимы
+        data_dir = os.path.abspath(data_dir)
+        if data_dir not in cls._instances:
+            instance = super().__new__(cls)
+            instance.data_dir = data_dir
+            instance._init_db(backend, seed_demo)
+            cls._instances[data_dir] = instance
+        return cls._instances[data_dir]
     
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._init_db()
-        return cls._instance
+    def _init_db(self, backend: str, seed_demo: bool):
+        """Инициализация базы данных: данные из хранилища, в пустую - демо-данные по запросу"""
+        os.makedirs(self.data_dir, exist_ok=True)
+        # Запись на диск идет в фоновом потоке, обработчики не ждут I/O
+        self._writer = PersistenceWriter(flush_window=FLUSH_WINDOW, on_flush=_observe_flush)
+        self._backend = create_backend(backend, self.data_dir, self._writer)
+        # Мутации идут и из обработчиков, и из потока движка запусков
+        self._lock = threading.RLock()
+        # Версия данных растет с каждым изменением сущностей (точки метрик не в счет);
+        # вместе с идентификатором экземпляра - ETag отрисованных страниц и сводок
+        self.version = 0
+        self.instance_id = uuid.uuid4().hex[:12]
+        # Пошаговые метрики обучения: заполненные чанки уходят в data/metrics
+        self.metric_store = MetricStore(os.path.join(self.data_dir, "metrics"))
+        # Загруженные датасеты: заготовки загрузок и файлы по sha256 в data/datasets
+        self.files = FileManager(os.path.join(self.data_dir, "datasets"))
+        self.artifacts = ArtifactStore(os.path.join(self.data_dir, "artifacts"), ARTIFACT_COMPRESSION)
+        atexit.register(self.close)
+        
+        seeded = seed_demo and self._backend.projects.count() == 0
+        if seeded:
+            self._seed_demo_data()
+        users = self._backend.users.list(limit=1)
+        self.demo_user = users[0] if users else None
+        self._counters = self._compute_counters()
+        # Только что созданные демо-данные ничем не прерваны
+        if not seeded:
+            self._fail_interrupted()
     
-    def _init_db(self):
-        """Инициализация базы данных с демо-данными"""
+    def _fail_interrupted(self):
+        """Задачи движка запусков живут в памяти процесса: запуски, прерванные перезапуском, - неуспешны"""
+        interrupted = self.get_experiments_by_status("queued") + self.get_experiments_by_status("running")
+        for experiment in interrupted:
+            self.update_experiment_status(experiment.id, "failed")
+        if interrupted:
+            print(f"⚠️ Прерванных перезапуском экспериментов: {len(interrupted)} (отмечены неуспешными)")
+    
+    def _seed_demo_data(self):
+        """Заполнение пустой базы демо-данными"""
         # Создаем демо-пользователя
-        self.demo_user = User("Алексей Петров", "alexey@mlplatform.com", "Data Scientist")
+        demo_user = User("Алексей Петров", "alexey@mlplatform.com", "Data Scientist")
         
         # Создаем демо-проекты
-        self.projects = [
+        projects = [
             Project(
                 name="Прогнозирование оттока клиентов",
                 description="ML модель для предсказания ухода клиентов банка",
-                owner=self.demo_user
+                owner=demo_user
             ),
             Project(
                 name="Обнаружение мошеннических транзакций",
                 description="Система для выявления мошенничества в реальном времени",
-                owner=self.demo_user
+                owner=demo_user
             ),
             Project(
                 name="Рекомендательная система товаров",
                 description="Персонализированные рекомендации для интернет-магазина",
-                owner=self.demo_user
+                owner=demo_user
             )
         ]
         
         # Создаем демо-эксперименты
-        self.experiments = [
+        experiments = [
             Experiment(
                 name="XGBoost с подбором параметров",
                 algorithm="XGBoost",
                 dataset="customer_data.csv",
-                project_id=self.projects[0].id
+                project_id=projects[0].id
             ),
             Experiment(
                 name="Random Forest классификация",
                 algorithm="Random Forest",
                 dataset="fraud_data.csv",
-                project_id=self.projects[1].id
+                project_id=projects[1].id
             ),
             Experiment(
                 name="LightGBM с GPU",
                 algorithm="LightGBM",
                 dataset="sales_data.csv",
-                project_id=self.projects[2].id
+                project_id=projects[2].id
             )
         ]
         
         # Устанавливаем статусы и метрики для демо-экспериментов
-        self.experiments[0].status = "completed"
-        self.experiments[0].metrics = {"accuracy": 0.92, "precision": 0.89, "recall": 0.91, "f1_score": 0.90}
+        experiments[0].status = "completed"
+        experiments[0].metrics = {"accuracy": 0.92, "precision": 0.89, "recall": 0.91, "f1_score": 0.90}
         
-        self.experiments[1].status = "running"
-        self.experiments[1].metrics = {"accuracy": 0.95, "precision": 0.93, "recall": 0.94, "f1_score": 0.935}
+        experiments[1].status = "running"
+        experiments[1].metrics = {"accuracy": 0.95, "precision": 0.93, "recall": 0.94, "f1_score": 0.935}
         
-        self.experiments[2].status = "created"
+        experiments[2].status = "created"
         
         # Создаем демо-модели
-        self.models = [
+        models = [
             TrainedModel(
                 name="Customer Churn Predictor",
                 description="Модель для прогнозирования оттока клиентов",
-                experiment_id=self.experiments[0].id
+                experiment_id=experiments[0].id
             )
         ]
-        self.models[0].metrics = self.experiments[0].metrics
-        self.models[0].deployment_status = "deployed"
-        
-        # Сохраняем связи
-        for exp in self.experiments:
-            for proj in self.projects:
-                if exp.project_id == proj.id:
-                    proj.experiments.append(exp)
-                    break
+        models[0].metrics = dict(experiments[0].metrics)
+        models[0].deployment_status = "deployed"
+        
+        # Записываем демо-данные пачками
+        self._backend.users.add(demo_user)
+        self._backend.projects.add_many(projects)
+        self._backend.experiments.add_many(experiments)
+        self._backend.models.add_many(models)
+    
+    # ============ СЧЕТЧИКИ ============
+    
+    def _compute_counters(self) -> Dict[str, int]:
+        """Полный пересчет агрегатов по данным хранилища"""
+        return {
+            "projects": self._backend.projects.count(),
+            "active_projects": self._backend.projects.count(status="active"),
+            "experiments": self._backend.experiments.count(),
+            "completed_experiments": self._backend.experiments.count(status="completed"),
+            "running_experiments": self._backend.experiments.count(status="running"),
+            "models": self._backend.models.count(),
+            "deployed_models": self._backend.models.count(deployment_status="deployed")
+        }
+    
+    def _count_status(self, status: str, delta: int):
+        key = f"{status}_experiments"
+        if key in self._counters:
+            self._counters[key] += delta
+    
+    def verify_counters(self):
+        """Сверяет инкрементальные счетчики с полным пересчетом"""
+        expected = self._compute_counters()
+        if expected != self._counters:
+            diff = {k: (self._counters.get(k), v) for k, v in expected.items() if self._counters.get(k) != v}
+            raise RuntimeError(f"Счетчики расходятся с данными (текущее, ожидаемое): {diff}")
+    
+    def _after_mutation(self, *topics: str):
+        """Под блокировкой после каждого изменения сущностей; topics - измененные темы живых обновлений"""
+        self.version += 1
+        if CHECK_COUNTERS:
+            self.verify_counters()
+        live.publish(*topics)
+    
+    # ============ ЧТЕНИЕ ============
     
     def get_all_projects(self):
-        return self.projects
+        return self._backend.projects.list()
     
-    def get_all_experiments(self):
-        return self.experiments
+    def get_all_experiments(self, limit: int = None):
+        return self._backend.experiments.list(limit)
     
     def get_all_models(self):
-        return self.models
+        return self._backend.models.list()
     
     def get_project_by_id(self, project_id: str):
-        for proj in self.projects:
-            if proj.id == project_id:
-                return proj
-        return None
+        return self._backend.projects.get(project_id)
     
     def get_experiment_by_id(self, experiment_id: str):
-        for exp in self.experiments:
-            if exp.id == experiment_id:
-                return exp
-        return None
+        return self._backend.experiments.get(experiment_id)
+    
+    def get_model_by_id(self, model_id: str):
+        return self._backend.models.get(model_id)
+    
+    def get_deployed_models(self):
+        return self._backend.models.find_by("deployment_status", "deployed")
+    
+    def get_sweep_by_id(self, sweep_id: str):
+        return self._backend.sweeps.get(sweep_id)
+    
+    def get_sweeps_by_project(self, project_id: str):
+        return self._backend.sweeps.find_by("project_id", project_id)
+    
+    def get_running_sweeps(self):
+        return self._backend.sweeps.find_by("status", "running")
+    
+    def get_all_datasets(self):
+        return self._backend.datasets.list()
+    
+    def get_dataset_by_id(self, dataset_id: str):
+        return self._backend.datasets.get(dataset_id)
+    
+    def get_dataset_by_sha256(self, sha256: str):
+        found = self._backend.datasets.find_by("sha256", sha256, limit=1)
+        return found[0] if found else None
+    
+    def get_experiments_by_project(self, project_id: str):
+        return self._backend.experiments.list_by_project(project_id)
+    
+    def get_experiments_by_status(self, status: str):
+        return self._backend.experiments.list_by_status(status)
+    
+    def get_experiments_by_algorithm(self, algorithm: str):
+        return self._backend.experiments.list_by_algorithm(algorithm)
+    
+    def count_experiments_by_project(self, project_id: str, status: str = None) -> int:
+        if status is None:
+            return self._backend.experiments.count(project_id=project_id)
+        return self._backend.experiments.count(project_id=project_id, status=status)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Агрегаты для дашборда и /api/stats за O(1)"""
+        return dict(self._counters)
+    
+    # ============ ИЗМЕНЕНИЕ ============
     
     def add_project(self, project: Project):
-        self.projects.append(project)
-        self._save_to_file()
+        with self._lock:
+            self._backend.projects.add(project)
+            self._counters["projects"] += 1
+            if project.status == "active":
+                self._counters["active_projects"] += 1
+            self._after_mutation("stats", f"project:{project.id}")
         return project
     
     def add_experiment(self, experiment: Experiment):
-        self.experiments.append(experiment)
-        # Находим проект и добавляем в него эксперимент
-        project = self.get_project_by_id(experiment.project_id)
-        if project:
-            project.experiments.append(experiment)
-        self._save_to_file()
+        with self._lock:
+            self._backend.experiments.add(experiment)
+            self._counters["experiments"] += 1
+            self._count_status(experiment.status, 1)
+            self._after_mutation("stats", f"project:{experiment.project_id}")
         return experiment
     
-    def update_experiment_status(self, experiment_id: str, status: str, metrics: Dict = None):
-        experiment = self.get_experiment_by_id(experiment_id)
-        if experiment:
-            experiment.status = status
-            if status == "running":
-                experiment.started_at = datetime.now()
-            elif status == "completed":
-                experiment.completed_at = datetime.now()
-                if metrics:
-                    experiment.metrics = metrics
-            self._save_to_file()
+    def add_experiments(self, experiments: List[Experiment]):
+        """Добавляет пачку экспериментов (испытания перебора) одним изменением"""
+        with self._lock:
+            for experiment in experiments:
+                self._backend.experiments.add(experiment)
+                self._count_status(experiment.status, 1)
+            self._counters["experiments"] += len(experiments)
+            self._after_mutation("stats", *{f"project:{e.project_id}" for e in experiments})
+        return experiments
+    
+    def update_experiment_status(self, experiment_id: str, status: str, metrics: Dict = None,
+                                 artifact: str = None):
+        with self._lock:
+            experiment = self.get_experiment_by_id(experiment_id)
+            if experiment:
+                self._count_status(experiment.status, -1)
+                self._count_status(status, 1)
+                experiment.status = status
+                if status == "running":
+                    experiment.started_at = datetime.now()
+                elif status in ("completed", "failed", "cancelled"):
+                    experiment.completed_at = datetime.now()
+                    if metrics:
+                        experiment.metrics = metrics
+                    if artifact:
+                        experiment.artifact_path = artifact
+                self._backend.experiments.update(experiment)
+                self._after_mutation("stats", f"project:{experiment.project_id}", f"experiment:{experiment_id}")
         return experiment
     
-    def _save_to_file(self):
-        """Сохраняет данные в JSON файл (для простоты)"""
-        data = {
-            "projects": [
-                {
-                    "id": p.id,
-                    "name": p.name,
-                    "description": p.description,
-                    "status": p.status,
-                    "experiment_ids": [e.id for e in p.experiments]
-                }
-                for p in self.projects
-            ],
-            "experiments": [
-                {
-                    "id": e.id,
-                    "name": e.name,
-                    "algorithm": e.algorithm,
-                    "status": e.status,
-                    "project_id": e.project_id,
-                    "metrics": e.metrics
-                }
-                for e in self.experiments
-            ]
+    def add_model(self, model: TrainedModel):
+        with self._lock:
+            self._backend.models.add(model)
+            self._counters["models"] += 1
+            if model.deployment_status == "deployed":
+                self._counters["deployed_models"] += 1
+            self._after_mutation("stats")
+        return model
+    
+    def update_model_deployment(self, model_id: str, deployment_status: Optional[str]):
+        with self._lock:
+            model = self.get_model_by_id(model_id)
+            if model:
+                was_deployed = model.deployment_status == "deployed"
+                model.deployment_status = deployment_status
+                self._counters["deployed_models"] += (deployment_status == "deployed") - was_deployed
+                self._backend.models.update(model)
+                self._after_mutation("stats")
+        return model
+    
+    def log_metric(self, experiment_id: str, name: str, value: float, step: int = None,
+                   timestamp: float = None):
+        """Добавляет точку пошаговой метрики; без step - следующий шаг ряда"""
+        series = self.metric_store.series(experiment_id, name)
+        series.append(series.count if step is None else step, value, timestamp)
+        live.publish(f"experiment:{experiment_id}")
+        return series
+    
+    def add_sweep(self, sweep: Sweep):
+        with self._lock:
+            self._backend.sweeps.add(sweep)
+            self._after_mutation()
+        return sweep
+    
+    def update_sweep(self, sweep: Sweep):
+        with self._lock:
+            self._backend.sweeps.update(sweep)
+            self._after_mutation()
+        return sweep
+    
+    def complete_upload(self, session: UploadSession, name: str = None):
+        """Завершает загрузку и регистрирует датасет; повтор содержимого дает уже известный датасет"""
+        stored = self.files.complete(session)
+        with self._lock:
+            existing = self.get_dataset_by_sha256(stored.sha256)
+            if existing:
+                return existing, True
+            dataset = Dataset(name or session.filename, session.filename, stored.sha256, stored.size, stored.path)
+            self._backend.datasets.add(dataset)
+            self._after_mutation()
+        if dataset.format == "csv":
+            # Разбор текста - один раз при загрузке, а не в каждом запуске
+            threading.Thread(target=self.convert_dataset, args=(dataset.id,), daemon=True,
+                             name=f"convert-{dataset.id}").start()
+        return dataset, stored.deduplicated
+    
+    def convert_dataset(self, dataset_id: str):
+        """Переводит CSV датасета в колоночный формат и сохраняет схему со статистикой"""
+        dataset = self.get_dataset_by_id(dataset_id)
+        path = self.files.columnar_path(dataset.sha256)
+        try:
+            meta = parse_csv(dataset.path, path, extra={"sha256": dataset.sha256})
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            print(f"⚠️ Датасет {dataset.name} не переведен в колоночный формат: {e}")
+            return None
+        with self._lock:
+            dataset = self.get_dataset_by_id(dataset_id)
+            dataset.columnar_path = path
+            dataset.n_rows = meta["n_rows"]
+            dataset.columns = [{key: column[key] for key in ("name", "type", "min", "max")}
+                               for column in meta["columns"]]
+            self._backend.datasets.update(dataset)
+            self._after_mutation()
+        return dataset
+    
+    def training_spec(self, experiment: Experiment) -> Dict[str, Any]:
+        """Спецификация запуска эксперимента; загруженный датасет передается путем к файлу"""
+        spec = {
+            "experiment_id": experiment.id,
+            "algorithm": experiment.algorithm,
+            "dataset": experiment.dataset,
+            "hyperparameters": dict(experiment.hyperparameters),
+            "artifact_dir": self.artifacts.root
         }
-        
-        with open("data/database.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False, default=str)
+        found = self._backend.datasets.find_by("name", experiment.dataset)
+        if found:
+            dataset = max(found, key=lambda d: d.created_at)
+            spec["dataset_path"] = dataset.columnar_path or dataset.path
+        return spec
+    
+    def log_history(self, experiment_id: str, history: Dict[str, List[float]]):
+        """Записывает кривые обучения (значение на итерацию) в ряды метрик"""
+        batch = MetricBatch()
+        for name, values in history.items():
+            for step, value in enumerate(values):
+                batch.add(experiment_id, name, value, step)
+        return self.ingest_metrics(batch)
+    
+    def ingest_metrics(self, batch: MetricBatch):
+        """Дописывает пачку точек и фиксирует ее на диске одной операцией"""
+        keys = batch.apply(self.metric_store)
+        live.publish(*{f"experiment:{experiment_id}" for experiment_id, _ in keys})
+        return keys
+    
+    def flush(self, timeout: float = None) -> bool:
+        """Дожидается, пока все изменения будут записаны на диск (блокирующе)"""
+        return self._writer.wait_flushed(timeout=timeout) and self._backend.flush(timeout=timeout)
+    
+    async def wait_durable(self):
+        """Дожидается записи всех текущих изменений, не блокируя event loop"""
+        await self._writer.wait_flushed_async()
+    
+    def close(self):
+        self._writer.close()
+        self._backend.close()
+        self.metric_store.flush()
+
+# База открывается при первом обращении
+db = _Lazy(Database)
+
+# ============ ЗАПУСК ЭКСПЕРИМЕНТОВ ============
+
+def _sync_experiment_status(job: Job):
+    """Переносит переход статуса задачи в эксперимент и в сводку перебора"""
+    if job.status == JobStatus.COMPLETED and job.history:
+        db.log_history(job.experiment_id, job.history)
+    db.update_experiment_status(
+        job.experiment_id,
+        job.status,
+        job.result if job.status == JobStatus.COMPLETED else None,
+        job.artifact
+    )
+    sweeps.on_job_update(job)
+    if job.finished and job.started_at:
+        duration = (job.completed_at - job.started_at).total_seconds()
+        training_duration.labels(job.spec.get("algorithm", ""), job.status).observe(duration)
+        for stage, seconds in job.timings.items():
+            training_stage.labels(stage).observe(seconds)
+
+def _create_runner() -> ExperimentRunner:
+    runner = ExperimentRunner(
+        on_update=_sync_experiment_status,
+        resources=ResourceManager(total_cpus=COMPUTE_CPUS, total_memory_mb=COMPUTE_MEMORY_MB),
+        dataset_cache=SharedDatasetCache(budget_bytes=DATASET_CACHE_MB * 1024 * 1024)
+    )
+    atexit.register(runner.dataset_cache.close)
+    atexit.register(runner.shutdown, wait=False)
+    return runner
+
+runner = _Lazy(_create_runner)
+def _create_sweeps() -> SweepService:
+    service = SweepService(db, runner)
+    # Переборы, прерванные перезапуском, продолжают раздавать испытания
+    for sweep in service.recover():
+        progress = sweep.progress
+        print(f"🔁 Перебор {sweep.name} возобновлен: не начато {progress['created']} из {progress['total']} испытаний")
+    return service
+
+sweeps = _Lazy(_create_sweeps)
+drift = DriftMonitor(metrics)
+live = LiveHub(min_interval=LIVE_INTERVAL_MS / 1000)
+deployments = _Lazy(lambda: DeploymentService(
+    db, db.artifacts, SERVING_MAX_BATCH, SERVING_MAX_WAIT_MS,
+    budget_bytes=MODEL_CACHE_MB * 1024 * 1024,
+    dtype="float32" if SERVING_FLOAT32 else "float64", drift=drift
+))
+
+# Измерители, которые считаются в момент чтения метрик; не созданные подсистемы не создаются
+metrics.gauge("ml_scheduler_queued_jobs", "Задачи в очереди планировщика",
+              function=lambda: runner.stats()["queued"] if runner._lazy_loaded else 0)
+metrics.gauge("ml_scheduler_running_jobs", "Выполняющиеся задачи",
+              function=lambda: runner.stats()["running"] if runner._lazy_loaded else 0)
+metrics.gauge("ml_persistence_pending_records", "Изменения, ждущие фоновой записи",
+              function=lambda: db._writer.pending if db._lazy_loaded else 0)
+metrics.gauge("ml_dataset_cache_bytes", "Объем общего кэша датасетов",
+              function=lambda: runner.dataset_cache.bytes if runner._lazy_loaded else 0)
+metrics.gauge("ml_model_cache_bytes", "Объем загруженных для предсказаний моделей",
+              function=lambda: deployments.bytes if deployments._lazy_loaded else 0)
+metrics.gauge("ml_live_clients", "Клиенты, подписанные на живые обновления", function=lambda: live.clients)
 
-# Инициализируем базу данных
-db = Database()
+# ============ КЭШ ОТВЕТОВ ============
+
+# Отрисованных ответов в кэше: страница или сводка на каждую версию данных
+RENDER_CACHE_SIZE = 32
+
+class RenderCache:
+    """Тела ответов по (путь, строка запроса, версия данных) с LRU-вытеснением
+
+    Записи старых версий не удаляются явно: после изменения данных они
+    больше не запрашиваются и вытесняются новыми.
+    """
+
+    def __init__(self, size: int = RENDER_CACHE_SIZE):
+        self.size = size
+        self._entries: "OrderedDict[tuple, Tuple[bytes, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[Tuple[bytes, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, entry: Tuple[bytes, str]):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+render_cache = RenderCache()
+render_requests = metrics.counter("ml_render_cache_requests_total",
+                                  "Запросы к версионированным ответам: hit, miss, not_modified", ("result",))
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match со слабым сравнением (префикс W/ не учитывается)"""
+    if not header:
+        return False
+    tag = etag.removeprefix("W/")
+    return any(candidate.strip() == "*" or candidate.strip().removeprefix("W/") == tag
+               for candidate in header.split(","))
+
+def _versioned(request: Request, render: Callable[[str], Response]) -> Response:
+    """Ответ по версии данных: 304 на совпавший ETag, иначе тело из кэша или новая отрисовка
+
+    render(etag) строит ответ заново. Версия читается до отрисовки, поэтому
+    тело под версией не может быть старше ее (изменение во время отрисовки
+    может попасть в тело раньше, чем в ETag, - тогда следующий запрос
+    просто отрисует страницу еще раз).
+    """
+    version = db.version
+    etag = f'W/"{db.instance_id}-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        render_requests.labels("not_modified").inc()
+        return Response(status_code=304, headers=headers)
+    key = (request.url.path, request.url.query, version)
+    entry = render_cache.get(key)
+    if entry is None:
+        render_requests.labels("miss").inc()
+        response = render(etag)
+        entry = (response.body, response.media_type)
+        render_cache.put(key, entry)
+    else:
+        render_requests.labels("hit").inc()
+    body, media_type = entry
+    return Response(body, media_type=media_type, headers=headers)
 
 # ============ ВЕБ-ИНТЕРФЕЙС ============
 
-@app.get("/", response_class=HTMLResponse)
+@router.get("/", response_class=HTMLResponse)
 async def dashboard(request: Request):
-    """Главный дашборд"""
-    projects = db.get_all_projects()
-    experiments = db.get_all_experiments()
-    models = db.get_all_models()
-    
-    # Статистика
-    stats = {
-        "total_projects": len(projects),
-        "total_experiments": len(experiments),
-        "total_models": len(models),
-        "completed_experiments": len([e for e in experiments if e.status == "completed"]),
-        "running_experiments": len([e for e in experiments if e.status == "running"]),
-        "deployed_models": len([m for m in models if m.deployment_status == "deployed"])
-    }
+    """Главный дашборд (отрисовывается заново только после изменения данных)"""
+    def render(etag: str) -> Response:
+        projects = db.get_all_projects()
+        experiments = db.get_all_experiments(limit=10)  # Последние 10 экспериментов
+        models = db.get_all_models()
+        experiment_counts = {p.id: db.count_experiments_by_project(p.id) for p in projects[:5]}
+        
+        # Статистика
+        counters = db.get_stats()
+        stats = {
+            "total_projects": counters["projects"],
+            "total_experiments": counters["experiments"],
+            "total_models": counters["models"],
+            "completed_experiments": counters["completed_experiments"],
+            "running_experiments": counters["running_experiments"],
+            "deployed_models": counters["deployed_models"]
+        }
+        
+        return templates.TemplateResponse("dashboard.html", {
+            "request": request,
+            "projects": projects,
+            "experiments": experiments,
+            "experiment_counts": experiment_counts,
+            "models": models,
+            "stats": stats,
+            "current_time": datetime.now().strftime("%H:%M"),
+            "etag": etag
+        })
     
-    return templates.TemplateResponse("dashboard.html", {
-        "request": request,
-        "projects": projects,
-        "experiments": experiments[:10],  # Последние 10 экспериментов
-        "models": models,
-        "stats": stats,
-        "current_time": datetime.now().strftime("%H:%M")
-    })
+    return _versioned(request, render)
 
-@app.get("/project/create", response_class=HTMLResponse)
+@router.get("/project/create", response_class=HTMLResponse)
 async def create_project_page(request: Request):
     """Страница создания проекта"""
     return templates.TemplateResponse("create_project.html", {
         "request": request
     })
 
-@app.get("/experiment/create", response_class=HTMLResponse)
+@router.get("/experiment/create", response_class=HTMLResponse)
 async def create_experiment_page(request: Request):
     """Страница создания эксперимента"""
     projects = db.get_all_projects()
     return templates.TemplateResponse("create_experiment.html", {
         "request": request,
-        "projects": projects
+        "projects": projects,
+        "datasets": db.get_all_datasets()
     })
 
-@app.get("/visualization", response_class=HTMLResponse)
+@router.get("/visualization", response_class=HTMLResponse)
 async def visualization_page(request: Request):
-    """Страница визуализации"""
-    experiments = db.get_all_experiments()
-    # Готовим данные для графиков
-    chart_data = {
-        "experiment_names": [e.name[:20] + "..." if len(e.name) > 20 else e.name for e in experiments if e.metrics],
-        "accuracy_scores": [e.metrics.get("accuracy", 0) for e in experiments if e.metrics],
-        "f1_scores": [e.metrics.get("f1_score", 0) for e in experiments if e.metrics]
-    }
+    """Страница визуализации (отрисовывается заново только после изменения данных)"""
+    def render(etag: str) -> Response:
+        experiments = db.get_all_experiments()
+        # Готовим данные для графиков
+        chart_data = {
+            "experiment_names": [e.name[:20] + "..." if len(e.name) > 20 else e.name for e in experiments if e.metrics],
+            "accuracy_scores": [e.metrics.get("accuracy", 0) for e in experiments if e.metrics],
+            "f1_scores": [e.metrics.get("f1_score", 0) for e in experiments if e.metrics]
+        }
+        
+        return templates.TemplateResponse("visualization.html", {
+            "request": request,
+            "experiments": experiments,
+            "chart_data": json.dumps(chart_data)
+        })
     
-    return templates.TemplateResponse("visualization.html", {
-        "request": request,
-        "experiments": experiments,
-        "chart_data": json.dumps(chart_data)
-    })
+    return _versioned(request, render)
 
-@app.get("/project/{project_id}", response_class=HTMLResponse)
+@router.get("/project/{project_id}", response_class=HTMLResponse)
 async def project_detail(request: Request, project_id: str):
     """Детальная страница проекта"""
     project = db.get_project_by_id(project_id)
@@ -314,10 +725,10 @@ async def project_detail(request: Request, project_id: str):
     return templates.TemplateResponse("project_detail.html", {
         "request": request,
         "project": project,
-        "experiments": [e for e in db.get_all_experiments() if e.project_id == project_id]
+        "experiments": db.get_experiments_by_project(project_id)
     })
 
-@app.get("/experiment/{experiment_id}", response_class=HTMLResponse)
+@router.get("/experiment/{experiment_id}", response_class=HTMLResponse)
 async def experiment_detail(request: Request, experiment_id: str):
     """Детальная страница эксперимента"""
     experiment = db.get_experiment_by_id(experiment_id)
@@ -334,13 +745,14 @@ async def experiment_detail(request: Request, experiment_id: str):
 
 # ============ API ENDPOINTS ============
 
-@app.post("/api/projects")
+@router.post("/api/projects")
 async def create_project_api(
     name: str = Form(...),
     description: str = Form(...),
-    tags: str = Form("")
+    tags: str = Form(""),
+    durable: bool = False
 ):
-    """API для создания проекта"""
+    """API для создания проекта (durable=true - ответ после записи на диск)"""
     user = db.demo_user  # Используем демо-пользователя
     
     project = Project(
@@ -354,6 +766,8 @@ async def create_project_api(
         project.tags = [tag.strip() for tag in tags.split(",")]
     
     db.add_project(project)
+    if durable:
+        await db.wait_durable()
     
     return JSONResponse({
         "success": True,
@@ -362,15 +776,16 @@ async def create_project_api(
         "project_name": project.name
     })
 
-@app.post("/api/experiments")
+@router.post("/api/experiments")
 async def create_experiment_api(
     name: str = Form(...),
     algorithm: str = Form(...),
     dataset: str = Form(...),
     project_id: str = Form(...),
-    hyperparameters: str = Form("{}")
+    hyperparameters: str = Form("{}"),
+    durable: bool = False
 ):
-    """API для создания эксперимента"""
+    """API для создания эксперимента (durable=true - ответ после записи на диск)"""
     # Проверяем существование проекта
     project = db.get_project_by_id(project_id)
     if not project:
@@ -390,6 +805,8 @@ async def create_experiment_api(
         experiment.hyperparameters = {}
     
     db.add_experiment(experiment)
+    if durable:
+        await db.wait_durable()
     
     return JSONResponse({
         "success": True,
@@ -398,40 +815,142 @@ async def create_experiment_api(
         "experiment_name": experiment.name
     })
 
-@app.post("/api/experiments/{experiment_id}/start")
-async def start_experiment_api(experiment_id: str):
-    """API для запуска эксперимента"""
+@router.post("/api/experiments/{experiment_id}/start", status_code=202)
+async def start_experiment_api(experiment_id: str, durable: bool = False):
+    """API для запуска эксперимента: ставит обучение в очередь и сразу отвечает 202
+    
+    Статус задачи - GET /api/jobs/{job_id} (durable=true - ответ после записи на диск)
+    """
     experiment = db.get_experiment_by_id(experiment_id)
     if not experiment:
         raise HTTPException(status_code=404, detail="Эксперимент не найден")
+    if runner.active_job(experiment_id):
+        raise HTTPException(status_code=409, detail="Эксперимент уже запущен")
     
-    # Симулируем обучение с случайными метриками
-    import random
+    # Запрос ресурсов (cpus, memory_mb, priority) задается в гиперпараметрах эксперимента
+    try:
+        job = runner.submit(experiment_id, db.training_spec(experiment), project_id=experiment.project_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if durable:
+        await db.wait_durable()
     
-    # Обновляем статус
-    experiment = db.update_experiment_status(experiment_id, "running")
+    return JSONResponse({
+        "success": True,
+        "message": "Эксперимент поставлен в очередь",
+        "experiment_id": experiment_id,
+        "job_id": job.id,
+        "status": job.status
+    }, status_code=202)
+
+# ============ ПЕРЕБОР ГИПЕРПАРАМЕТРОВ ============
+
+@router.post("/api/sweeps", status_code=202)
+async def create_sweep_api(request: Request):
+    """API для запуска перебора гиперпараметров (JSON)
     
-    # Генерируем случайные метрики
-    metrics = {
-        "accuracy": round(random.uniform(0.8, 0.98), 3),
-        "precision": round(random.uniform(0.75, 0.96), 3),
-        "recall": round(random.uniform(0.78, 0.97), 3),
-        "f1_score": round(random.uniform(0.8, 0.96), 3),
-        "loss": round(random.uniform(0.1, 0.5), 3),
-        "training_time": random.randint(30, 300)  # секунды
-    }
+    {"name", "project_id", "algorithm", "dataset", "search_space",
+     "strategy": grid|random|halton, "budget", "parallelism",
+     "objective": "accuracy", "goal": max|min, "hyperparameters": {...}}
+    """
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Тело запроса должно быть JSON-объектом")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Тело запроса должно быть JSON-объектом")
+    missing = [key for key in ("name", "project_id", "algorithm", "dataset", "search_space") if key not in payload]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Не указаны поля: {', '.join(missing)}")
+    if not db.get_project_by_id(payload["project_id"]):
+        raise HTTPException(status_code=404, detail="Проект не найден")
     
-    # Завершаем эксперимент (в реальности это было бы асинхронно)
-    experiment = db.update_experiment_status(experiment_id, "completed", metrics)
+    try:
+        sweep = Sweep(
+            name=payload["name"],
+            project_id=payload["project_id"],
+            algorithm=payload["algorithm"],
+            dataset=payload["dataset"],
+            search_space=payload["search_space"],
+            strategy=payload.get("strategy", "random"),
+            budget=payload.get("budget"),
+            parallelism=payload.get("parallelism"),
+            objective=payload.get("objective", "accuracy"),
+            goal=payload.get("goal", "max"),
+            hyperparameters=payload.get("hyperparameters"),
+            seed=payload.get("seed", 0)
+        )
+        # До MAX_TRIALS испытаний-экспериментов - не в цикле событий
+        await asyncio.to_thread(sweeps.create, sweep)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
+    return JSONResponse(sweep.to_dict(), status_code=202)
+
+@router.get("/api/sweeps/{sweep_id}")
+async def get_sweep_api(sweep_id: str):
+    """API для опроса прогресса перебора"""
+    sweep = db.get_sweep_by_id(sweep_id)
+    if not sweep:
+        raise HTTPException(status_code=404, detail="Перебор не найден")
+    return JSONResponse(sweep.to_dict())
+
+@router.get("/api/sweeps/{sweep_id}/trials")
+async def get_sweep_trials_api(sweep_id: str):
+    """API для получения испытаний перебора с гиперпараметрами и метриками"""
+    sweep = db.get_sweep_by_id(sweep_id)
+    if not sweep:
+        raise HTTPException(status_code=404, detail="Перебор не найден")
+    trials = [db.get_experiment_by_id(experiment_id) for experiment_id in sweep.trial_ids]
     return JSONResponse({
-        "success": True,
-        "message": "Эксперимент завершен успешно",
-        "experiment_id": experiment_id,
-        "metrics": metrics
+        "sweep_id": sweep_id,
+        "trials": [trial.to_dict() for trial in trials if trial]
+    })
+
+@router.post("/api/sweeps/{sweep_id}/cancel")
+async def cancel_sweep_api(sweep_id: str):
+    """API для отмены перебора"""
+    sweep = db.get_sweep_by_id(sweep_id)
+    if not sweep:
+        raise HTTPException(status_code=404, detail="Перебор не найден")
+    if sweep.status != "running":
+        raise HTTPException(status_code=409, detail=f"Перебор уже завершен ({sweep.status})")
+    sweep = sweeps.cancel(sweep_id) or sweep
+    return JSONResponse(sweep.to_dict(), status_code=202)
+
+@router.get("/api/jobs")
+async def list_jobs_api(experiment_id: str = None):
+    """API для получения списка задач (опционально - по эксперименту)"""
+    return JSONResponse({
+        "jobs": [job.to_dict() for job in runner.list(experiment_id)],
+        "stats": runner.stats()
     })
 
-@app.get("/api/experiments/{experiment_id}/metrics")
+@router.get("/api/scheduler")
+async def get_scheduler_stats():
+    """API для статистики планировщика: глубина очереди, ожидание, загрузка ресурсов, кэш датасетов"""
+    return JSONResponse({**runner.resources.stats(), "dataset_cache": runner.dataset_cache.stats()})
+
+@router.get("/api/jobs/{job_id}")
+async def get_job_api(job_id: str):
+    """API для опроса статуса задачи"""
+    job = runner.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    return JSONResponse(job.to_dict())
+
+@router.post("/api/jobs/{job_id}/cancel")
+async def cancel_job_api(job_id: str):
+    """API для отмены задачи: из очереди снимается сразу, выполняющаяся - на ближайшей проверке"""
+    job = runner.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    if job.finished:
+        raise HTTPException(status_code=409, detail=f"Задача уже завершена ({job.status})")
+    runner.cancel(job_id)
+    return JSONResponse(job.to_dict(), status_code=202)
+
+@router.get("/api/experiments/{experiment_id}/metrics")
 async def get_experiment_metrics(experiment_id: str):
     """API для получения метрик эксперимента"""
     experiment = db.get_experiment_by_id(experiment_id)
@@ -443,1094 +962,605 @@ async def get_experiment_metrics(experiment_id: str):
         "metrics": experiment.metrics
     })
 
-@app.get("/api/stats")
-async def get_system_stats():
-    """API для получения статистики системы"""
-    projects = db.get_all_projects()
-    experiments = db.get_all_experiments()
-    models = db.get_all_models()
+@router.get("/api/experiments/{experiment_id}/metrics/{name}/series")
+async def get_experiment_metric_series(
+    experiment_id: str,
+    name: str,
+    step_from: int = None,
+    step_to: int = None,
+    time_from: float = None,
+    time_to: float = None
+):
+    """API для получения ряда пошаговой метрики в диапазоне шагов или времени"""
+    if not db.get_experiment_by_id(experiment_id):
+        raise HTTPException(status_code=404, detail="Эксперимент не найден")
+    if not db.metric_store.has_series(experiment_id, name):
+        raise HTTPException(status_code=404, detail="Метрика не найдена")
     
+    series = db.metric_store.series(experiment_id, name)
+    points = series.query(step_from, step_to, time_from, time_to)
     return JSONResponse({
-        "projects": len(projects),
-        "experiments": len(experiments),
-        "models": len(models),
-        "completed_experiments": len([e for e in experiments if e.status == "completed"]),
-        "running_experiments": len([e for e in experiments if e.status == "running"]),
-        "active_projects": len([p for p in projects if p.status == "active"])
+        "experiment_id": experiment_id,
+        "metric": name,
+        "summary": series.summary(),
+        "steps": points["step"].tolist(),
+        "timestamps": points["timestamp"].tolist(),
+        "values": points["value"].tolist()
     })
 
-# ============ ШАБЛОНЫ HTML ============
-
-# Создаем шаблоны HTML
-TEMPLATES = {
-    "dashboard.html": """
-<!DOCTYPE html>
-<html lang="ru">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>ML Platform - Главный дашборд</title>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; font-family: 'Segoe UI', Arial, sans-serif; }
-        body { background: #f5f7fa; color: #333; padding: 20px; }
-        .container { max-width: 1400px; margin: 0 auto; }
-        
-        header { 
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 25px;
-            border-radius: 12px;
-            margin-bottom: 25px;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.1);
-        }
-        
-        h1 { font-size: 32px; margin-bottom: 10px; }
-        .subtitle { opacity: 0.9; font-size: 16px; }
-        
-        .stats-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(240px, 1fr));
-            gap: 20px;
-            margin-bottom: 30px;
-        }
-        
-        .stat-card {
-            background: white;
-            border-radius: 12px;
-            padding: 25px;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.08);
-            transition: transform 0.3s;
-        }
-        
-        .stat-card:hover { transform: translateY(-5px); }
-        .stat-card h3 { color: #666; font-size: 14px; text-transform: uppercase; margin-bottom: 10px; }
-        .stat-card .value { font-size: 42px; font-weight: bold; color: #2c3e50; }
-        
-        .content-grid {
-            display: grid;
-            grid-template-columns: 2fr 1fr;
-            gap: 25px;
-        }
-        
-        .main-content, .widget {
-            background: white;
-            border-radius: 12px;
-            padding: 25px;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.08);
-        }
-        
-        .sidebar { display: flex; flex-direction: column; gap: 25px; }
-        
-        h2 { 
-            color: #2c3e50; 
-            margin-bottom: 20px; 
-            padding-bottom: 10px;
-            border-bottom: 2px solid #f0f0f0;
-        }
-        
-        .action-buttons {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(150px, 1fr));
-            gap: 15px;
-            margin: 20px 0;
-        }
-        
-        .btn {
-            display: inline-block;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 12px 24px;
-            border-radius: 8px;
-            text-decoration: none;
-            text-align: center;
-            font-weight: 600;
-            transition: all 0.3s;
-            border: none;
-            cursor: pointer;
-        }
-        
-        .btn:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 5px 15px rgba(102, 126, 234, 0.4);
-        }
-        
-        table {
-            width: 100%;
-            border-collapse: collapse;
-            margin-top: 15px;
-        }
-        
-        th, td {
-            padding: 15px;
-            text-align: left;
-            border-bottom: 1px solid #eee;
-        }
-        
-        th { background: #f8f9fa; font-weight: 600; color: #555; }
-        
-        .status {
-            padding: 5px 12px;
-            border-radius: 20px;
-            font-size: 12px;
-            font-weight: 600;
-        }
-        
-        .status-created { background: #f0ad4e; color: white; }
-        .status-running { background: #5bc0de; color: white; }
-        .status-completed { background: #5cb85c; color: white; }
-        
-        .metric-badge {
-            display: inline-block;
-            background: #e9ecef;
-            padding: 3px 8px;
-            border-radius: 10px;
-            margin: 2px;
-            font-size: 11px;
-        }
-        
-        .chart-container {
-            height: 300px;
-            margin-top: 20px;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <header>
-            <h1>🎯 ML Platform - Панель управления</h1>
-            <p class="subtitle">Система для создания и тестирования алгоритмов машинного обучения</p>
-            <p>Текущее время: {{ current_time }}</p>
-        </header>
-        
-        <!-- Статистика -->
-        <div class="stats-grid">
-            <div class="stat-card">
-                <h3>Проектов</h3>
-                <div class="value">{{ stats.total_projects }}</div>
-            </div>
-            <div class="stat-card">
-                <h3>Экспериментов</h3>
-                <div class="value">{{ stats.total_experiments }}</div>
-            </div>
-            <div class="stat-card">
-                <h3>Завершено</h3>
-                <div class="value">{{ stats.completed_experiments }}</div>
-            </div>
-            <div class="stat-card">
-                <h3>Выполняется</h3>
-                <div class="value">{{ stats.running_experiments }}</div>
-            </div>
-        </div>
-        
-        <!-- Быстрые действия -->
-        <div class="action-buttons">
-            <a href="/project/create" class="btn">📁 Создать проект</a>
-            <a href="/experiment/create" class="btn">🔬 Создать эксперимент</a>
-            <a href="/visualization" class="btn">📊 Визуализация</a>
-            <button onclick="refreshDashboard()" class="btn">🔄 Обновить</button>
-        </div>
-        
-        <div class="content-grid">
-            <!-- Основной контент -->
-            <div class="main-content">
-                <h2>📁 Последние проекты</h2>
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Название</th>
-                            <th>Описание</th>
-                            <th>Статус</th>
-                            <th>Экспериментов</th>
-                            <th>Дата</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-                        {% for project in projects[:5] %}
-                        <tr>
-                            <td><a href="/project/{{ project.id }}">{{ project.name }}</a></td>
-                            <td>{{ project.description[:50] }}...</td>
-                            <td><span class="status status-{{ project.status }}">{{ project.status }}</span></td>
-                            <td>{{ project.experiments|length }}</td>
-                            <td>{{ project.created_at.strftime('%d.%m.%Y') }}</td>
-                        </tr>
-                        {% endfor %}
-                    </tbody>
-                </table>
-                
-                <h2 style="margin-top: 30px;">🔬 Последние эксперименты</h2>
-                <table>
-                    <thead>
-                        <tr>
-                            <th>Название</th>
-                            <th>Алгоритм</th>
-                            <th>Статус</th>
-                            <th>Метрики</th>
-                            <th>Проект</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-                        {% for exp in experiments %}
-                        <tr>
-                            <td><a href="/experiment/{{ exp.id }}">{{ exp.name }}</a></td>
-                            <td>{{ exp.algorithm }}</td>
-                            <td><span class="status status-{{ exp.status }}">{{ exp.status }}</span></td>
-                            <td>
-                                {% for name, value in exp.metrics.items() %}
-                                <span class="metric-badge">{{ name }}: {{ value }}</span>
-                                {% endfor %}
-                            </td>
-                            <td>
-                                {% for p in projects %}
-                                    {% if p.id == exp.project_id %}
-                                        {{ p.name[:20] }}...
-                                    {% endif %}
-                                {% endfor %}
-                            </td>
-                        </tr>
-                        {% endfor %}
-                    </tbody>
-                </table>
-            </div>
-            
-            <!-- Боковая панель -->
-            <div class="sidebar">
-                <div class="widget">
-                    <h2>📈 Активность системы</h2>
-                    <div class="chart-container">
-                        <canvas id="activityChart"></canvas>
-                    </div>
-                </div>
-                
-                <div class="widget">
-                    <h2>🏆 Лучшие метрики</h2>
-                    <div id="best-metrics">
-                        {% for exp in experiments %}
-                            {% if exp.metrics %}
-                                <div style="margin: 10px 0; padding: 10px; background: #f8f9fa; border-radius: 8px;">
-                                    <strong>{{ exp.name[:20] }}...</strong><br>
-                                    <small>Accuracy: {{ exp.metrics.get('accuracy', 0) }}</small>
-                                </div>
-                            {% endif %}
-                        {% endfor %}
-                    </div>
-                </div>
-                
-                <div class="widget">
-                    <h2>📋 Обученные модели</h2>
-                    {% for model in models %}
-                    <div style="margin: 10px 0; padding: 10px; background: #f8f9fa; border-radius: 8px;">
-                        <strong>{{ model.name }}</strong><br>
-                        <small>Версия: {{ model.version }}</small><br>
-                        <small>Статус: {{ model.deployment_status or 'Не развернута' }}</small>
-                    </div>
-                    {% endfor %}
-                </div>
-            </div>
-        </div>
-    </div>
-    
-    <script>
-        // Инициализация графика активности
-        const ctx = document.getElementById('activityChart').getContext('2d');
-        const activityChart = new Chart(ctx, {
-            type: 'line',
-            data: {
-                labels: ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс'],
-                datasets: [{
-                    label: 'Запущено экспериментов',
-                    data: [3, 5, 2, 8, 6, 4, 7],
-                    borderColor: '#667eea',
-                    backgroundColor: 'rgba(102, 126, 234, 0.1)',
-                    tension: 0.4
-                }]
-            },
-            options: {
-                responsive: true,
-                maintainAspectRatio: false
-            }
-        });
-        
-        function refreshDashboard() {
-            location.reload();
-        }
-        
-        // Автообновление каждые 30 секунд
-        setInterval(refreshDashboard, 30000);
-    </script>
-</body>
-</html>
-""",
-    
-    "create_project.html": """
-<!DOCTYPE html>
-<html lang="ru">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Создание проекта - ML Platform</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; font-family: 'Segoe UI', Arial, sans-serif; }
-        body { background: #f5f7fa; color: #333; padding: 20px; }
-        .container { max-width: 800px; margin: 50px auto; }
-        
-        .form-card {
-            background: white;
-            border-radius: 12px;
-            padding: 40px;
-            box-shadow: 0 4px 20px rgba(0,0,0,0.1);
-        }
-        
-        h1 { 
-            color: #2c3e50; 
-            margin-bottom: 30px;
-            text-align: center;
-        }
-        
-        .form-group {
-            margin-bottom: 25px;
-        }
-        
-        label {
-            display: block;
-            margin-bottom: 8px;
-            font-weight: 600;
-            color: #555;
-        }
-        
-        input, textarea, select {
-            width: 100%;
-            padding: 12px 15px;
-            border: 2px solid #e0e0e0;
-            border-radius: 8px;
-            font-size: 16px;
-            transition: border-color 0.3s;
-        }
-        
-        input:focus, textarea:focus, select:focus {
-            border-color: #667eea;
-            outline: none;
-        }
-        
-        textarea {
-            min-height: 120px;
-            resize: vertical;
-        }
-        
-        .btn {
-            display: inline-block;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 14px 28px;
-            border-radius: 8px;
-            text-decoration: none;
-            text-align: center;
-            font-weight: 600;
-            font-size: 16px;
-            border: none;
-            cursor: pointer;
-            width: 100%;
-            transition: all 0.3s;
-        }
-        
-        .btn:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 5px 15px rgba(102, 126, 234, 0.4);
-        }
-        
-        .btn-back {
-            background: #6c757d;
-            margin-top: 15px;
-        }
-        
-        .message {
-            padding: 15px;
-            border-radius: 8px;
-            margin-bottom: 20px;
-            display: none;
-        }
-        
-        .success { background: #d4edda; color: #155724; }
-        .error { background: #f8d7da; color: #721c24; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="form-card">
-            <h1>📁 Создание нового проекта</h1>
-            
-            <div id="message" class="message"></div>
-            
-            <form id="projectForm">
-                <div class="form-group">
-                    <label for="name">Название проекта *</label>
-                    <input type="text" id="name" name="name" required 
-                           placeholder="Например: Прогнозирование оттока клиентов">
-                </div>
-                
-                <div class="form-group">
-                    <label for="description">Описание проекта *</label>
-                    <textarea id="description" name="description" required 
-                              placeholder="Опишите цели и задачи проекта..."></textarea>
-                </div>
-                
-                <div class="form-group">
-                    <label for="tags">Теги (через запятую)</label>
-                    <input type="text" id="tags" name="tags" 
-                           placeholder="ML, классификация, финансы">
-                </div>
-                
-                <button type="submit" class="btn">Создать проект</button>
-                <a href="/" class="btn btn-back">← Назад к дашборду</a>
-            </form>
-        </div>
-    </div>
-    
-    <script>
-        document.getElementById('projectForm').addEventListener('submit', async function(e) {
-            e.preventDefault();
-            
-            const formData = new FormData(this);
-            const messageDiv = document.getElementById('message');
-            
-            try {
-                const response = await fetch('/api/projects', {
-                    method: 'POST',
-                    body: formData
-                });
-                
-                const result = await response.json();
-                
-                if (result.success) {
-                    messageDiv.className = 'message success';
-                    messageDiv.textContent = `✅ Проект "${result.project_name}" успешно создан!`;
-                    messageDiv.style.display = 'block';
-                    
-                    // Очищаем форму
-                    this.reset();
-                    
-                    // Через 2 секунды переходим к созданию эксперимента
-                    setTimeout(() => {
-                        window.location.href = `/experiment/create?project_id=${result.project_id}`;
-                    }, 2000);
-                } else {
-                    throw new Error(result.message || 'Ошибка при создании проекта');
-                }
-            } catch (error) {
-                messageDiv.className = 'message error';
-                messageDiv.textContent = `❌ Ошибка: ${error.message}`;
-                messageDiv.style.display = 'block';
-            }
-        });
-    </script>
-</body>
-</html>
-""",
-    
-    "create_experiment.html": """
-<!DOCTYPE html>
-<html lang="ru">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Создание эксперимента - ML Platform</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; font-family: 'Segoe UI', Arial, sans-serif; }
-        body { background: #f5f7fa; color: #333; padding: 20px; }
-        .container { max-width: 800px; margin: 50px auto; }
-        
-        .form-card {
-            background: white;
-            border-radius: 12px;
-            padding: 40px;
-            box-shadow: 0 4px 20px rgba(0,0,0,0.1);
-        }
-        
-        h1 { 
-            color: #2c3e50; 
-            margin-bottom: 30px;
-            text-align: center;
-        }
-        
-        .form-group {
-            margin-bottom: 25px;
-        }
-        
-        label {
-            display: block;
-            margin-bottom: 8px;
-            font-weight: 600;
-            color: #555;
-        }
-        
-        input, textarea, select {
-            width: 100%;
-            padding: 12px 15px;
-            border: 2px solid #e0e0e0;
-            border-radius: 8px;
-            font-size: 16px;
-            transition: border-color 0.3s;
-        }
-        
-        input:focus, textarea:focus, select:focus {
-            border-color: #667eea;
-            outline: none;
-        }
-        
-        .btn {
-            display: inline-block;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 14px 28px;
-            border-radius: 8px;
-            text-decoration: none;
-            text-align: center;
-            font-weight: 600;
-            font-size: 16px;
-            border: none;
-            cursor: pointer;
-            width: 100%;
-            transition: all 0.3s;
-        }
-        
-        .btn:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 5px 15px rgba(102, 126, 234, 0.4);
-        }
-        
-        .btn-start {
-            background: #28a745;
-            margin-top: 10px;
-        }
-        
-        .btn-back {
-            background: #6c757d;
-            margin-top: 15px;
-        }
-        
-        .message {
-            padding: 15px;
-            border-radius: 8px;
-            margin-bottom: 20px;
-            display: none;
-        }
-        
-        .success { background: #d4edda; color: #155724; }
-        .error { background: #f8d7da; color: #721c24; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="form-card">
-            <h1>🔬 Создание нового эксперимента</h1>
-            
-            <div id="message" class="message"></div>
-            
-            <form id="experimentForm">
-                <div class="form-group">
-                    <label for="name">Название эксперимента *</label>
-                    <input type="text" id="name" name="name" required 
-                           placeholder="Например: XGBoost с подбором гиперпараметров">
-                </div>
-                
-                <div class="form-group">
-                    <label for="project_id">Проект *</label>
-                    <select id="project_id" name="project_id" required>
-                        <option value="">Выберите проект</option>
-                        {% for project in projects %}
-                        <option value="{{ project.id }}">{{ project.name }}</option>
-                        {% endfor %}
-                    </select>
-                </div>
-                
-                <div class="form-group">
-                    <label for="algorithm">Алгоритм *</label>
-                    <select id="algorithm" name="algorithm" required>
-                        <option value="">Выберите алгоритм</option>
-                        <option value="XGBoost">XGBoost</option>
-                        <option value="Random Forest">Random Forest</option>
-                        <option value="LightGBM">LightGBM</option>
-                        <option value="CatBoost">CatBoost</option>
-                        <option value="Logistic Regression">Logistic Regression</option>
-                        <option value="Neural Network">Neural Network</option>
-                    </select>
-                </div>
-                
-                <div class="form-group">
-                    <label for="dataset">Датасет *</label>
-                    <select id="dataset" name="dataset" required>
-                        <option value="">Выберите датасет</option>
-                        <option value="customer_data.csv">Данные клиентов (CSV)</option>
-                        <option value="fraud_data.csv">Данные мошенничества (CSV)</option>
-                        <option value="sales_data.csv">Данные продаж (CSV)</option>
-                        <option value="images_dataset.zip">Набор изображений (ZIP)</option>
-                    </select>
-                </div>
-                
-                <div class="form-group">
-                    <label for="hyperparameters">Гиперпараметры (JSON)</label>
-                    <textarea id="hyperparameters" name="hyperparameters" 
-                              placeholder='{"learning_rate": 0.1, "max_depth": 6, "n_estimators": 100}'></textarea>
-                </div>
-                
-                <button type="submit" class="btn">Создать эксперимент</button>
-                <button type="button" id="startTrainingBtn" class="btn btn-start" style="display: none;">
-                    🚀 Запустить обучение
-                </button>
-                <a href="/" class="btn btn-back">← Назад к дашборду</a>
-            </form>
-        </div>
-    </div>
-    
-    <script>
-        let currentExperimentId = null;
-        
-        document.getElementById('experimentForm').addEventListener('submit', async function(e) {
-            e.preventDefault();
-            
-            const formData = new FormData(this);
-            const messageDiv = document.getElementById('message');
-            
-            try {
-                const response = await fetch('/api/experiments', {
-                    method: 'POST',
-                    body: formData
-                });
-                
-                const result = await response.json();
-                
-                if (result.success) {
-                    messageDiv.className = 'message success';
-                    messageDiv.textContent = `✅ Эксперимент "${result.experiment_name}" успешно создан!`;
-                    messageDiv.style.display = 'block';
-                    
-                    currentExperimentId = result.experiment_id;
-                    
-                    // Показываем кнопку запуска обучения
-                    document.getElementById('startTrainingBtn').style.display = 'block';
-                    
-                    // Прокручиваем к сообщению
-                    messageDiv.scrollIntoView({ behavior: 'smooth' });
-                } else {
-                    throw new Error(result.message || 'Ошибка при создании эксперимента');
-                }
-            } catch (error) {
-                messageDiv.className = 'message error';
-                messageDiv.textContent = `❌ Ошибка: ${error.message}`;
-                messageDiv.style.display = 'block';
-            }
-        });
-        
-        document.getElementById('startTrainingBtn').addEventListener('click', async function() {
-            if (!currentExperimentId) return;
-            
-            const messageDiv = document.getElementById('message');
-            
-            try {
-                const response = await fetch(`/api/experiments/${currentExperimentId}/start`, {
-                    method: 'POST'
-                });
-                
-                const result = await response.json();
-                
-                if (result.success) {
-                    messageDiv.className = 'message success';
-                    messageDiv.innerHTML = `
-                        ✅ Обучение завершено успешно!<br>
-                        📊 Метрики:<br>
-                        ${Object.entries(result.metrics).map(([k, v]) => 
-                            `• ${k}: ${v}<br>`
-                        ).join('')}
-                        <a href="/experiment/${currentExperimentId}" class="btn" style="margin-top: 10px;">
-                            📄 Перейти к деталям эксперимента
-                        </a>
-                    `;
-                    messageDiv.style.display = 'block';
-                    
-                    // Скрываем кнопку запуска
-                    this.style.display = 'none';
-                } else {
-                    throw new Error(result.message || 'Ошибка при запуске обучения');
-                }
-            } catch (error) {
-                messageDiv.className = 'message error';
-                messageDiv.textContent = `❌ Ошибка: ${error.message}`;
-                messageDiv.style.display = 'block';
-            }
-        });
-    </script>
-</body>
-</html>
-""",
-    
-    "visualization.html": """
-<!DOCTYPE html>
-<html lang="ru">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Визуализация - ML Platform</title>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; font-family: 'Segoe UI', Arial, sans-serif; }
-        body { background: #f5f7fa; color: #333; padding: 20px; }
-        .container { max-width: 1400px; margin: 0 auto; }
-        
-        header { 
-            background: linear-gradient(135deg, #00b09b 0%, #96c93d 100%);
-            color: white;
-            padding: 25px;
-            border-radius: 12px;
-            margin-bottom: 25px;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.1);
-        }
-        
-        h1 { font-size: 32px; margin-bottom: 10px; }
-        .subtitle { opacity: 0.9; font-size: 16px; }
-        
-        .charts-grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(500px, 1fr));
-            gap: 25px;
-            margin-bottom: 30px;
-        }
-        
-        .chart-card {
-            background: white;
-            border-radius: 12px;
-            padding: 25px;
-            box-shadow: 0 4px 12px rgba(0,0,0,0.08);
-        }
-        
-        .chart-container {
-            height: 300px;
-            margin-top: 20px;
-        }
-        
-        .btn {
-            display: inline-block;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 12px 24px;
-            border-radius: 8px;
-            text-decoration: none;
-            text-align: center;
-            font-weight: 600;
-            transition: all 0.3s;
-            margin: 10px 5px;
-        }
-        
-        .btn:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 5px 15px rgba(102, 126, 234, 0.4);
-        }
-        
-        h2 { 
-            color: #2c3e50; 
-            margin-bottom: 20px; 
-            padding-bottom: 10px;
-            border-bottom: 2px solid #f0f0f0;
-        }
-        
-        table {
-            width: 100%;
-            border-collapse: collapse;
-            margin-top: 15px;
-        }
-        
-        th, td {
-            padding: 15px;
-            text-align: left;
-            border-bottom: 1px solid #eee;
-        }
-        
-        th { background: #f8f9fa; font-weight: 600; color: #555; }
-        
-        .metric-badge {
-            display: inline-block;
-            background: #e9ecef;
-            padding: 3px 8px;
-            border-radius: 10px;
-            margin: 2px;
-            font-size: 11px;
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <header>
-            <h1>📊 Визуализация результатов</h1>
-            <p class="subtitle">Анализ и сравнение метрик экспериментов</p>
-            <div>
-                <a href="/" class="btn">← Назад к дашборду</a>
-                <button onclick="refreshCharts()" class="btn">🔄 Обновить графики</button>
-            </div>
-        </header>
-        
-        <div class="charts-grid">
-            <div class="chart-card">
-                <h2>📈 Сравнение точности (Accuracy)</h2>
-                <div class="chart-container">
-                    <canvas id="accuracyChart"></canvas>
-                </div>
-            </div>
-            
-            <div class="chart-card">
-                <h2>🎯 Сравнение F1-Score</h2>
-                <div class="chart-container">
-                    <canvas id="f1Chart"></canvas>
-                </div>
-            </div>
-            
-            <div class="chart-card">
-                <h2>📉 Матрица ошибок (Confusion Matrix)</h2>
-                <div class="chart-container">
-                    <canvas id="confusionMatrix"></canvas>
-                </div>
-            </div>
-            
-            <div class="chart-card">
-                <h2>📊 Распределение метрик</h2>
-                <div class="chart-container">
-                    <canvas id="metricsDistribution"></canvas>
-                </div>
-            </div>
-        </div>
-        
-        <div class="chart-card" style="margin-top: 25px;">
-            <h2>📋 Детальные метрики экспериментов</h2>
-            <table>
-                <thead>
-                    <tr>
-                        <th>Эксперимент</th>
-                        <th>Алгоритм</th>
-                        <th>Accuracy</th>
-                        <th>Precision</th>
-                        <th>Recall</th>
-                        <th>F1-Score</th>
-                        <th>Статус</th>
-                    </tr>
-                </thead>
-                <tbody>
-                    {% for exp in experiments %}
-                    <tr>
-                        <td><a href="/experiment/{{ exp.id }}">{{ exp.name }}</a></td>
-                        <td>{{ exp.algorithm }}</td>
-                        <td>{{ exp.metrics.get('accuracy', 'N/A') }}</td>
-                        <td>{{ exp.metrics.get('precision', 'N/A') }}</td>
-                        <td>{{ exp.metrics.get('recall', 'N/A') }}</td>
-                        <td>{{ exp.metrics.get('f1_score', 'N/A') }}</td>
-                        <td>{{ exp.status }}</td>
-                    </tr>
-                    {% endfor %}
-                </tbody>
-            </table>
-        </div>
-    </div>
-    
-    <script>
-        const chartData = {{ chart_data|safe }};
-        
-        // График точности
-        const accuracyCtx = document.getElementById('accuracyChart').getContext('2d');
-        const accuracyChart = new Chart(accuracyCtx, {
-            type: 'bar',
-            data: {
-                labels: chartData.experiment_names,
-                datasets: [{
-                    label: 'Accuracy',
-                    data: chartData.accuracy_scores,
-                    backgroundColor: 'rgba(54, 162, 235, 0.7)',
-                    borderColor: 'rgba(54, 162, 235, 1)',
-                    borderWidth: 1
-                }]
-            },
-            options: {
-                responsive: true,
-                maintainAspectRatio: false,
-                scales: {
-                    y: {
-                        beginAtZero: true,
-                        max: 1.0,
-                        ticks: {
-                            callback: function(value) {
-                                return (value * 100).toFixed(0) + '%';
-                            }
-                        }
-                    }
-                }
-            }
-        });
-        
-        // График F1-Score
-        const f1Ctx = document.getElementById('f1Chart').getContext('2d');
-        const f1Chart = new Chart(f1Ctx, {
-            type: 'line',
-            data: {
-                labels: chartData.experiment_names,
-                datasets: [{
-                    label: 'F1-Score',
-                    data: chartData.f1_scores,
-                    borderColor: 'rgba(75, 192, 192, 1)',
-                    backgroundColor: 'rgba(75, 192, 192, 0.2)',
-                    borderWidth: 3,
-                    tension: 0.4,
-                    fill: true
-                }]
-            },
-            options: {
-                responsive: true,
-                maintainAspectRatio: false,
-                scales: {
-                    y: {
-                        beginAtZero: true,
-                        max: 1.0,
-                        ticks: {
-                            callback: function(value) {
-                                return value.toFixed(2);
-                            }
-                        }
-                    }
-                }
-            }
-        });
-        
-        // Матрица ошибок
-        const matrixCtx = document.getElementById('confusionMatrix').getContext('2d');
-        const confusionMatrix = new Chart(matrixCtx, {
-            type: 'matrix',
-            data: {
-                datasets: [{
-                    label: 'Confusion Matrix',
-                    data: [
-                        {x: 'True Positive', y: 'Predicted Positive', v: 85},
-                        {x: 'False Negative', y: 'Predicted Positive', v: 15},
-                        {x: 'False Positive', y: 'Predicted Negative', v: 10},
-                        {x: 'True Negative', y: 'Predicted Negative', v: 90}
-                    ],
-                    backgroundColor: function(context) {
-                        const value = context.dataset.data[context.dataIndex].v;
-                        const alpha = value / 100;
-                        return `rgba(255, 99, 132, ${alpha})`;
-                    },
-                    borderColor: 'rgba(255, 99, 132, 1)',
-                    borderWidth: 1,
-                    width: 100,
-                    height: 100
-                }]
-            },
-            options: {
-                responsive: true,
-                maintainAspectRatio: false,
-                plugins: {
-                    legend: {
-                        display: false
-                    },
-                    tooltip: {
-                        callbacks: {
-                            label: function(context) {
-                                return `${context.raw.x}, ${context.raw.y}: ${context.raw.v}`;
-                            }
-                        }
-                    }
-                },
-                scales: {
-                    x: {
-                        type: 'category',
-                        labels: ['Predicted Positive', 'Predicted Negative'],
-                        offset: true,
-                        grid: {
-                            display: false
-                        }
-                    },
-                    y: {
-                        type: 'category',
-                        labels: ['True Positive', 'False Negative', 'False Positive', 'True Negative'],
-                        offset: true,
-                        grid: {
-                            display: false
-                        }
-                    }
-                }
-            }
-        });
-        
-        // Распределение метрик
-        const distCtx = document.getElementById('metricsDistribution').getContext('2d');
-        const metricsDistribution = new Chart(distCtx, {
-            type: 'radar',
-            data: {
-                labels: ['Accuracy', 'Precision', 'Recall', 'F1-Score', 'Speed', 'Memory'],
-                datasets: [
-                    {
-                        label: 'Лучший эксперимент',
-                        data: [0.95, 0.92, 0.93, 0.94, 0.85, 0.78],
-                        borderColor: 'rgba(255, 99, 132, 1)',
-                        backgroundColor: 'rgba(255, 99, 132, 0.2)',
-                        pointBackgroundColor: 'rgba(255, 99, 132, 1)'
-                    },
-                    {
-                        label: 'Средние значения',
-                        data: [0.85, 0.82, 0.83, 0.84, 0.75, 0.65],
-                        borderColor: 'rgba(54, 162, 235, 1)',
-                        backgroundColor: 'rgba(54, 162, 235, 0.2)',
-                        pointBackgroundColor: 'rgba(54, 162, 235, 1)'
-                    }
-                ]
-            },
-            options: {
-                responsive: true,
-                maintainAspectRatio: false,
-                scales: {
-                    r: {
-                        beginAtZero: true,
-                        max: 1.0
-                    }
-                }
-            }
-        });
-        
-        function refreshCharts() {
-            accuracyChart.update();
-            f1Chart.update();
-            confusionMatrix.update();
-            metricsDistribution.update();
-        }
-    </script>
-</body>
-</html>
-"""
-}
-
-# Сохраняем шаблоны
-for filename, content in TEMPLATES.items():
-    with open(f"templates/{filename}", "w", encoding="utf-8") as f:
-        f.write(content)
-
-# Создаем простой статический файл для стилей
-os.makedirs("static/css", exist_ok=True)
-with open("static/css/style.css", "w", encoding="utf-8") as f:
-    f.write("""
-    .experiment-card {
-        border: 1px solid #ddd;
-        border-radius: 8px;
-        padding: 15px;
-        margin: 10px 0;
-        background: white;
-    }
+# ============ ПАКЕТНАЯ ЗАГРУЗКА МЕТРИК ============
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+def _add_metric_point(batch: MetricBatch, known: Dict[str, bool], item: Any) -> Optional[str]:
+    """Проверяет точку и добавляет ее в пачку; возвращает текст ошибки или None"""
+    if not isinstance(item, dict):
+        return "Точка должна быть объектом"
+    experiment_id = item.get("experiment_id")
+    metric = item.get("metric")
+    value = item.get("value")
+    step = item.get("step")
+    timestamp = item.get("timestamp")
+    
+    if not isinstance(experiment_id, str):
+        return "Не указан experiment_id"
+    if not isinstance(metric, str) or not metric:
+        return "Не указано имя метрики"
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        return "value должно быть конечным числом"
+    if step is not None and (isinstance(step, bool) or not isinstance(step, int) or step < 0):
+        return "step должен быть неотрицательным целым"
+    if timestamp is not None and (isinstance(timestamp, bool) or not isinstance(timestamp, (int, float))):
+        return "timestamp должен быть числом (секунды Unix)"
+    if experiment_id not in known:
+        known[experiment_id] = db.get_experiment_by_id(experiment_id) is not None
+    if not known[experiment_id]:
+        return "Эксперимент не найден"
+    
+    batch.add(experiment_id, metric, value, step, timestamp)
+    return None
+
+async def _ndjson_items(request: Request):
+    """Разбирает NDJSON по мере поступления тела; битые строки отдает как ValueError"""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_json_line(line)
+    if buffer.strip():
+        yield _parse_json_line(buffer)
+
+def _parse_json_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Некорректный JSON: {e}")
+
+@router.post("/api/metrics/batch")
+async def ingest_metrics_api(request: Request):
+    """API пакетной загрузки пошаговых метрик (JSON-массив или NDJSON-поток)
+    
+    Каждая точка: {"experiment_id", "metric", "value", "step"?, "timestamp"?}.
+    Корректные точки записываются, ошибки возвращаются по индексу точки.
+    """
+    started = time.perf_counter()
+    batch = MetricBatch()
+    known: Dict[str, bool] = {}
+    errors = []
+    
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_TYPES:
+        index = 0
+        async for item in _ndjson_items(request):
+            error = str(item) if isinstance(item, ValueError) else _add_metric_point(batch, known, item)
+            if error:
+                errors.append({"index": index, "error": error})
+            index += 1
+        total = index
+    else:
+        try:
+            payload = json.loads(await request.body())
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Тело запроса должно быть JSON-массивом точек")
+        if isinstance(payload, dict):
+            payload = payload.get("points")
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=400, detail="Ожидается массив точек или {\"points\": [...]}")
+        for index, item in enumerate(payload):
+            error = _add_metric_point(batch, known, item)
+            if error:
+                errors.append({"index": index, "error": error})
+        total = len(payload)
     
-    .metric {
-        display: inline-block;
-        background: #f0f0f0;
-        padding: 3px 8px;
-        border-radius: 4px;
-        margin: 2px;
-        font-size: 12px;
+    # Запись с fsync - в пуле потоков, чтобы не держать event loop
+    series = await asyncio.to_thread(db.ingest_metrics, batch)
+    elapsed = time.perf_counter() - started
+    
+    return JSONResponse({
+        "accepted": batch.size,
+        "rejected": len(errors),
+        "series": len(series),
+        "errors": errors,
+        "points_per_second": round(total / elapsed) if elapsed > 0 else None
+    })
+
+@router.get("/api/stats")
+async def get_system_stats(request: Request):
+    """API для получения статистики системы (ETag - версия данных)"""
+    def render(etag: str) -> Response:
+        return JSONResponse(_stats_payload())
+    
+    return _versioned(request, render)
+
+def _stats_payload() -> Dict[str, int]:
+    counters = db.get_stats()
+    return {
+        "projects": counters["projects"],
+        "experiments": counters["experiments"],
+        "models": counters["models"],
+        "completed_experiments": counters["completed_experiments"],
+        "running_experiments": counters["running_experiments"],
+        "active_projects": counters["active_projects"]
     }
-    """)
+
+# ============ МОНИТОРИНГ ============
+
+@router.get("/metrics")
+async def metrics_api():
+    """Метрики процесса в текстовом формате Prometheus"""
+    text = await asyncio.to_thread(metrics.expose)
+    return Response(text, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# ============ ЖИВЫЕ ОБНОВЛЕНИЯ ============
+
+# Комментарий-пинг в тихом потоке, чтобы прокси не закрывали соединение
+LIVE_KEEPALIVE = 15.0
+# Пауза перед переподключением EventSource после обрыва
+LIVE_RETRY_MS = 3000
+
+def _project_state(project_id: str) -> Optional[Dict[str, Any]]:
+    project = db.get_project_by_id(project_id)
+    if not project:
+        return None
+    # Только счетчики по индексам: состояние не растет с числом экспериментов проекта
+    return {
+        "id": project.id,
+        "status": project.status,
+        "experiments": db.count_experiments_by_project(project_id),
+        "by_status": {status: db.count_experiments_by_project(project_id, status)
+                      for status in ("created", "queued", "running", "completed", "failed", "cancelled")}
+    }
+
+def _experiment_state(experiment_id: str) -> Optional[Dict[str, Any]]:
+    experiment = db.get_experiment_by_id(experiment_id)
+    if not experiment:
+        return None
+    store = db.metric_store
+    return {
+        "id": experiment.id,
+        "status": experiment.status,
+        "metrics": experiment.metrics,
+        # Сводки рядов (число точек, min, max, последняя точка), без самих точек
+        "series": {name: store.series(experiment_id, name).summary() for name in store.metrics(experiment_id)}
+    }
+
+live.register("stats", lambda _: _stats_payload())
+live.register("project", _project_state)
+live.register("experiment", _experiment_state)
+
+async def _live_events(topics: List[str]):
+    yield f"retry: {LIVE_RETRY_MS}\n\n"
+    # Подписка - внутри генератора: отключение клиента до начала потока ее не оставит
+    subscription = await live.subscribe(topics)
+    try:
+        while True:
+            updates = await subscription.next(timeout=LIVE_KEEPALIVE)
+            if not updates:
+                yield ": keepalive\n\n"
+                continue
+            yield "".join(
+                f"data: {json.dumps({'topic': topic, 'data': state}, ensure_ascii=False, default=str)}\n\n"
+                for topic, state in updates
+            )
+    finally:
+        live.unsubscribe(subscription)
+
+@router.get("/api/live")
+async def live_updates_api(topics: str):
+    """Живые обновления (Server-Sent Events): ?topics=stats,project:<id>,experiment:<id>
+
+    Сначала приходят текущие состояния всех тем, затем новые - не чаще раза
+    в LIVE_INTERVAL_MS на тему. Сообщение - {"topic": ..., "data": ...};
+    data = null - сущность не найдена.
+    """
+    try:
+        topics = live.validate(t.strip() for t in topics.split(",") if t.strip())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(_live_events(topics), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# ============ ЗАГРУЗКА ДАТАСЕТОВ ============
+
+# Тело части копится до такого блока и пишется на диск вне event loop
+UPLOAD_WRITE_BLOCK = 1024 * 1024
+
+def _get_upload(upload_id: str) -> UploadSession:
+    session = db.files.get_upload(upload_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Загрузка не найдена")
+    return session
+
+def _upload_response(session: UploadSession, status_code: int = 200) -> JSONResponse:
+    return JSONResponse(session.to_dict(), status_code=status_code,
+                        headers={"Upload-Offset": str(session.offset)})
+
+@router.post("/api/uploads", status_code=201)
+async def create_upload_api(request: Request):
+    """API для начала загрузки датасета: {"filename", "size"?, "sha256"?}
+    
+    Если датасет с таким sha256 уже есть, загрузка не нужна - он возвращается сразу.
+    """
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Тело запроса должно быть JSON-объектом")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Тело запроса должно быть JSON-объектом")
+    if payload.get("sha256"):
+        existing = db.get_dataset_by_sha256(str(payload["sha256"]).lower())
+        if existing:
+            return JSONResponse({"deduplicated": True, "dataset": existing.to_dict()})
+    try:
+        size = payload.get("size")
+        session = await asyncio.to_thread(db.files.create_upload, payload.get("filename"),
+                                          None if size is None else int(size))
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _upload_response(session, status_code=201)
+
+@router.get("/api/uploads/{upload_id}")
+@router.head("/api/uploads/{upload_id}")
+async def get_upload_api(upload_id: str):
+    """API для получения смещения, с которого продолжать загрузку"""
+    session = await asyncio.to_thread(_get_upload, upload_id)
+    return _upload_response(session)
+
+@router.patch("/api/uploads/{upload_id}")
+async def upload_chunk_api(upload_id: str, request: Request):
+    """API для приема части: тело - байты файла с позиции из заголовка Upload-Offset
+    
+    Тело не собирается в памяти целиком: оно пишется на диск блоками по мере
+    поступления. При обрыве принятое сохраняется, новое смещение - GET/HEAD.
+    """
+    session = await asyncio.to_thread(_get_upload, upload_id)
+    try:
+        offset = int(request.headers["Upload-Offset"])
+    except (KeyError, ValueError):
+        raise HTTPException(status_code=400, detail="Нужен заголовок Upload-Offset")
+    try:
+        writer = await asyncio.to_thread(db.files.open_chunk, session, offset)
+    except UploadConflict as e:
+        return JSONResponse({"detail": str(e), "offset": e.offset}, status_code=409,
+                            headers={"Upload-Offset": str(e.offset)})
+    
+    try:
+        block = bytearray()
+        async for chunk in request.stream():
+            block += chunk
+            if len(block) >= UPLOAD_WRITE_BLOCK:
+                await asyncio.to_thread(writer.write, bytes(block))
+                block.clear()
+        if block:
+            await asyncio.to_thread(writer.write, bytes(block))
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    finally:
+        await asyncio.to_thread(writer.close)
+    return _upload_response(session)
+
+@router.post("/api/uploads/{upload_id}/complete")
+async def complete_upload_api(upload_id: str, name: Optional[str] = None):
+    """API для завершения загрузки: регистрирует датасет (или отдает такой же по содержимому)"""
+    session = await asyncio.to_thread(_get_upload, upload_id)
+    try:
+        dataset, deduplicated = await asyncio.to_thread(db.complete_upload, session, name)
+    except UploadConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse({"deduplicated": deduplicated, "dataset": dataset.to_dict()},
+                        status_code=200 if deduplicated else 201)
+
+@router.delete("/api/uploads/{upload_id}")
+async def abort_upload_api(upload_id: str):
+    """API для отмены загрузки"""
+    session = await asyncio.to_thread(_get_upload, upload_id)
+    try:
+        await asyncio.to_thread(db.files.abort, session)
+    except UploadConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return JSONResponse({"success": True})
+
+@router.get("/api/datasets")
+async def get_datasets_api():
+    """API для получения загруженных датасетов"""
+    return JSONResponse([dataset.to_dict() for dataset in db.get_all_datasets()])
+
+@router.get("/api/datasets/{dataset_id}")
+async def get_dataset_api(dataset_id: str):
+    """API для получения датасета по ID"""
+    dataset = db.get_dataset_by_id(dataset_id)
+    if not dataset:
+        raise HTTPException(status_code=404, detail="Датасет не найден")
+    return JSONResponse(dataset.to_dict())
+
+# ============ АРТЕФАКТЫ ============
+
+# Блок чтения артефакта, если сервер не умеет отдавать файл сам
+ARTIFACT_READ_BLOCK = 256 * 1024
+
+def _parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Диапазон байт из заголовка Range как (start, end) включительно; None - отдать целиком
+    
+    Несколько диапазонов в одном запросе не поддерживаются - отдается весь
+    артефакт (это допустимый ответ). Неудовлетворимый диапазон - ValueError.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[6:].strip().partition("-")
+    try:
+        if first:
+            start, end = int(first), int(last) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1  # последние N байт
+    except ValueError:
+        return None
+    if first and last and end < start:
+        return None  # синтаксически неверный диапазон (RFC 9110: заголовок игнорируется)
+    if start >= size:
+        raise ValueError(f"Диапазон вне артефакта размером {size} байт")
+    return start, min(end, size - 1)
+
+class ArtifactResponse(Response):
+    """Отдача артефакта или диапазона его байт без чтения в память целиком
+    
+    Несжатый объект лежит на диске как есть: если сервер поддерживает
+    расширение ASGI zerocopysend, он отправляет байты из файла сам
+    (sendfile). Иначе блоки читаются в потоке, сжатый объект распаковывается
+    на лету.
+    """
+    media_type = "application/octet-stream"
+
+    def __init__(self, store: ArtifactStore, info: ArtifactInfo, start: int, end: int,
+                 status_code: int = 200):
+        self.store = store
+        self.info = info
+        self.start = start
+        self.end = end
+        self.status_code = status_code
+        self.background = None
+        headers = {"Content-Length": str(end - start + 1), "Accept-Ranges": "bytes",
+                   "ETag": f'"{info.sha256}"'}
+        if status_code == 206:
+            headers["Content-Range"] = f"bytes {start}-{end}/{info.size}"
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD" or self.end < self.start:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        if self.info.compression is None and "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.store.path(self.info), "rb") as f:
+                await send({"type": "http.response.zerocopysend", "file": f,
+                            "offset": self.start, "count": self.end - self.start + 1})
+            return
+        blocks = self.store.iter_range(self.info, self.start, self.end, ARTIFACT_READ_BLOCK)
+        try:
+            while True:
+                block = await asyncio.to_thread(next, blocks, None)
+                if block is None:
+                    break
+                await send({"type": "http.response.body", "body": block, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            blocks.close()
+
+async def _artifact_response(sha256: Optional[str], request: Request) -> Response:
+    info = await asyncio.to_thread(db.artifacts.info, (sha256 or "").lower())
+    if info is None:
+        raise HTTPException(status_code=404, detail="Артефакт не найден")
+    if_range = request.headers.get("If-Range")
+    try:
+        requested = None if if_range and if_range != f'"{info.sha256}"' else \
+            _parse_range(request.headers.get("Range"), info.size)
+    except ValueError:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{info.size}"})
+    if requested is None:
+        return ArtifactResponse(db.artifacts, info, 0, info.size - 1)
+    return ArtifactResponse(db.artifacts, info, *requested, status_code=206)
+
+@router.post("/api/artifacts")
+async def upload_artifact_api(request: Request, compression: Optional[str] = None):
+    """API для сохранения артефакта: тело - байты, ответ - адрес (sha256)
+    
+    ?compression=gzip|bz2|xz|none; без параметра - сжатие по умолчанию.
+    Уже сохраненное содержимое повторно не пишется (200 вместо 201).
+    """
+    if compression is None:
+        codec = "default"
+    elif compression == "none":
+        codec = None
+    elif compression in CODECS:
+        codec = compression
+    else:
+        raise HTTPException(status_code=400, detail=f"Неизвестный кодек: {compression}")
+    writer = await asyncio.to_thread(db.artifacts.writer, codec)
+    try:
+        block = bytearray()
+        async for chunk in request.stream():
+            block += chunk
+            if len(block) >= UPLOAD_WRITE_BLOCK:
+                await asyncio.to_thread(writer.write, bytes(block))
+                block.clear()
+        if block:
+            await asyncio.to_thread(writer.write, bytes(block))
+    except BaseException:
+        await asyncio.to_thread(writer.abort)
+        raise
+    info = await asyncio.to_thread(writer.commit)
+    return JSONResponse(info.to_dict(), status_code=200 if info.deduplicated else 201,
+                        headers={"Location": f"/api/artifacts/{info.sha256}"})
+
+@router.get("/api/artifacts/{sha256}")
+@router.head("/api/artifacts/{sha256}")
+async def download_artifact_api(sha256: str, request: Request):
+    """API для скачивания артефакта; поддерживает Range (докачка, чтение частями)"""
+    return await _artifact_response(sha256, request)
+
+@router.get("/api/experiments/{experiment_id}/artifact")
+@router.head("/api/experiments/{experiment_id}/artifact")
+async def download_experiment_artifact_api(experiment_id: str, request: Request):
+    """API для скачивания обученной модели эксперимента"""
+    experiment = db.get_experiment_by_id(experiment_id)
+    if not experiment:
+        raise HTTPException(status_code=404, detail="Эксперимент не найден")
+    return await _artifact_response(experiment.artifact_path, request)
+
+# ============ РАЗВЕРТЫВАНИЕ МОДЕЛЕЙ ============
+
+def _get_model(model_id: str) -> TrainedModel:
+    model = db.get_model_by_id(model_id)
+    if not model:
+        raise HTTPException(status_code=404, detail="Модель не найдена")
+    return model
+
+@router.post("/api/experiments/{experiment_id}/models", status_code=201)
+async def register_model_api(experiment_id: str, request: Request):
+    """API для регистрации модели из завершенного эксперимента: {"name"?, "description"?}"""
+    experiment = db.get_experiment_by_id(experiment_id)
+    if not experiment:
+        raise HTTPException(status_code=404, detail="Эксперимент не найден")
+    if experiment.status != "completed" or not experiment.artifact_path:
+        raise HTTPException(status_code=409, detail="У эксперимента нет обученной модели")
+    try:
+        payload = await request.json() if await request.body() else {}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Тело запроса должно быть JSON-объектом")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Тело запроса должно быть JSON-объектом")
+    model = TrainedModel(payload.get("name") or experiment.name, payload.get("description") or "", experiment.id)
+    model.metrics = dict(experiment.metrics)
+    model.artifact = experiment.artifact_path
+    db.add_model(model)
+    return JSONResponse(model.to_dict(), status_code=201)
+
+@router.get("/api/models")
+async def get_models_api():
+    """API для получения моделей"""
+    return JSONResponse([model.to_dict() for model in db.get_all_models()])
+
+@router.get("/api/models/{model_id}")
+async def get_model_api(model_id: str):
+    """API для получения модели по ID"""
+    return JSONResponse(_get_model(model_id).to_dict())
+
+@router.post("/api/models/{model_id}/deploy")
+async def deploy_model_api(model_id: str):
+    """API для развертывания модели: веса загружаются в процесс сервера"""
+    _get_model(model_id)
+    try:
+        model = await asyncio.to_thread(deployments.deploy, model_id)
+    except ModelNotServable as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return JSONResponse(model.to_dict())
+
+@router.post("/api/models/{model_id}/undeploy")
+async def undeploy_model_api(model_id: str):
+    """API для снятия модели с развертывания"""
+    _get_model(model_id)
+    return JSONResponse(deployments.undeploy(model_id).to_dict())
+
+@router.post("/api/models/{model_id}/predict")
+async def predict_api(model_id: str, request: Request):
+    """API для предсказания по одной строке: {"features": [...]}
+    
+    Одновременные запросы к модели собираются в пачки и считаются одним вызовом.
+    """
+    try:
+        payload = await request.json()
+        features = payload["features"]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail='Ожидается {"features": [...]}')
+    try:
+        probability = await deployments.predict(model_id, features)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Модель не найдена")
+    except ModelNotServable as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse({"model_id": model_id, "probability": probability, "label": int(probability >= 0.5)})
+
+@router.get("/api/models/{model_id}/drift")
+async def get_model_drift_api(model_id: str):
+    """API для дрейфа модели: PSI и KS по признакам и предсказанию относительно обучающей выборки"""
+    _get_model(model_id)
+    if not drift.tracking(model_id):
+        raise HTTPException(status_code=409, detail="Модель не загружена или обучена без профиля данных")
+    return JSONResponse(await asyncio.to_thread(drift.report, model_id))
+
+@router.post("/api/models/{model_id}/drift/reset")
+async def reset_model_drift_api(model_id: str):
+    """API для сброса накопленного живого профиля модели (новое окно наблюдения)"""
+    _get_model(model_id)
+    if not drift.tracking(model_id):
+        raise HTTPException(status_code=409, detail="Модель не загружена или обучена без профиля данных")
+    drift.reset(model_id)
+    return JSONResponse({"model_id": model_id, "reset": True})
+
+@router.get("/api/deployments")
+async def get_deployments_api():
+    """API для статистики развернутых моделей: кэш (объем, попадания, время загрузки) и пачки"""
+    return JSONResponse(deployments.stats())
 
 # ============ ЗАПУСК ПРИЛОЖЕНИЯ ============
 
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    """Старт воркера: хранилище открывается до первого запроса, модели прогреваются в фоне"""
+    print(f"📁 Рабочая директория: {BASE_DIR}")
+    await asyncio.to_thread(db._lazy_get)
+    # Незавершенные переборы прошлого запуска возобновляются сразу, а не при первом обращении
+    if db.get_running_sweeps():
+        await asyncio.to_thread(sweeps._lazy_get)
+    # Скомпилированные шаблоны общие для воркеров и перезапусков (запись атомарная)
+    cache_dir = os.path.join(db.data_dir, "cache", "templates")
+    os.makedirs(cache_dir, exist_ok=True)
+    templates.env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+    # Развернутые модели загружаются в фоне, сервер принимает запросы сразу
+    deployments.warmup()
+    # Остановка движка запусков и запись на диск - в atexit: подсистемы общие для приложений процесса
+    yield
+
+def create_app() -> FastAPI:
+    """Приложение: маршруты, статика и метрики запросов; подсистемы создаются лениво"""
+    application = FastAPI(
+        title="ML Platform",
+        description="Платформа для создания и тестирования алгоритмов машинного обучения",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+    application.add_middleware(MetricsMiddleware, registry=metrics)
+    application.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+    application.include_router(router)
+    return application
+
+app = create_app()
+
 if __name__ == "__main__":
     import uvicorn
     
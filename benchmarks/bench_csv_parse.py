@@ -0,0 +1,89 @@
+"""
+Бенчмарк разбора CSV в колоночный формат: МБ/с в зависимости от числа процессов
+
+Базы сравнения: построчный csv.reader с объектами строк Python и parse_csv
+в одном процессе. Ускорение от процессов ограничено числом ядер машины.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_csv_parse.py [--mb 200] [--workers 1 2 4]
+"""
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from ml_platform.infrastructure.storage.csv_parser import parse_csv  # noqa: E402
+
+
+def make_csv(path: str, megabytes: int):
+    """Таблица клиентов: целые, дробные и строковый столбец"""
+    rng = np.random.default_rng(0)
+    regions = np.array(["north", "south", "east", "west"])
+    with open(path, "w") as f:
+        f.write("customer_id,age,income,balance,score,region,churn\n")
+        start = 0
+        while f.tell() < megabytes * 1024 * 1024:
+            n = 100_000
+            ids = np.arange(start, start + n)
+            table = np.column_stack([
+                ids.astype(str),
+                rng.integers(18, 90, n).astype(str),
+                np.char.mod("%.2f", rng.normal(50_000, 15_000, n)),
+                np.char.mod("%.4f", rng.normal(size=n)),
+                np.char.mod("%.6f", rng.random(n)),
+                regions[rng.integers(0, 4, n)],
+                rng.integers(0, 2, n).astype(str),
+            ])
+            f.write("\n".join(",".join(row) for row in table.tolist()) + "\n")
+            start += n
+
+
+def csv_module_baseline(path: str):
+    """Построчный разбор: список значений на строку, затем столбцы"""
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        next(reader)
+        columns = [[] for _ in range(7)]
+        for row in reader:
+            for i, value in enumerate(row):
+                columns[i].append(value if i == 5 else float(value))
+    return [np.array(column) for column in columns]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="ml_platform_bench_csv_")
+    source = os.path.join(directory, "customers.csv")
+    make_csv(source, args.mb)
+    size_mb = os.path.getsize(source) / (1024 * 1024)
+    print(f"CSV: {size_mb:.0f} МБ, ядер: {os.cpu_count()}")
+
+    start = time.perf_counter()
+    csv_module_baseline(source)
+    baseline = size_mb / (time.perf_counter() - start)
+    print(f"{'csv.reader':>16} {baseline:>10.1f} МБ/с")
+
+    single = None
+    for workers in args.workers:
+        destination = os.path.join(directory, f"columnar-{workers}")
+        start = time.perf_counter()
+        parse_csv(source, destination, workers=workers)
+        rate = size_mb / (time.perf_counter() - start)
+        single = single or rate
+        print(f"{f'parse_csv x{workers}':>16} {rate:>10.1f} МБ/с  (x{rate / single:.2f} к одному процессу)")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Бенчмарк запросов к Database: задержка поиска при росте числа экспериментов
+
+Запуск из корня репозитория:
+    python benchmarks/bench_database.py [--max 1000000] [--backend sqlite|memory]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import Database, Experiment, Project  # noqa: E402
+
+EXPERIMENTS_PER_PROJECT = 10
+ALGORITHMS = ["Logistic Regression", "Random Forest", "XGBoost", "Neural Network"]
+
+
+def measure(fn, args, repeat: int = 20000) -> float:
+    """Средняя задержка одного вызова в микросекундах"""
+    start = time.perf_counter()
+    for arg in args[:repeat]:
+        fn(arg)
+    return (time.perf_counter() - start) / min(repeat, len(args)) * 1e6
+
+
+def grow(db: Database, target: int, experiment_ids: list, project_ids: list):
+    """Добавляет эксперименты (и проекты под них) до нужного размера"""
+    while len(experiment_ids) < target:
+        if len(experiment_ids) % EXPERIMENTS_PER_PROJECT == 0:
+            project = db.add_project(Project(name="bench", description="bench", owner=db.demo_user))
+            project_ids.append(project.id)
+        experiment = db.add_experiment(Experiment(
+            name=f"exp {len(experiment_ids)}",
+            algorithm=random.choice(ALGORITHMS),
+            dataset="bench.csv",
+            project_id=project_ids[-1]
+        ))
+        experiment_ids.append(experiment.id)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max", type=int, default=1_000_000)
+    parser.add_argument("--backend", default="sqlite", choices=["sqlite", "memory"])
+    args = parser.parse_args()
+
+    db = Database(tempfile.mkdtemp(prefix="ml_platform_bench_"), args.backend)
+    all_experiment_ids, all_project_ids = [], []
+    print(f"{'experiments':>12} {'exp by id':>11} {'project':>11} {'project page':>13} {'update':>11}  (мкс)")
+    size = 1000
+    while size <= args.max:
+        grow(db, size, all_experiment_ids, all_project_ids)
+        exp_ids = [random.choice(all_experiment_ids) for _ in range(20000)]
+        project_ids = [random.choice(all_project_ids) for _ in range(20000)]
+        print(f"{size:>12,} "
+              f"{measure(db.get_experiment_by_id, exp_ids):>11.2f} "
+              f"{measure(db.get_project_by_id, project_ids):>11.2f} "
+              f"{measure(db.get_experiments_by_project, project_ids):>13.2f} "
+              f"{measure(lambda i: db.update_experiment_status(i, 'running'), exp_ids, 2000):>11.2f}")
+        size *= 10
+    db.flush()
+
+
+if __name__ == "__main__":
+    main()
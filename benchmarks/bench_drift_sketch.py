@@ -0,0 +1,65 @@
+"""
+Бенчмарк скетчей дрейфа на пути предсказаний
+
+Меряет стоимость DriftMonitor.observe на микропачку (рядом - предсказание
+той же пачки скомпилированным бустингом), пересчет отчета PSI/KS и объем
+профиля, который не зависит от числа строк.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_drift_sketch.py [--batch 64] [--batches 2000]
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from ml_platform.core.services.monitoring_service import DriftMonitor  # noqa: E402
+from ml_platform.infrastructure.compute.sketches import DataProfile  # noqa: E402
+from ml_platform.infrastructure.compute.trainers import create_model, load_dataset  # noqa: E402
+from ml_platform.infrastructure.compute.tree_compiler import compile_model  # noqa: E402
+
+
+def per_call(fn, n: int) -> float:
+    started = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - started) / n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--batches", type=int, default=2000)
+    args = parser.parse_args()
+
+    X, y = load_dataset("drift_bench", n_samples=20_000, n_features=20)
+    X = X.copy()
+    X[:, 3] = np.round(np.abs(X[:, 3]) * 2)  # категориальный признак
+    model = create_model("XGBoost", {"n_estimators": 100}).fit(X, y)
+    compiled = compile_model(model)
+    started = time.perf_counter()
+    baseline = DataProfile.fit(X, model.predict_proba(X))
+    print(f"базовый профиль: {time.perf_counter() - started:.3f} с на {len(X)} строк, "
+          f"{len(pickle.dumps(baseline)) / 1024:.0f} КБ в pickle")
+
+    monitor = DriftMonitor()
+    monitor.track("m", baseline)
+    batch = X[:args.batch]
+    outputs = compiled.predict_proba(batch)
+    predict = per_call(lambda: compiled.predict_proba(batch), args.batches)
+    observe = per_call(lambda: monitor.observe("m", batch, outputs), args.batches)
+    print(f"пачка {args.batch}: предсказание {predict * 1e6:.0f} мкс, "
+          f"обновление скетчей {observe * 1e6:.0f} мкс (+{observe / predict:.0%})")
+    report = per_call(lambda: (monitor.observe("m", batch[:1], outputs[:1]), monitor.report("m")), 200)
+    print(f"отчет PSI/KS после новых строк: {report * 1e3:.2f} мс")
+    size = len(pickle.dumps(monitor.snapshot("m"))) / 1024
+    print(f"живой профиль после {monitor.report('m')['live_rows']} строк: {size:.0f} КБ в pickle")
+
+
+if __name__ == "__main__":
+    main()
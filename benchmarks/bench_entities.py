@@ -0,0 +1,102 @@
+"""
+Бенчмарк памяти: байт на эксперимент до и после компактного представления
+
+Запуск из корня репозитория:
+    python benchmarks/bench_entities.py [--count 200000]
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_platform.core.entities.base import parse_datetime  # noqa: E402
+from ml_platform.core.entities.experiment import Experiment  # noqa: E402
+from ml_platform.core.entities.metrics_table import EXPERIMENT_METRICS  # noqa: E402
+
+ALGORITHMS = ["Logistic Regression", "Random Forest", "XGBoost", "Neural Network"]
+DATASETS = ["customer_data.csv", "fraud_data.csv", "sales_data.csv", "images_dataset.zip"]
+STATUSES = ["created", "running", "completed", "failed"]
+
+
+class PlainExperiment:
+    """Прежнее представление: обычный объект с __dict__ и словарем метрик"""
+
+    @classmethod
+    def from_dict(cls, data):
+        experiment = cls()
+        experiment.id = data["id"]
+        experiment.name = data["name"]
+        experiment.algorithm = data["algorithm"]
+        experiment.dataset = data["dataset"]
+        experiment.project_id = data["project_id"]
+        experiment.status = data["status"]
+        experiment.created_at = parse_datetime(data["created_at"])
+        experiment.started_at = parse_datetime(data["started_at"])
+        experiment.completed_at = parse_datetime(data["completed_at"])
+        experiment.metrics = data.get("metrics", {})
+        experiment.hyperparameters = data.get("hyperparameters", {})
+        experiment.artifact_path = data.get("artifact_path")
+        return experiment
+
+
+def make_records(count: int):
+    """JSON-записи как из хранилища: каждая строка - отдельный объект"""
+    now = datetime.now().isoformat()
+    project_ids = [str(uuid.uuid4()) for _ in range(count // 10 + 1)]
+    for i in range(count):
+        completed = i % 2 == 0
+        yield json.dumps({
+            "id": str(uuid.uuid4()),
+            "name": f"Эксперимент {i}",
+            "algorithm": random.choice(ALGORITHMS),
+            "dataset": random.choice(DATASETS),
+            "project_id": project_ids[i // 10],
+            "status": "completed" if completed else random.choice(STATUSES),
+            "created_at": now,
+            "started_at": now,
+            "completed_at": now if completed else None,
+            "metrics": {
+                "accuracy": random.random(), "precision": random.random(), "recall": random.random(),
+                "f1_score": random.random(), "loss": random.random(), "training_time": random.randint(30, 300)
+            } if completed else {},
+            "hyperparameters": {},
+            "artifact_path": None
+        })
+
+
+def bytes_per_experiment(cls, records) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    experiments = [cls.from_dict(json.loads(record)) for record in records]
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    assert len(experiments) == len(records)
+    return used / len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=200_000)
+    args = parser.parse_args()
+
+    records = list(make_records(args.count))
+    plain = bytes_per_experiment(PlainExperiment, records)
+    compact = bytes_per_experiment(Experiment, records)
+    print(f"Экспериментов: {args.count:,}")
+    print(f"  __dict__ + dict метрик:      {plain:8.1f} байт/эксперимент")
+    print(f"  __slots__ + коды + колонки:  {compact:8.1f} байт/эксперимент")
+    print(f"  экономия:                    {1 - compact / plain:8.1%}")
+    print(f"  колонки метрик:              {EXPERIMENT_METRICS.nbytes() / args.count:8.1f} байт/эксперимент")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Бенчмарк живых обновлений: поток изменений и много подписчиков
+
+Поток в фоне добавляет эксперименты в проект, пока клиенты подписаны
+на "stats" и "project:<id>". Половина клиентов читает обновления сразу,
+половина не читает до конца замера (медленные). Выводятся:
+    изменение      - время add_experiment без подписчиков и с ними
+    расчеты        - сколько раз посчитаны состояния тем на все изменения
+    сообщения      - сколько состояний получил быстрый клиент
+    у медленного   - сколько состояний ждало медленного клиента в конце
+
+Запуск из корня репозитория:
+    python benchmarks/bench_live_updates.py [--clients 200] [--changes 3000] [--interval-ms 250]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("ML_PLATFORM_DATA_DIR", tempfile.mkdtemp(prefix="ml_platform_bench_"))
+os.environ.setdefault("ML_PLATFORM_SEED_DEMO", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import Experiment, db, live  # noqa: E402
+
+
+def add_experiments(project_id: str, n: int) -> float:
+    """Среднее время одного изменения (секунды)"""
+    started = time.perf_counter()
+    for i in range(n):
+        db.add_experiment(Experiment(f"live {i}", "XGBoost", "data.csv", project_id))
+    return (time.perf_counter() - started) / n
+
+
+async def read_all(subscription, received: list):
+    while True:
+        received.extend(await subscription.next())
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--changes", type=int, default=3000)
+    parser.add_argument("--interval-ms", type=float, default=250)
+    args = parser.parse_args()
+    live.min_interval = args.interval_ms / 1000
+
+    project_id = db.get_all_projects()[0].id
+    topics = ["stats", f"project:{project_id}"]
+    idle = await asyncio.to_thread(add_experiments, project_id, args.changes)
+
+    subscriptions = [await live.subscribe(topics) for _ in range(args.clients)]
+    fast, slow = subscriptions[:args.clients // 2], subscriptions[args.clients // 2:]
+    received = [[] for _ in fast]
+    readers = [asyncio.create_task(read_all(s, r)) for s, r in zip(fast, received)]
+    await asyncio.sleep(0.1)
+    computed = live.computed
+    started = time.perf_counter()
+    busy = await asyncio.to_thread(add_experiments, project_id, args.changes)
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(live.min_interval * 2)
+    computed = live.computed - computed
+    backlog = max(len(s._pending) for s in slow)
+    replaced = live.stats()["replaced"]
+    for reader in readers:
+        reader.cancel()
+    for subscription in subscriptions:
+        live.unsubscribe(subscription)
+
+    messages = sorted(len(r) for r in received)[len(received) // 2]
+    print(f"{args.clients} клиентов, {args.changes} изменений за {elapsed:.2f} с, интервал {args.interval_ms:.0f} мс")
+    print(f"   изменение: {idle * 1e6:.1f} мкс без подписчиков, {busy * 1e6:.1f} мкс с подписчиками")
+    print(f"     расчеты: {computed} состояний тем на {args.changes * len(topics)} изменений тем")
+    print(f"   сообщения: {messages} у быстрого клиента (медиана, со снимком)")
+    print(f"у медленного: {backlog} состояний в очереди (тем: {len(topics)}), заменено {replaced}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
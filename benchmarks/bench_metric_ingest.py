@@ -0,0 +1,59 @@
+"""
+Бенчмарк загрузки пошаговых метрик: точек в секунду при разном размере пачки
+
+Запуск из корня репозитория:
+    python benchmarks/bench_metric_ingest.py [--points 100000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("ML_PLATFORM_DATA_DIR", tempfile.mkdtemp(prefix="ml_platform_bench_"))
+os.environ.setdefault("ML_PLATFORM_SEED_DEMO", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+from app import app, db  # noqa: E402
+
+
+async def ingest(points: int, batch_size: int, ndjson: bool) -> float:
+    """Загружает points точек пачками batch_size, возвращает точек в секунду"""
+    experiment_id = db.get_all_experiments()[0].id
+    metric = f"loss_{batch_size}_{int(ndjson)}"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        for offset in range(0, points, batch_size):
+            batch = [{"experiment_id": experiment_id, "metric": metric, "step": step, "value": 1.0 / (step + 1)}
+                     for step in range(offset, min(offset + batch_size, points))]
+            if ndjson:
+                body = "\n".join(json.dumps(point) for point in batch).encode()
+                response = await client.post("/api/metrics/batch", content=body,
+                                             headers={"content-type": "application/x-ndjson"})
+            else:
+                response = await client.post("/api/metrics/batch", json=batch)
+            assert response.json()["rejected"] == 0
+        return points / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'batch':>8} {'format':>8} {'points/s':>12}")
+    for batch_size in (1, 100, 1000, 10000):
+        # Запрос на точку - слишком медленно для полного объема
+        points = min(args.points, 2000) if batch_size == 1 else args.points
+        for ndjson in (False, True):
+            rate = asyncio.run(ingest(points, batch_size, ndjson))
+            print(f"{batch_size:>8} {'ndjson' if ndjson else 'json':>8} {rate:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Бенчмарк накладных расходов метрик
+
+Варианты:
+    без метрик    - минимальное ASGI-приложение, вызванное напрямую
+    с метриками   - то же за MetricsMiddleware (счетчик, гистограммы задержки и размеров)
+    inc/observe   - стоимость одного обновления счетчика и гистограммы
+
+Запуск из корня репозитория:
+    python benchmarks/bench_metrics_overhead.py [--requests 50000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_platform.core.services.monitoring_service import MetricsMiddleware, MetricsRegistry  # noqa: E402
+
+
+class _Route:
+    path = "/api/items/{item_id}"
+
+
+async def plain_app(scope, receive, send):
+    scope["route"] = _Route
+    await receive()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b'{"ok": true}'})
+
+
+async def run(app, n: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/api/items/1"}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(n):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50_000)
+    args = parser.parse_args()
+    n = args.requests
+
+    registry = MetricsRegistry()
+    wrapped = MetricsMiddleware(plain_app, registry)
+    plain = min(asyncio.run(run(plain_app, n)) for _ in range(3))
+    measured = min(asyncio.run(run(wrapped, n)) for _ in range(3))
+    print(f"{'без метрик':>12}: {plain / n * 1e6:>6.2f} мкс/запрос")
+    print(f"{'с метриками':>12}: {measured / n * 1e6:>6.2f} мкс/запрос "
+          f"(+{(measured - plain) / n * 1e6:.2f} мкс)")
+
+    counter = registry.counter("bench_total", "Счетчик", ("route",)).labels("/a")
+    histogram = registry.histogram("bench_seconds", "Гистограмма").labels()
+    for name, update in (("counter.inc", counter.inc), ("histogram.observe", lambda: histogram.observe(0.003))):
+        started = time.perf_counter()
+        for _ in range(n):
+            update()
+        print(f"{name:>18}: {(time.perf_counter() - started) / n * 1e9:>6.0f} нс")
+    print(f"{'expose':>18}: {len(registry.expose())} байт")
+
+
+if __name__ == "__main__":
+    main()
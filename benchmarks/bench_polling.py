@@ -0,0 +1,84 @@
+"""
+Бенчмарк опроса страниц и сводок: стоимость запроса при неизменных данных
+
+Для каждого маршрута:
+    отрисовка  - данные меняются перед каждым запросом (полная отрисовка)
+    кэш        - данные не менялись, запрос без If-None-Match (тело из кэша)
+    304        - условный запрос открытой вкладки с ETag страницы
+
+Запросы идут прямо в ASGI-приложение, без сети.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_polling.py [--experiments 2000] [--requests 300]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("ML_PLATFORM_DATA_DIR", tempfile.mkdtemp(prefix="ml_platform_bench_"))
+os.environ.setdefault("ML_PLATFORM_SEED_DEMO", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import Experiment, app, db  # noqa: E402
+
+
+async def call(path: str, headers=()) -> tuple:
+    """Один GET напрямую в приложение: (статус, заголовки, размер тела)"""
+    scope = {"type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "query_string": b"",
+             "headers": [(b"host", b"bench")] + [(k.encode(), v.encode()) for k, v in headers],
+             "scheme": "http", "server": ("bench", 80), "client": ("127.0.0.1", 1), "http_version": "1.1",
+             "root_path": ""}
+    result = {"size": 0}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+            result["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == "http.response.body":
+            result["size"] += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return result["status"], result["headers"], result["size"]
+
+
+async def per_request(path: str, n: int, headers=(), mutate: bool = False) -> float:
+    project_id = db.get_all_projects()[0].id
+    total = 0.0
+    for _ in range(n):
+        if mutate:
+            db.add_experiment(Experiment("poll", "XGBoost", "data.csv", project_id))
+        started = time.perf_counter()
+        await call(path, headers)
+        total += time.perf_counter() - started
+    return total / n
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--experiments", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    project_id = db.get_all_projects()[0].id
+    for i in range(args.experiments):
+        db.add_experiment(Experiment(f"exp {i}", "XGBoost", "data.csv", project_id))
+    print(f"{len(db.get_all_experiments())} экспериментов, {args.requests} запросов на вариант")
+    for path in ("/", "/visualization", "/api/stats"):
+        status, headers, size = await call(path)
+        assert status == 200, (path, status)
+        render = await per_request(path, args.requests // 10, mutate=True)
+        cached = await per_request(path, args.requests)
+        etag = (await call(path))[1]["etag"]
+        conditional = await per_request(path, args.requests, headers=[("if-none-match", etag)])
+        print(f"{path:>14}: отрисовка {render * 1000:>8.2f} мс  кэш {cached * 1000:>6.3f} мс  "
+              f"304 {conditional * 1000:>6.3f} мс  (тело {size / 1024:.0f} КБ)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
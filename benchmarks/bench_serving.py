@@ -0,0 +1,69 @@
+"""
+Бенчмарк предсказаний развернутой модели: сборка запросов в пачки против по одному
+
+Клиенты в одном цикле событий шлют одиночные строки без пауз (закрытая
+нагрузка: следующий запрос - после ответа на предыдущий). Измеряются
+пропускная способность и p50/p99 задержки для MicroBatcher с
+max_batch_size=1 (каждая строка - отдельный вызов модели) и с пачками.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_serving.py [--algorithm XGBoost] [--clients 64] [--seconds 5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from ml_platform.core.services.deployment_service import MicroBatcher  # noqa: E402
+from ml_platform.infrastructure.compute.trainers import create_model, load_dataset  # noqa: E402
+
+
+async def run_load(batcher: MicroBatcher, X: np.ndarray, clients: int, seconds: float):
+    latencies = []
+    stop = time.perf_counter() + seconds
+
+    async def client(index: int):
+        i = index
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            await batcher.predict(X[i % len(X)])
+            latencies.append(time.perf_counter() - started)
+            i += clients
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    return len(latencies) / (time.perf_counter() - started), np.percentile(latencies, [50, 99]) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--algorithm", default="XGBoost")
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    X, y = load_dataset("serving_bench", n_samples=5000, n_features=20)
+    model = create_model(args.algorithm, {"n_estimators": 100} if args.algorithm != "Logistic Regression" else {})
+    model.fit(X, y)
+    print(f"Модель: {args.algorithm}, клиентов: {args.clients}, {args.seconds:.0f} с на режим")
+
+    modes = [("по одному", MicroBatcher(model.predict_proba, max_batch_size=1)),
+             ("пачками", MicroBatcher(model.predict_proba, args.max_batch, args.max_wait_ms))]
+    results = {}
+    for label, batcher in modes:
+        throughput, (p50, p99) = asyncio.run(run_load(batcher, X, args.clients, args.seconds))
+        results[label] = throughput
+        print(f"{label:>10}: {throughput:>9.0f} запросов/с  p50 {p50:>7.2f} мс  p99 {p99:>7.2f} мс  "
+              f"средняя пачка {batcher.stats()['mean_batch_size']:.1f}")
+    print(f"Ускорение: x{results['пачками'] / results['по одному']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
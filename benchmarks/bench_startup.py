@@ -0,0 +1,83 @@
+"""
+Бенчмарк холодного старта веб-приложения
+
+Каждый замер - новый процесс в пустом рабочем каталоге, как у только что
+запущенного воркера uvicorn. Каталог данных общий для замеров (как у
+воркеров одного сервера): первый запуск создает базу, следующие ее
+открывают. Замеры:
+    import      - импорт модуля app
+    startup     - lifespan приложения (открытие хранилища)
+    /api/stats  - первый запрос к API
+    /           - первый рендер дашборда (компиляция шаблона) и повторный
+Также выводится число файлов, созданных процессом в рабочем каталоге.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_startup.py [--runs 5] [--seed-demo] [--app-dir ДРУГАЯ_КОПИЯ]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import asyncio, json, os, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+import httpx
+
+async def main():
+    timings = {"import": imported - started}
+    mark = time.perf_counter()
+    async with app.app.router.lifespan_context(app.app):
+        timings["startup"] = time.perf_counter() - mark
+        transport = httpx.ASGITransport(app=app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for name, path in (("/api/stats", "/api/stats"), ("/", "/"), ("/ повторно", "/")):
+                mark = time.perf_counter()
+                response = await client.get(path)
+                assert response.status_code == 200, (path, response.status_code)
+                timings[name] = time.perf_counter() - mark
+    timings["total"] = time.perf_counter() - started
+    return timings
+
+timings = asyncio.run(main())
+timings["files"] = len(os.listdir("."))
+print("BENCH " + json.dumps(timings))
+"""
+
+
+def run_once(app_dir: str, data_dir: str, seed_demo: bool) -> dict:
+    with tempfile.TemporaryDirectory(prefix="ml_platform_startup_") as workdir:
+        env = dict(os.environ, PYTHONPATH=app_dir, ML_PLATFORM_DATA_DIR=data_dir,
+                   ML_PLATFORM_SEED_DEMO="1" if seed_demo else "0")
+        output = subprocess.run([sys.executable, "-c", CHILD], cwd=workdir, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        line = next(line for line in output.splitlines() if line.startswith("BENCH "))
+        return json.loads(line[len("BENCH "):])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed-demo", action="store_true", help="заполнить пустую базу демо-данными")
+    parser.add_argument("--app-dir", default=ROOT, help="каталог с app.py (например, другая копия репозитория)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ml_platform_startup_data_") as data_dir:
+        runs = [run_once(args.app_dir, data_dir, args.seed_demo) for _ in range(args.runs + 1)]
+    print(f"{args.app_dir}: {args.runs} запусков, демо-данные: {'да' if args.seed_demo else 'нет'}")
+    first, rest = runs[0], runs[1:]
+    print(f"{'':>12}  {'первый':>8}  {'медиана':>8} (мс)")
+    for name in ("import", "startup", "/api/stats", "/", "/ повторно", "total"):
+        print(f"{name:>12}: {first[name] * 1000:>8.1f}  {statistics.median(run[name] for run in rest) * 1000:>8.1f}")
+    print(f"{'файлы в cwd':>12}: {max(run['files'] for run in runs)}")
+
+
+if __name__ == "__main__":
+    main()
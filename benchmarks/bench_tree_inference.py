@@ -0,0 +1,84 @@
+"""
+Бенчмарк предсказаний ансамблей деревьев: строк в секунду и память
+
+Варианты:
+    по узлам      - спуск строки за строкой по узлам в цикле Python
+                    (считается на части строк, затем пересчитывается на все)
+    по деревьям   - Tree.predict: все строки сразу, но цикл Python по деревьям
+    compiled f64  - CompiledTreeEnsemble: все деревья и строки одним спуском
+    compiled f32  - то же с порогами и листьями во float32
+
+Запуск из корня репозитория:
+    python benchmarks/bench_tree_inference.py [--trees 100] [--rows 100000] [--batch 64]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from ml_platform.infrastructure.compute.trainers import create_model, load_dataset  # noqa: E402
+from ml_platform.infrastructure.compute.tree_compiler import compile_model  # noqa: E402
+
+
+def node_walk(model, X: np.ndarray) -> np.ndarray:
+    """Исходная схема: каждая строка идет по узлам каждого дерева"""
+    trees = [(t.feature.tolist(), t.threshold.tolist(), t.left.tolist(), t.right.tolist(), t.value.tolist())
+             for t in model.trees]
+    result = np.empty(len(X))
+    for i, row in enumerate(X.tolist()):
+        total = 0.0
+        for feature, threshold, left, right, value in trees:
+            node = 0
+            while feature[node] >= 0:
+                node = left[node] if row[feature[node]] <= threshold[node] else right[node]
+            total += value[node]
+        result[i] = total
+    return result
+
+
+def timed(fn, X, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(X)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=64, help="размер микропачки при отдаче модели")
+    args = parser.parse_args()
+
+    X, y = load_dataset("tree_bench", n_samples=20_000, n_features=20)
+    X_test = np.random.default_rng(1).normal(size=(args.rows, 20))
+    for algorithm in ("XGBoost", "Random Forest"):
+        model = create_model(algorithm, {"n_estimators": args.trees}).fit(X, y)
+        tree_bytes = sum(sum(a.nbytes for a in (t.feature, t.threshold, t.left, t.right, t.value))
+                         for t in model.trees)
+        compiled = {"compiled f64": compile_model(model), "compiled f32": compile_model(model, np.float32)}
+        print(f"{algorithm}: {args.trees} деревьев, {args.rows} строк")
+
+        sample = X_test[:max(1, args.rows // 100)]
+        walk = timed(lambda rows: node_walk(model, rows), sample, repeat=1) * len(X_test) / len(sample)
+        print(f"{'по узлам':>14}: {args.rows / walk:>12,.0f} строк/с")
+        variants = [("по деревьям", model.predict_proba, tree_bytes)] + \
+            [(name, c.predict_proba, c.nbytes) for name, c in compiled.items()]
+        for name, predict, nbytes in variants:
+            bulk = timed(predict, X_test)
+            batch = timed(predict, X_test[:args.batch], repeat=20)
+            print(f"{name:>14}: {args.rows / bulk:>12,.0f} строк/с  пачка {args.batch}: "
+                  f"{batch * 1000:>6.2f} мс  память {nbytes / 1024:>7.0f} КБ")
+        reference = model.predict_proba(X_test)
+        for name, c in compiled.items():
+            print(f"{name:>14}: макс. отклонение {np.abs(c.predict_proba(X_test) - reference).max():.1e}")
+
+
+if __name__ == "__main__":
+    main()
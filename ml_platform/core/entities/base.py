@@ -0,0 +1,47 @@
+"""
+Общие вспомогательные функции сущностей
+"""
+import threading
+from datetime import datetime
+
+
+def parse_datetime(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def format_datetime(value):
+    return value.isoformat() if value else None
+
+
+class CodeTable:
+    """Словарь повторяющихся строковых значений с компактными целыми кодами
+
+    Сущности хранят код (малое целое), а строку получают через таблицу,
+    поэтому статус или алгоритм не копируется в каждый объект.
+    """
+
+    def __init__(self, *values: str):
+        self._codes = {}
+        self._values = []
+        self._lock = threading.Lock()
+        for value in values:
+            self.encode(value)
+
+    def encode(self, value):
+        if value is None:
+            return None
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = len(self._values)
+                    self._values.append(value)
+                    self._codes[value] = code
+        return code
+
+    def decode(self, code):
+        return None if code is None else self._values[code]
+
+    def __len__(self):
+        return len(self._values)
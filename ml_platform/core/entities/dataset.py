@@ -0,0 +1,61 @@
+"""
+Сущность датасета, загруженного на платформу
+"""
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict
+
+from ml_platform.core.entities.base import format_datetime, parse_datetime
+
+
+class Dataset:
+    """Загруженный файл данных: содержимое адресуется по sha256 и хранится один раз"""
+
+    __slots__ = ("id", "name", "filename", "format", "sha256", "size_bytes", "path", "created_at",
+                 "columnar_path", "n_rows", "columns")
+
+    def __init__(self, name: str, filename: str, sha256: str, size_bytes: int, path: str):
+        self.id = str(uuid.uuid4())
+        self.name = name
+        self.filename = filename
+        self.format = os.path.splitext(filename)[1].lstrip(".").lower() or "bin"
+        self.sha256 = sha256
+        self.size_bytes = size_bytes
+        self.path = path
+        self.created_at = datetime.now()
+        # Заполняются после перевода в колоночный формат
+        self.columnar_path = None
+        self.n_rows = None
+        self.columns = []  # [{"name", "type", "min", "max"}]
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "filename": self.filename,
+            "format": self.format,
+            "sha256": self.sha256,
+            "size_bytes": self.size_bytes,
+            "path": self.path,
+            "created_at": format_datetime(self.created_at),
+            "columnar_path": self.columnar_path,
+            "n_rows": self.n_rows,
+            "columns": self.columns
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        dataset = cls.__new__(cls)
+        dataset.id = data["id"]
+        dataset.name = data["name"]
+        dataset.filename = data["filename"]
+        dataset.format = data["format"]
+        dataset.sha256 = data["sha256"]
+        dataset.size_bytes = data["size_bytes"]
+        dataset.path = data["path"]
+        dataset.created_at = parse_datetime(data["created_at"])
+        dataset.columnar_path = data.get("columnar_path")
+        dataset.n_rows = data.get("n_rows")
+        dataset.columns = data.get("columns", [])
+        return dataset
@@ -0,0 +1,107 @@
+"""
+Сущность эксперимента обучения модели
+"""
+import sys
+import uuid
+from datetime import datetime
+from typing import Any, Dict
+
+from ml_platform.core.entities.base import CodeTable, format_datetime, parse_datetime
+from ml_platform.core.entities.metrics_table import EXPERIMENT_METRICS, MetricsView
+
+EXPERIMENT_STATUSES = CodeTable("created", "running", "completed", "failed", "queued", "cancelled")
+ALGORITHMS = CodeTable()
+DATASETS = CodeTable()
+
+
+class Experiment:
+    # Без __dict__: статус, алгоритм и датасет хранятся кодами, метрики - строкой
+    # в колоночной таблице EXPERIMENT_METRICS
+    __slots__ = ("id", "name", "_algorithm", "_dataset", "project_id", "_status",
+                 "created_at", "started_at", "completed_at", "_metrics_row",
+                 "hyperparameters", "artifact_path")
+    
+    def __init__(self, name: str, algorithm: str, dataset: str, project_id: str):
+        self.id = str(uuid.uuid4())
+        self.name = name
+        self.algorithm = algorithm
+        self.dataset = dataset
+        self.project_id = sys.intern(project_id)  # общий объект строки на все эксперименты проекта
+        self.status = "created"
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.completed_at = None
+        self._metrics_row = EXPERIMENT_METRICS.allocate()
+        self.hyperparameters = {}
+        self.artifact_path = None  # sha256 обученной модели в хранилище артефактов
+    
+    def __del__(self):
+        row = getattr(self, "_metrics_row", None)
+        if row is not None:
+            EXPERIMENT_METRICS.release(row)
+    
+    @property
+    def status(self) -> str:
+        return EXPERIMENT_STATUSES.decode(self._status)
+    
+    @status.setter
+    def status(self, value: str):
+        self._status = EXPERIMENT_STATUSES.encode(value)
+    
+    @property
+    def algorithm(self) -> str:
+        return ALGORITHMS.decode(self._algorithm)
+    
+    @algorithm.setter
+    def algorithm(self, value: str):
+        self._algorithm = ALGORITHMS.encode(value)
+    
+    @property
+    def dataset(self) -> str:
+        return DATASETS.decode(self._dataset)
+    
+    @dataset.setter
+    def dataset(self, value: str):
+        self._dataset = DATASETS.encode(value)
+    
+    @property
+    def metrics(self) -> MetricsView:
+        return MetricsView(EXPERIMENT_METRICS, self._metrics_row)
+    
+    @metrics.setter
+    def metrics(self, values: Dict[str, Any]):
+        EXPERIMENT_METRICS.replace(self._metrics_row, values or {})
+    
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "algorithm": self.algorithm,
+            "dataset": self.dataset,
+            "project_id": self.project_id,
+            "status": self.status,
+            "created_at": format_datetime(self.created_at),
+            "started_at": format_datetime(self.started_at),
+            "completed_at": format_datetime(self.completed_at),
+            "metrics": dict(EXPERIMENT_METRICS.items(self._metrics_row)),
+            "hyperparameters": self.hyperparameters,
+            "artifact_path": self.artifact_path
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        experiment = cls.__new__(cls)
+        experiment.id = data["id"]
+        experiment.name = data["name"]
+        experiment.algorithm = data["algorithm"]
+        experiment.dataset = data["dataset"]
+        experiment.project_id = sys.intern(data["project_id"])
+        experiment.status = data["status"]
+        experiment.created_at = parse_datetime(data["created_at"])
+        experiment.started_at = parse_datetime(data["started_at"])
+        experiment.completed_at = parse_datetime(data["completed_at"])
+        experiment._metrics_row = EXPERIMENT_METRICS.allocate()
+        experiment.metrics = data.get("metrics")
+        experiment.hyperparameters = data.get("hyperparameters", {})
+        experiment.artifact_path = data.get("artifact_path")
+        return experiment
@@ -0,0 +1,157 @@
+"""
+Колоночная таблица итоговых метрик экспериментов
+
+Каждому эксперименту выделяется строка, каждой метрике - колонка array('d'),
+где отсутствующее значение хранится как NaN. Так метрика стоит 8 байт на
+эксперимент вместо словаря и отдельного объекта float на каждое значение.
+"""
+import math
+import threading
+from array import array
+from collections import deque
+from typing import Any, Dict, List, Tuple
+
+
+class MetricsTable:
+    """Колоночное хранилище метрик со строками, переиспользуемыми после удаления"""
+
+    def __init__(self):
+        self._columns: Dict[str, array] = {}
+        self._integral: Dict[str, bool] = {}  # колонка пока содержит только целые
+        self._extras: Dict[int, Dict[str, Any]] = {}  # нечисловые значения
+        self._rows = 0
+        self._free: List[int] = []
+        # Строки из __del__ освобождаются без блокировки: сборщик мусора может вызвать
+        # финализатор в этом же потоке, пока блокировка занята (например, в allocate)
+        self._released: deque = deque()
+        self._lock = threading.Lock()
+
+    def allocate(self) -> int:
+        with self._lock:
+            while self._released:
+                row = self._released.popleft()
+                self._clear(row)
+                self._free.append(row)
+            if self._free:
+                return self._free.pop()
+            row = self._rows
+            self._rows += 1
+            for column in self._columns.values():
+                column.append(math.nan)
+            return row
+
+    def release(self, row: int):
+        """Возвращает строку для повторного использования; очищается она при следующем allocate"""
+        self._released.append(row)
+
+    def _clear(self, row: int):
+        for column in self._columns.values():
+            column[row] = math.nan
+        self._extras.pop(row, None)
+
+    def _column(self, name: str) -> array:
+        column = self._columns.get(name)
+        if column is None:
+            column = array("d", [math.nan]) * self._rows
+            self._columns[name] = column
+            self._integral[name] = True
+        return column
+
+    def set(self, row: int, name: str, value: Any):
+        with self._lock:
+            self._set(row, name, value)
+
+    def _set(self, row: int, name: str, value: Any):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            self._column(name)[row] = value
+            if not isinstance(value, int):
+                self._integral[name] = False
+            extras = self._extras.get(row)
+            if extras:
+                extras.pop(name, None)
+        else:
+            column = self._columns.get(name)
+            if column is not None:
+                column[row] = math.nan
+            self._extras.setdefault(row, {})[name] = value
+
+    def delete(self, row: int, name: str):
+        with self._lock:
+            column = self._columns.get(name)
+            if column is not None:
+                column[row] = math.nan
+            extras = self._extras.get(row)
+            if extras:
+                extras.pop(name, None)
+
+    def replace(self, row: int, values: Dict[str, Any]):
+        """Заменяет все метрики строки"""
+        with self._lock:
+            self._clear(row)
+            for name, value in values.items():
+                self._set(row, name, value)
+
+    def items(self, row: int) -> List[Tuple[str, Any]]:
+        """Снимок метрик строки (под блокировкой: колонки могут добавляться из других потоков)"""
+        with self._lock:
+            result = []
+            for name, column in self._columns.items():
+                value = column[row]
+                if not math.isnan(value):
+                    result.append((name, int(value) if self._integral[name] else value))
+            extras = self._extras.get(row)
+            if extras:
+                result.extend(extras.items())
+            return result
+
+    def column(self, name: str) -> array:
+        """Колонка метрики целиком (NaN - нет значения)"""
+        return self._columns.get(name, array("d"))
+
+    def nbytes(self) -> int:
+        with self._lock:
+            return sum(column.itemsize * len(column) for column in self._columns.values())
+
+
+class MetricsView(dict):
+    """Снимок метрик одной строки в виде dict с записью изменений обратно в таблицу
+
+    Наследуется от dict, чтобы шаблоны, json и JSONResponse работали как раньше.
+    """
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: MetricsTable, row: int):
+        super().__init__(table.items(row))
+        self._table = table
+        self._row = row
+
+    def __setitem__(self, name, value):
+        super().__setitem__(name, value)
+        self._table.set(self._row, name, value)
+
+    def __delitem__(self, name):
+        super().__delitem__(name)
+        self._table.delete(self._row, name)
+
+    def update(self, *args, **kwargs):
+        for name, value in dict(*args, **kwargs).items():
+            self[name] = value
+
+    def setdefault(self, name, default=None):
+        if name not in self:
+            self[name] = default
+        return self[name]
+
+    def pop(self, name, *default):
+        if name in self:
+            self._table.delete(self._row, name)
+        return super().pop(name, *default)
+
+    def clear(self):
+        super().clear()
+        self._table.replace(self._row, {})
+
+
+# Таблица метрик всех экспериментов процесса
+EXPERIMENT_METRICS = MetricsTable()
@@ -0,0 +1,73 @@
+"""
+Сущность обученной модели
+"""
+import uuid
+from datetime import datetime
+from typing import Any, Dict
+
+from ml_platform.core.entities.base import CodeTable, format_datetime, parse_datetime
+
+MODEL_STATUSES = CodeTable("development", "staging", "production", "archived")
+DEPLOYMENT_STATUSES = CodeTable("deployed")
+
+
+class TrainedModel:
+    __slots__ = ("id", "name", "description", "experiment_id", "_status", "version",
+                 "created_at", "metrics", "_deployment_status", "artifact")
+    
+    def __init__(self, name: str, description: str, experiment_id: str):
+        self.id = str(uuid.uuid4())
+        self.name = name
+        self.description = description
+        self.experiment_id = experiment_id
+        self.status = "development"
+        self.version = "1.0.0"
+        self.created_at = datetime.now()
+        self.metrics = {}
+        self.deployment_status = None
+        self.artifact = None  # sha256 весов в хранилище артефактов
+    
+    @property
+    def status(self) -> str:
+        return MODEL_STATUSES.decode(self._status)
+    
+    @status.setter
+    def status(self, value: str):
+        self._status = MODEL_STATUSES.encode(value)
+    
+    @property
+    def deployment_status(self):
+        return DEPLOYMENT_STATUSES.decode(self._deployment_status)
+    
+    @deployment_status.setter
+    def deployment_status(self, value):
+        self._deployment_status = DEPLOYMENT_STATUSES.encode(value)
+    
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "experiment_id": self.experiment_id,
+            "status": self.status,
+            "version": self.version,
+            "created_at": format_datetime(self.created_at),
+            "metrics": self.metrics,
+            "deployment_status": self.deployment_status,
+            "artifact": self.artifact
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        model = cls.__new__(cls)
+        model.id = data["id"]
+        model.name = data["name"]
+        model.description = data["description"]
+        model.experiment_id = data["experiment_id"]
+        model.status = data["status"]
+        model.version = data["version"]
+        model.created_at = parse_datetime(data["created_at"])
+        model.metrics = data.get("metrics", {})
+        model.deployment_status = data.get("deployment_status")
+        model.artifact = data.get("artifact")
+        return model
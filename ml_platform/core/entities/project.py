@@ -0,0 +1,58 @@
+"""
+Сущность ML проекта
+"""
+import uuid
+from datetime import datetime
+from typing import Any, Dict
+
+from ml_platform.core.entities.base import CodeTable, format_datetime, parse_datetime
+from ml_platform.core.entities.user import User
+
+PROJECT_STATUSES = CodeTable("active", "archived", "completed")
+
+
+class Project:
+    __slots__ = ("id", "name", "description", "owner_id", "_status", "created_at", "updated_at", "tags")
+    
+    def __init__(self, name: str, description: str, owner: User):
+        self.id = str(uuid.uuid4())
+        self.name = name
+        self.description = description
+        self.owner_id = owner.id if owner else None
+        self.status = "active"
+        self.created_at = datetime.now()
+        self.updated_at = datetime.now()
+        self.tags = []
+    
+    @property
+    def status(self) -> str:
+        return PROJECT_STATUSES.decode(self._status)
+    
+    @status.setter
+    def status(self, value: str):
+        self._status = PROJECT_STATUSES.encode(value)
+    
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "owner_id": self.owner_id,
+            "status": self.status,
+            "created_at": format_datetime(self.created_at),
+            "updated_at": format_datetime(self.updated_at),
+            "tags": self.tags
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        project = cls.__new__(cls)
+        project.id = data["id"]
+        project.name = data["name"]
+        project.description = data["description"]
+        project.owner_id = data.get("owner_id")
+        project.status = data["status"]
+        project.created_at = parse_datetime(data["created_at"])
+        project.updated_at = parse_datetime(data["updated_at"])
+        project.tags = data.get("tags", [])
+        return project
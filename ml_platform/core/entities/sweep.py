@@ -0,0 +1,107 @@
+"""
+Сущность перебора гиперпараметров (sweep)
+"""
+import sys
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from ml_platform.core.entities.base import CodeTable, format_datetime, parse_datetime
+
+SWEEP_STATUSES = CodeTable("running", "completed", "cancelled")
+SEARCH_STRATEGIES = ("grid", "random", "halton")
+
+
+class Sweep:
+    """Серия испытаний одного алгоритма на одном датасете: каждое - дочерний эксперимент"""
+
+    __slots__ = ("id", "name", "project_id", "algorithm", "dataset", "strategy", "search_space",
+                 "budget", "parallelism", "objective", "goal", "hyperparameters", "seed",
+                 "_status", "created_at", "completed_at", "trial_ids", "progress")
+
+    def __init__(self, name: str, project_id: str, algorithm: str, dataset: str,
+                 search_space: Dict[str, Any], strategy: str = "random", budget: Optional[int] = None,
+                 parallelism: Optional[int] = None, objective: str = "accuracy", goal: str = "max",
+                 hyperparameters: Optional[Dict[str, Any]] = None, seed: int = 0):
+        if strategy not in SEARCH_STRATEGIES:
+            raise ValueError(f"Неизвестная стратегия перебора: {strategy}. Доступны: {', '.join(SEARCH_STRATEGIES)}")
+        if goal not in ("max", "min"):
+            raise ValueError("goal должен быть max или min")
+        self.id = str(uuid.uuid4())
+        self.name = name
+        self.project_id = sys.intern(project_id)
+        self.algorithm = algorithm
+        self.dataset = dataset
+        self.strategy = strategy
+        self.search_space = search_space
+        self.budget = budget
+        self.parallelism = parallelism
+        self.objective = objective
+        self.goal = goal
+        self.hyperparameters = hyperparameters or {}  # общие для всех испытаний
+        self.seed = seed
+        self.status = "running"
+        self.created_at = datetime.now()
+        self.completed_at = None
+        self.trial_ids = []
+        # Сводка обновляется по каждому переходу испытания, без обхода экспериментов
+        self.progress = {"total": 0, "created": 0, "queued": 0, "running": 0,
+                         "completed": 0, "failed": 0, "cancelled": 0, "best": None}
+
+    @property
+    def status(self) -> str:
+        return SWEEP_STATUSES.decode(self._status)
+
+    @status.setter
+    def status(self, value: str):
+        self._status = SWEEP_STATUSES.encode(value)
+
+    def is_better(self, value: float, best: Optional[float]) -> bool:
+        if best is None:
+            return True
+        return value > best if self.goal == "max" else value < best
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "project_id": self.project_id,
+            "algorithm": self.algorithm,
+            "dataset": self.dataset,
+            "strategy": self.strategy,
+            "search_space": self.search_space,
+            "budget": self.budget,
+            "parallelism": self.parallelism,
+            "objective": self.objective,
+            "goal": self.goal,
+            "hyperparameters": self.hyperparameters,
+            "seed": self.seed,
+            "status": self.status,
+            "created_at": format_datetime(self.created_at),
+            "completed_at": format_datetime(self.completed_at),
+            "trial_ids": self.trial_ids,
+            "progress": self.progress
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        sweep = cls.__new__(cls)
+        sweep.id = data["id"]
+        sweep.name = data["name"]
+        sweep.project_id = sys.intern(data["project_id"])
+        sweep.algorithm = data["algorithm"]
+        sweep.dataset = data["dataset"]
+        sweep.strategy = data["strategy"]
+        sweep.search_space = data["search_space"]
+        sweep.budget = data.get("budget")
+        sweep.parallelism = data.get("parallelism")
+        sweep.objective = data.get("objective", "accuracy")
+        sweep.goal = data.get("goal", "max")
+        sweep.hyperparameters = data.get("hyperparameters", {})
+        sweep.seed = data.get("seed", 0)
+        sweep.status = data["status"]
+        sweep.created_at = parse_datetime(data["created_at"])
+        sweep.completed_at = parse_datetime(data.get("completed_at"))
+        sweep.trial_ids = data.get("trial_ids", [])
+        sweep.progress = data["progress"]
+        return sweep
@@ -0,0 +1,48 @@
+"""
+Сущность пользователя платформы
+"""
+import uuid
+from datetime import datetime
+from typing import Any, Dict
+
+from ml_platform.core.entities.base import CodeTable, format_datetime, parse_datetime
+
+USER_ROLES = CodeTable("Data Scientist", "ML Engineer", "Project Manager", "Admin")
+
+
+class User:
+    __slots__ = ("id", "name", "email", "_role", "created_at")
+    
+    def __init__(self, name: str, email: str, role: str = "Data Scientist"):
+        self.id = str(uuid.uuid4())
+        self.name = name
+        self.email = email
+        self.role = role
+        self.created_at = datetime.now()
+    
+    @property
+    def role(self) -> str:
+        return USER_ROLES.decode(self._role)
+    
+    @role.setter
+    def role(self, value: str):
+        self._role = USER_ROLES.encode(value)
+    
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "email": self.email,
+            "role": self.role,
+            "created_at": format_datetime(self.created_at)
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        user = cls.__new__(cls)
+        user.id = data["id"]
+        user.name = data["name"]
+        user.email = data["email"]
+        user.role = data["role"]
+        user.created_at = parse_datetime(data["created_at"])
+        return user
@@ -0,0 +1,88 @@
+"""
+Бэкенды хранения: наборы репозиториев над общим хранилищем
+
+memory - объекты в памяти, долговечность через журнал изменений (ChangeLog)
+sqlite - файл SQLite в режиме WAL с индексами по полям запросов
+"""
+import os
+
+from ml_platform.core.repositories.base_repository import SQLiteConnectionPool
+from ml_platform.core.repositories.dataset_repository import InMemoryDatasetRepository, SQLiteDatasetRepository
+from ml_platform.core.repositories.experiment_repository import (
+    InMemoryExperimentRepository, SQLiteExperimentRepository
+)
+from ml_platform.core.repositories.model_repository import InMemoryModelRepository, SQLiteModelRepository
+from ml_platform.core.repositories.project_repository import InMemoryProjectRepository, SQLiteProjectRepository
+from ml_platform.core.repositories.sweep_repository import InMemorySweepRepository, SQLiteSweepRepository
+from ml_platform.core.repositories.user_repository import InMemoryUserRepository, SQLiteUserRepository
+from ml_platform.infrastructure.storage.change_log import ChangeLog
+from ml_platform.infrastructure.storage.persistence_writer import PersistenceWriter
+
+
+class MemoryBackend:
+    """Хранилище в памяти, восстанавливаемое из снапшота и журнала изменений"""
+
+    name = "memory"
+
+    def __init__(self, data_dir: str, writer: PersistenceWriter = None):
+        # С фоновым писателем группу для fsync собирает он сам
+        self._log = ChangeLog(data_dir, commit_interval=0 if writer else 0.05)
+        state = self._log.replay()
+        self._log.open()
+
+        self.users = InMemoryUserRepository(self._log, writer)
+        self.projects = InMemoryProjectRepository(self._log, writer)
+        self.experiments = InMemoryExperimentRepository(self._log, writer)
+        self.models = InMemoryModelRepository(self._log, writer)
+        self.sweeps = InMemorySweepRepository(self._log, writer)
+        self.datasets = InMemoryDatasetRepository(self._log, writer)
+        for repository in (self.users, self.projects, self.experiments, self.models, self.sweeps,
+                           self.datasets):
+            repository.load(state.get(repository.kind, {}))
+
+    def flush(self, timeout: float = None) -> bool:
+        return self._log.wait_durable(timeout=timeout)
+
+    def close(self):
+        self._log.close()
+
+
+class SQLiteBackend:
+    """Хранилище в SQLite: данные на диске, запросы через индексы"""
+
+    name = "sqlite"
+
+    def __init__(self, data_dir: str, writer: PersistenceWriter = None, pool_size: int = 4):
+        os.makedirs(data_dir, exist_ok=True)
+        self._pool = SQLiteConnectionPool(os.path.join(data_dir, "database.sqlite3"), size=pool_size)
+
+        self.users = SQLiteUserRepository(self._pool, writer)
+        self.projects = SQLiteProjectRepository(self._pool, writer)
+        self.experiments = SQLiteExperimentRepository(self._pool, writer)
+        self.models = SQLiteModelRepository(self._pool, writer)
+        self.sweeps = SQLiteSweepRepository(self._pool, writer)
+        self.datasets = SQLiteDatasetRepository(self._pool, writer)
+        with self._pool.transaction() as conn:
+            for repository in (self.users, self.projects, self.experiments, self.models, self.sweeps,
+                               self.datasets):
+                repository.create_schema(conn)
+
+    def flush(self, timeout: float = None) -> bool:
+        # Каждая транзакция фиксируется сразу, ждать нечего
+        return True
+
+    def close(self):
+        self._pool.close()
+
+
+BACKENDS = {
+    MemoryBackend.name: MemoryBackend,
+    SQLiteBackend.name: SQLiteBackend,
+}
+
+
+def create_backend(name: str, data_dir: str, writer: PersistenceWriter = None):
+    """Создает бэкенд хранения по имени; с writer запись идет в фоне"""
+    if name not in BACKENDS:
+        raise ValueError(f"Неизвестный бэкенд хранения: {name}. Доступны: {', '.join(BACKENDS)}")
+    return BACKENDS[name](data_dir, writer)
@@ -0,0 +1,368 @@
+"""
+Базовые репозитории: абстрактный интерфейс, хранилище в памяти и SQLite
+"""
+import json
+import queue
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional
+
+from ml_platform.infrastructure.storage.change_log import ChangeLog
+from ml_platform.infrastructure.storage.persistence_writer import PersistenceWriter
+
+
+class BaseRepository(ABC):
+    """Абстракция доступа к данным одного типа сущностей"""
+
+    @abstractmethod
+    def get(self, entity_id: str):
+        """Сущность по id или None"""
+
+    @abstractmethod
+    def add(self, entity):
+        """Добавляет новую сущность"""
+
+    @abstractmethod
+    def add_many(self, entities: Iterable):
+        """Добавляет пачку сущностей одной операцией"""
+
+    @abstractmethod
+    def update(self, entity):
+        """Сохраняет изменения существующей сущности"""
+
+    @abstractmethod
+    def update_many(self, entities: Iterable):
+        """Сохраняет пачку измененных сущностей одной операцией"""
+
+    @abstractmethod
+    def list(self, limit: Optional[int] = None) -> List:
+        """Сущности в порядке добавления"""
+
+    @abstractmethod
+    def find_by(self, field: str, value: Any, limit: Optional[int] = None) -> List:
+        """Сущности с заданным значением индексированного поля"""
+
+    @abstractmethod
+    def count(self, **filters) -> int:
+        """Количество сущностей, опционально с фильтром по индексированным полям"""
+
+    @abstractmethod
+    def write_batch(self, records: List[tuple]):
+        """Пишет пачку снимков (id, данные, номер отметки) от PersistenceWriter"""
+
+
+# ============ ХРАНИЛИЩЕ В ПАМЯТИ ============
+
+class InMemoryRepository(BaseRepository):
+    """Репозиторий в памяти с hash-индексами; изменения пишутся в журнал ChangeLog
+
+    Индексы обновляются сразу, а с PersistenceWriter запись в журнал и fsync
+    уходят в фоновый поток.
+    """
+
+    kind = None
+    entity_class = None
+    indexed_fields = ()
+
+    def __init__(self, change_log: Optional[ChangeLog] = None, writer: Optional[PersistenceWriter] = None):
+        self._log = change_log
+        self._writer = writer
+        self._items: Dict[str, Any] = {}
+        self._indexes: Dict[str, Dict[Any, Dict[str, Any]]] = {field: {} for field in self.indexed_fields}
+        self._index_keys: Dict[str, tuple] = {}
+        # Пишут и читают обработчики, движок запусков и подборы: чтение берет снимок под блокировкой
+        self._lock = threading.RLock()
+
+    def load(self, records: Dict[str, Dict[str, Any]]):
+        """Загружает сущности из состояния, восстановленного по журналу"""
+        with self._lock:
+            for data in records.values():
+                self._index(self.entity_class.from_dict(data))
+
+    def _index(self, entity):
+        self._items[entity.id] = entity
+        keys = tuple(getattr(entity, field) for field in self.indexed_fields)
+        for field, key in zip(self.indexed_fields, keys):
+            self._indexes[field].setdefault(key, {})[entity.id] = entity
+        self._index_keys[entity.id] = keys
+
+    def _unindex(self, entity_id: str):
+        for field, key in zip(self.indexed_fields, self._index_keys.pop(entity_id, ())):
+            self._indexes[field].get(key, {}).pop(entity_id, None)
+
+    def _persist(self, entity):
+        if self._writer is not None:
+            self._writer.mark_dirty(self, entity.id, entity.to_dict())
+        elif self._log is not None:
+            self._log.append(self.kind, entity.id, entity.to_dict())
+
+    def write_batch(self, records: List[tuple]):
+        for entity_id, data, _ in records:
+            self._log.append(self.kind, entity_id, data)
+        self._log.wait_durable()
+
+    def get(self, entity_id: str):
+        return self._items.get(entity_id)
+
+    def add(self, entity):
+        with self._lock:
+            self._index(entity)
+        self._persist(entity)
+        return entity
+
+    def add_many(self, entities: Iterable):
+        for entity in entities:
+            self.add(entity)
+
+    def update(self, entity):
+        # Индексы перестраиваются по сохраненным ключам: объект уже изменен на месте
+        with self._lock:
+            self._unindex(entity.id)
+            self._index(entity)
+        self._persist(entity)
+        return entity
+
+    def update_many(self, entities: Iterable):
+        for entity in entities:
+            self.update(entity)
+
+    def list(self, limit: Optional[int] = None) -> List:
+        with self._lock:
+            return list(islice(self._items.values(), limit))
+
+    def find_by(self, field: str, value: Any, limit: Optional[int] = None) -> List:
+        with self._lock:
+            return list(islice(self._indexes[field].get(value, {}).values(), limit))
+
+    def count(self, **filters) -> int:
+        if not filters:
+            return len(self._items)
+        (field, value), *rest = filters.items()
+        with self._lock:
+            candidates = list(self._indexes[field].get(value, {}).values())
+        return sum(1 for e in candidates if all(getattr(e, f) == v for f, v in rest))
+
+
+# ============ SQLITE ============
+
+class SQLiteConnectionPool:
+    """Небольшой пул соединений SQLite в режиме WAL
+
+    Читатели берут любое свободное соединение, запись идет через одно
+    выделенное соединение под блокировкой (SQLite допускает одного писателя).
+    """
+
+    def __init__(self, path: str, size: int = 4):
+        self.path = path
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(size):
+            self._readers.put(self._connect())
+        self._writer = self._connect()
+        # Фиксация транзакции записи должна переживать сбой питания
+        self._writer.execute("PRAGMA synchronous=FULL")
+        self._write_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # cached_statements - кэш подготовленных выражений на соединение
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None,
+                               cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    @contextmanager
+    def reader(self):
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Транзакция записи: все выражения внутри фиксируются одним commit"""
+        with self._write_lock:
+            self._writer.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._writer
+            except BaseException:
+                self._writer.execute("ROLLBACK")
+                raise
+            self._writer.execute("COMMIT")
+
+    def close(self):
+        with self._write_lock:
+            self._writer.close()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+
+
+class SQLiteRepository(BaseRepository):
+    """Репозиторий поверх таблицы SQLite
+
+    Индексированные поля хранятся отдельными колонками с индексами, вся
+    сущность целиком - JSON в колонке data. Порядок добавления - rowid.
+
+    С PersistenceWriter запись откладывается: измененные сущности лежат в
+    оверлее до фоновой записи, и чтения учитывают их поверх данных SQLite.
+    """
+
+    table = None
+    entity_class = None
+    indexed_fields = ()
+
+    def __init__(self, pool: SQLiteConnectionPool, writer: Optional[PersistenceWriter] = None):
+        self._pool = pool
+        self._writer = writer
+        # id -> (сущность, номер отметки, новая ли сущность) - еще не записанные изменения
+        self._pending: Dict[str, tuple] = {}
+        self._pending_lock = threading.Lock()
+
+        columns = ", ".join(self.indexed_fields)
+        placeholders = ", ".join("?" for _ in range(len(self.indexed_fields) + 2))
+        assignments = ", ".join(f"{field} = ?" for field in self.indexed_fields)
+        upserts = ", ".join(f"{field} = excluded.{field}" for field in (*self.indexed_fields, "data"))
+        # SQL собирается один раз: одинаковый текст выражения позволяет
+        # sqlite3 переиспользовать подготовленные выражения из кэша
+        self._sql_insert = f"INSERT INTO {self.table} (id, {columns}, data) VALUES ({placeholders})"
+        self._sql_update = f"UPDATE {self.table} SET {assignments}, data = ? WHERE id = ?"
+        self._sql_upsert = self._sql_insert + f" ON CONFLICT(id) DO UPDATE SET {upserts}"
+        self._sql_get = f"SELECT data FROM {self.table} WHERE id = ?"
+        self._sql_list = f"SELECT data FROM {self.table} ORDER BY rowid"
+
+    def create_schema(self, conn: sqlite3.Connection):
+        columns = ", ".join(f"{field} TEXT" for field in self.indexed_fields)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (id TEXT PRIMARY KEY, {columns}, data TEXT NOT NULL)")
+        for field in self.indexed_fields:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_{field} ON {self.table} ({field})")
+
+    def _row(self, entity_id: str, data: Dict[str, Any]) -> tuple:
+        keys = tuple(data[field] for field in self.indexed_fields)
+        return (entity_id, *keys, json.dumps(data, ensure_ascii=False, default=str))
+
+    def _to_entity(self, row):
+        return self.entity_class.from_dict(json.loads(row[0]))
+
+    def _query(self, sql: str, params: tuple = ()) -> List:
+        with self._pool.reader() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [self._to_entity(row) for row in rows]
+
+    def _matches(self, entity, filters: Dict[str, Any]) -> bool:
+        return all(getattr(entity, field) == value for field, value in filters.items())
+
+    # ============ ЗАПИСЬ ============
+
+    def _defer(self, entity, is_new: bool):
+        with self._pending_lock:
+            if entity.id in self._pending:
+                is_new = self._pending[entity.id][2]
+            seq = self._writer.mark_dirty(self, entity.id, entity.to_dict())
+            self._pending[entity.id] = (entity, seq, is_new)
+
+    def add(self, entity):
+        self.add_many([entity])
+        return entity
+
+    def add_many(self, entities: Iterable):
+        if self._writer is not None:
+            for entity in entities:
+                self._defer(entity, is_new=True)
+            return
+        rows = [self._row(entity.id, entity.to_dict()) for entity in entities]
+        with self._pool.transaction() as conn:
+            conn.executemany(self._sql_insert, rows)
+
+    def update(self, entity):
+        self.update_many([entity])
+        return entity
+
+    def update_many(self, entities: Iterable):
+        if self._writer is not None:
+            for entity in entities:
+                self._defer(entity, is_new=False)
+            return
+        rows = []
+        for entity in entities:
+            entity_id, *keys, data = self._row(entity.id, entity.to_dict())
+            rows.append((*keys, data, entity_id))
+        with self._pool.transaction() as conn:
+            conn.executemany(self._sql_update, rows)
+
+    def write_batch(self, records: List[tuple]):
+        rows = [self._row(entity_id, data) for entity_id, data, _ in records]
+        with self._pool.transaction() as conn:
+            conn.executemany(self._sql_upsert, rows)
+        with self._pending_lock:
+            for entity_id, _, seq in records:
+                # Сущность, измененная повторно во время записи, остается в оверлее,
+                # но строка в SQLite у нее уже есть
+                pending = self._pending.get(entity_id)
+                if pending is not None and pending[1] == seq:
+                    del self._pending[entity_id]
+                elif pending is not None:
+                    self._pending[entity_id] = (pending[0], pending[1], False)
+
+    # ============ ЧТЕНИЕ ============
+
+    def _snapshot_pending(self) -> List[tuple]:
+        with self._pending_lock:
+            return list(self._pending.values())
+
+    def get(self, entity_id: str):
+        pending = self._pending.get(entity_id)
+        if pending is not None:
+            return pending[0]
+        rows = self._query(self._sql_get, (entity_id,))
+        return rows[0] if rows else None
+
+    def _merge(self, persisted: List, filters: Dict[str, Any], limit: Optional[int]) -> List:
+        """Накладывает незаписанные изменения на результат запроса к SQLite"""
+        pending = self._snapshot_pending()
+        if not pending:
+            return persisted
+        overlay = {entity.id: entity for entity, _, _ in pending}
+        result = []
+        for entity in persisted:
+            entity = overlay.pop(entity.id, entity)
+            if self._matches(entity, filters):
+                result.append(entity)
+        # Оставшиеся в оверлее сущности не попали в выборку SQLite
+        result.extend(entity for entity in overlay.values() if self._matches(entity, filters))
+        return result if limit is None else result[:limit]
+
+    def list(self, limit: Optional[int] = None) -> List:
+        sql, params = self._sql_list, ()
+        if limit is not None:
+            sql, params = sql + " LIMIT ?", (limit,)
+        return self._merge(self._query(sql, params), {}, limit)
+
+    def find_by(self, field: str, value: Any, limit: Optional[int] = None) -> List:
+        if field not in self.indexed_fields:
+            raise ValueError(f"Поле {field} не индексировано")
+        sql = f"SELECT data FROM {self.table} WHERE {field} = ? ORDER BY rowid"
+        params = (value,)
+        if limit is not None:
+            sql, params = sql + " LIMIT ?", (value, limit)
+        return self._merge(self._query(sql, params), {field: value}, limit)
+
+    def count(self, **filters) -> int:
+        for field in filters:
+            if field not in self.indexed_fields:
+                raise ValueError(f"Поле {field} не индексировано")
+        sql = f"SELECT COUNT(*) FROM {self.table}"
+        if filters:
+            sql += " WHERE " + " AND ".join(f"{field} = ?" for field in filters)
+        with self._pool.reader() as conn:
+            total = conn.execute(sql, tuple(filters.values())).fetchone()[0]
+            # Поправка на незаписанные изменения: новое состояние минус записанное
+            for entity, _, is_new in self._snapshot_pending():
+                total += self._matches(entity, filters)
+                if not is_new:
+                    row = conn.execute(self._sql_get, (entity.id,)).fetchone()
+                    total -= row is not None and self._matches(self._to_entity(row), filters)
+        return total
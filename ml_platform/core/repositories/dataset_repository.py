@@ -0,0 +1,17 @@
+"""
+Репозитории загруженных датасетов
+"""
+from ml_platform.core.entities.dataset import Dataset
+from ml_platform.core.repositories.base_repository import InMemoryRepository, SQLiteRepository
+
+
+class InMemoryDatasetRepository(InMemoryRepository):
+    kind = "dataset"
+    entity_class = Dataset
+    indexed_fields = ("sha256", "name")
+
+
+class SQLiteDatasetRepository(SQLiteRepository):
+    table = "datasets"
+    entity_class = Dataset
+    indexed_fields = ("sha256", "name")
@@ -0,0 +1,32 @@
+"""
+Репозитории экспериментов
+"""
+from typing import List
+
+from ml_platform.core.entities.experiment import Experiment
+from ml_platform.core.repositories.base_repository import InMemoryRepository, SQLiteRepository
+
+
+class ExperimentQueries:
+    """Запросы по вторичным индексам экспериментов"""
+
+    indexed_fields = ("project_id", "status", "algorithm")
+
+    def list_by_project(self, project_id: str) -> List[Experiment]:
+        return self.find_by("project_id", project_id)
+
+    def list_by_status(self, status: str) -> List[Experiment]:
+        return self.find_by("status", status)
+
+    def list_by_algorithm(self, algorithm: str) -> List[Experiment]:
+        return self.find_by("algorithm", algorithm)
+
+
+class InMemoryExperimentRepository(ExperimentQueries, InMemoryRepository):
+    kind = "experiment"
+    entity_class = Experiment
+
+
+class SQLiteExperimentRepository(ExperimentQueries, SQLiteRepository):
+    table = "experiments"
+    entity_class = Experiment
@@ -0,0 +1,17 @@
+"""
+Репозитории обученных моделей
+"""
+from ml_platform.core.entities.model import TrainedModel
+from ml_platform.core.repositories.base_repository import InMemoryRepository, SQLiteRepository
+
+
+class InMemoryModelRepository(InMemoryRepository):
+    kind = "model"
+    entity_class = TrainedModel
+    indexed_fields = ("experiment_id", "deployment_status")
+
+
+class SQLiteModelRepository(SQLiteRepository):
+    table = "models"
+    entity_class = TrainedModel
+    indexed_fields = ("experiment_id", "deployment_status")
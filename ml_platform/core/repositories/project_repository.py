@@ -0,0 +1,17 @@
+"""
+Репозитории проектов
+"""
+from ml_platform.core.entities.project import Project
+from ml_platform.core.repositories.base_repository import InMemoryRepository, SQLiteRepository
+
+
+class InMemoryProjectRepository(InMemoryRepository):
+    kind = "project"
+    entity_class = Project
+    indexed_fields = ("status", "owner_id")
+
+
+class SQLiteProjectRepository(SQLiteRepository):
+    table = "projects"
+    entity_class = Project
+    indexed_fields = ("status", "owner_id")
@@ -0,0 +1,17 @@
+"""
+Репозитории переборов гиперпараметров
+"""
+from ml_platform.core.entities.sweep import Sweep
+from ml_platform.core.repositories.base_repository import InMemoryRepository, SQLiteRepository
+
+
+class InMemorySweepRepository(InMemoryRepository):
+    kind = "sweep"
+    entity_class = Sweep
+    indexed_fields = ("project_id", "status")
+
+
+class SQLiteSweepRepository(SQLiteRepository):
+    table = "sweeps"
+    entity_class = Sweep
+    indexed_fields = ("project_id", "status")
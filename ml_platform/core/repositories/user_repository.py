@@ -0,0 +1,17 @@
+"""
+Репозитории пользователей
+"""
+from ml_platform.core.entities.user import User
+from ml_platform.core.repositories.base_repository import InMemoryRepository, SQLiteRepository
+
+
+class InMemoryUserRepository(InMemoryRepository):
+    kind = "user"
+    entity_class = User
+    indexed_fields = ("email",)
+
+
+class SQLiteUserRepository(SQLiteRepository):
+    table = "users"
+    entity_class = User
+    indexed_fields = ("email",)
@@ -0,0 +1,381 @@
+"""
+Сервис развертывания моделей: предсказания с динамической сборкой пачек
+
+Развернутая модель загружается из хранилища артефактов в процесс
+веб-сервера. Одиночные запросы на предсказание не считаются по одному:
+они встают в очередь модели, а обработчик очереди забирает их пачкой -
+до max_batch_size строк или сколько пришло за max_wait_ms после первой -
+и считает одним векторизованным вызовом predict_proba в потоке. Пока
+пачка считается, следующая копится в очереди, поэтому под нагрузкой
+пачки растут сами, а одиночный запрос ждет не дольше max_wait_ms.
+
+Загруженные модели держит кэш с бюджетом памяти и LRU-вытеснением;
+при старте развернутые модели прогреваются в фоне. Ансамбли деревьев
+при загрузке компилируются в плоские массивы (tree_compiler).
+Посчитанные пачки передаются монитору дрейфа, если он подключен.
+"""
+import asyncio
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ml_platform.infrastructure.compute.tree_compiler import compile_model
+from ml_platform.infrastructure.storage.model_format import LoadedModel, open_model
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 2.0
+DEFAULT_CACHE_BYTES = 512 * 1024 * 1024
+
+
+class ModelNotServable(Exception):
+    """Модель не развернута или у нее нет сохраненных весов"""
+
+
+# ============ СБОРКА ПАЧЕК ============
+
+class MicroBatcher:
+    """Очередь одиночных строк, которые считаются пачками одним вызовом predict
+
+    Каждый вызывающий получает свое значение: результат пачки раздается
+    по future в порядке постановки. max_batch_size=1 - без сборки пачек.
+    """
+
+    def __init__(self, predict: Callable[[np.ndarray], np.ndarray],
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size должен быть не меньше 1")
+        self._predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.requests = 0
+        self.batches = 0
+        self.pending = 0  # запросы, ждущие ответа (в очереди и в считаемой пачке)
+        self.closed = False
+
+    async def predict(self, row: np.ndarray) -> float:
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((row, future))
+        self.pending += 1
+        try:
+            return await future
+        finally:
+            self.pending -= 1
+            if self.closed and not self.pending:
+                self._stop_if_idle()
+
+    def close(self):
+        """Останавливает обработчик очереди, когда ответы на принятые запросы отданы (из любого потока)"""
+        self.closed = True
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._stop_if_idle)
+        except RuntimeError:
+            pass  # цикл событий закрыт - задачи в нем уже не выполняются
+
+    def _stop_if_idle(self):
+        # В потоке цикла событий: pending меняется только здесь же
+        if self.pending or self._task is None:
+            return
+        self._task.cancel()
+        # Запрос после закрытия (ссылка на старую модель) получит новый обработчик
+        self._task = None
+
+    def _ensure_worker(self):
+        # Обработчик привязан к циклу событий, в котором пришел первый запрос
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = self._loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._score(batch)
+
+    async def _score(self, batch: List[Tuple[np.ndarray, asyncio.Future]]):
+        # Отмененные (клиент ушел) не считаем
+        batch = [(row, future) for row, future in batch if not future.done()]
+        if not batch:
+            return
+        # Строка другой длины (n_features модели неизвестен заранее) не ломает пачку:
+        # ошибку получает только она, остальные считаются
+        shape = Counter(row.shape for row, _ in batch).most_common(1)[0][0]
+        if any(row.shape != shape for row, _ in batch):
+            error = ValueError(f"Ожидается строка из {shape[0] if shape else 0} признаков")
+            for row, future in batch:
+                if row.shape != shape:
+                    future.set_exception(error)
+            batch = [(row, future) for row, future in batch if row.shape == shape]
+        self.requests += len(batch)
+        self.batches += 1
+        try:
+            values = await asyncio.to_thread(self._predict, np.stack([row for row, _ in batch]))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), value in zip(batch, values.tolist()):
+            if not future.done():
+                future.set_result(value)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "pending": self.pending,
+        }
+
+
+# ============ РАЗВЕРТЫВАНИЕ ============
+
+class Deployment:
+    """Загруженная модель, ее очередь предсказаний и учет в кэше"""
+
+    __slots__ = ("model_id", "artifact", "model", "n_features", "batcher", "heap_bytes", "mapped_bytes",
+                 "compiled", "load_seconds", "loaded_at", "last_used", "hits")
+
+    def __init__(self, model_id: str, artifact: str, loaded: LoadedModel, load_seconds: float,
+                 max_batch_size: int, max_wait_ms: float, compiled: bool = False,
+                 observe: Optional[Callable[[np.ndarray, np.ndarray], None]] = None):
+        self.model_id = model_id
+        self.artifact = artifact
+        self.model = loaded.model
+        self.n_features = getattr(loaded.model, "n_features", None)
+        predict = loaded.model.predict_proba
+        if observe is not None:
+            def predict(X, _predict=predict):
+                values = _predict(X)
+                observe(X, values)  # в том же потоке, что и пачка
+                return values
+        self.batcher = MicroBatcher(predict, max_batch_size, max_wait_ms)
+        self.heap_bytes = loaded.heap_bytes
+        self.mapped_bytes = loaded.mapped_bytes
+        self.compiled = compiled
+        self.load_seconds = load_seconds
+        self.loaded_at = self.last_used = time.time()
+        self.hits = 0
+
+    @property
+    def size(self) -> int:
+        return self.heap_bytes + self.mapped_bytes
+
+    def to_dict(self):
+        return {"model_id": self.model_id, "artifact": self.artifact, "n_features": self.n_features,
+                "heap_bytes": self.heap_bytes, "mapped_bytes": self.mapped_bytes, "compiled": self.compiled,
+                "load_seconds": round(self.load_seconds, 4), "loaded_at": self.loaded_at,
+                "last_used": self.last_used, "hits": self.hits, **self.batcher.stats()}
+
+
+class DeploymentService:
+    """Развертывание моделей и предсказания по ним
+
+    Загруженные модели - кэш с бюджетом памяти: модель загружается при
+    первом запросе (или заранее, warmup), веса несжатого артефакта
+    отображаются из файла. Сверх бюджета вытесняются давно не
+    использованные модели без ожидающих запросов.
+
+    db - фасад хранилища (get_model_by_id, get_deployed_models,
+    update_model_deployment), artifacts - хранилище артефактов с весами.
+    dtype - точность компилированных деревьев (float32 - вдвое меньше памяти).
+    drift - монитор дрейфа (DriftMonitor) для моделей с базовым профилем.
+    """
+
+    def __init__(self, db, artifacts, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS, budget_bytes: int = DEFAULT_CACHE_BYTES,
+                 dtype=np.float64, drift=None):
+        self.db = db
+        self.artifacts = artifacts
+        self.drift = drift
+        self.dtype = np.dtype(dtype)
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.budget_bytes = budget_bytes
+        self._lock = threading.Lock()
+        self._deployments: "OrderedDict[str, Deployment]" = OrderedDict()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.load_seconds = 0.0
+        self.evictions = 0
+        self.warming = False
+
+    def deploy(self, model_id: str):
+        """Загружает веса и помечает модель развернутой"""
+        model = self._servable(model_id)
+        self._load(model)
+        return self.db.update_model_deployment(model_id, "deployed")
+
+    def undeploy(self, model_id: str):
+        with self._lock:
+            self._drop(model_id)
+        if self.drift is not None:
+            self.drift.forget(model_id)
+        return self.db.update_model_deployment(model_id, None)
+
+    def _servable(self, model_id: str):
+        model = self.db.get_model_by_id(model_id)
+        if model is None:
+            raise KeyError(f"Модель {model_id} не найдена")
+        if not model.artifact or self.artifacts.info(model.artifact) is None:
+            raise ModelNotServable(f"У модели {model.name} нет сохраненных весов")
+        return model
+
+    def _cached(self, model_id: str) -> Optional[Deployment]:
+        with self._lock:
+            deployment = self._deployments.get(model_id)
+            if deployment is not None:
+                self._deployments.move_to_end(model_id)
+                deployment.hits += 1
+                deployment.last_used = time.time()
+                self.hits += 1
+            return deployment
+
+    def _load(self, model) -> Deployment:
+        """Загружает модель в кэш; параллельные загрузки одной модели ждут первую"""
+        with self._lock:
+            load_lock = self._load_locks.setdefault(model.id, threading.Lock())
+        with load_lock:
+            with self._lock:
+                deployment = self._deployments.get(model.id)
+            if deployment is not None and deployment.artifact == model.artifact:
+                return deployment
+            started = time.perf_counter()
+            loaded = open_model(self.artifacts, model.artifact)
+            observe = None
+            baseline = getattr(loaded.model, "drift_baseline", None)
+            if self.drift is not None and baseline is not None:
+                self.drift.track(model.id, baseline, model.artifact)
+                observe = partial(self.drift.observe, model.id)
+            compiled = compile_model(loaded.model, self.dtype)
+            is_compiled = compiled is not loaded.model
+            if is_compiled:
+                # Деревья заменены плоскими массивами - в куче остаются только они
+                loaded = LoadedModel(compiled, compiled.nbytes, 0)
+            elapsed = time.perf_counter() - started
+            deployment = Deployment(model.id, model.artifact, loaded, elapsed,
+                                    self.max_batch_size, self.max_wait_ms, is_compiled, observe)
+            with self._lock:
+                self._drop(model.id)
+                self._deployments[model.id] = deployment
+                self.bytes += deployment.size
+                self.loads += 1
+                self.load_seconds += elapsed
+                self._evict()
+            return deployment
+
+    def _drop(self, model_id: str):
+        """Убирает модель из кэша и останавливает ее очередь (под блокировкой)"""
+        deployment = self._deployments.pop(model_id, None)
+        if deployment is not None:
+            self.bytes -= deployment.size
+            deployment.batcher.close()
+
+    def _evict(self):
+        """Вытесняет давние модели без ожидающих запросов, пока объем больше бюджета (под блокировкой)"""
+        for model_id in list(self._deployments)[:-1]:  # только что загруженную не трогаем
+            if self.bytes <= self.budget_bytes:
+                break
+            if self._deployments[model_id].batcher.pending:
+                continue
+            self._drop(model_id)
+            self.evictions += 1
+
+    def get(self, model_id: str) -> Deployment:
+        """Развернутая модель из кэша; при промахе загружается"""
+        deployment = self._cached(model_id)
+        if deployment is not None:
+            return deployment
+        model = self._servable(model_id)
+        if model.deployment_status != "deployed":
+            raise ModelNotServable(f"Модель {model.name} не развернута")
+        with self._lock:
+            self.misses += 1
+        return self._load(model)
+
+    async def predict(self, model_id: str, features) -> float:
+        """Вероятность положительного класса для одной строки признаков"""
+        deployment = self._cached(model_id)
+        if deployment is None:
+            deployment = await asyncio.to_thread(self.get, model_id)
+        try:
+            row = np.asarray(features, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("features должен быть списком чисел")
+        if row.ndim != 1 or (deployment.n_features is not None and len(row) != deployment.n_features):
+            raise ValueError(f"Ожидается строка из {deployment.n_features} признаков")
+        return await deployment.batcher.predict(row)
+
+    # ============ ПРОГРЕВ ============
+
+    def warmup(self, background: bool = True) -> Optional[threading.Thread]:
+        """Заранее загружает развернутые модели, пока они помещаются в бюджет"""
+        if not background:
+            self._warmup()
+            return None
+        thread = threading.Thread(target=self._warmup, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def _warmup(self):
+        self.warming = True
+        try:
+            for model in self.db.get_deployed_models():
+                info = self.artifacts.info(model.artifact) if model.artifact else None
+                if info is None or model.id in self._deployments:
+                    continue
+                # Размер артефакта - оценка объема модели в кэше; прогрев не вытесняет
+                if self.bytes + info.size > self.budget_bytes:
+                    break
+                try:
+                    self._load(model)
+                except Exception as e:
+                    print(f"⚠️ Модель {model.name} не загружена при прогреве: {e}")
+        finally:
+            self.warming = False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "cache": {
+                    "models": len(self._deployments),
+                    "bytes": self.bytes,
+                    "budget_bytes": self.budget_bytes,
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "hit_ratio": self.hits / lookups if lookups else 0.0,
+                    "loads": self.loads,
+                    "mean_load_seconds": self.load_seconds / self.loads if self.loads else 0.0,
+                    "evictions": self.evictions,
+                    "warming": self.warming
+                },
+                "models": {model_id: deployment.to_dict() for model_id, deployment in self._deployments.items()}
+            }
@@ -0,0 +1,331 @@
+"""
+Сервис запуска экспериментов: очередь задач и пул процессов обучения
+
+Запрос на запуск только ставит задачу в очередь. Какие задачи стартуют,
+решает планировщик ресурсов (ядра и память хоста, приоритеты, fair share
+по проектам); диспетчер отдает их в ProcessPoolExecutor, поэтому момент
+старта известен точно, а задачу из очереди можно снять без следа.
+Выполняющуюся задачу отменяет общий флаг, который обучение проверяет
+между итерациями (функция cancelled()). С общим кэшем датасетов задача
+держит ссылку на подготовленные данные от старта до завершения.
+"""
+import collections
+import multiprocessing
+import threading
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+from ml_platform.core.entities.base import format_datetime
+from ml_platform.infrastructure.compute.resource_manager import ResourceManager, ResourceRequest
+from ml_platform.infrastructure.compute.trainers import TrainingCancelled, dataset_args, dataset_key, train
+from ml_platform.infrastructure.storage.dataset_cache import SharedDatasetCache
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobCancelled(TrainingCancelled):
+    """Обучение остановлено по запросу отмены"""
+
+
+class Job:
+    """Задача запуска одного эксперимента"""
+
+    __slots__ = ("id", "experiment_id", "project_id", "spec", "resources", "status", "submitted_at",
+                 "started_at", "completed_at", "result", "history", "artifact", "timings", "error",
+                 "cancel_requested", "_slot", "_dataset_key")
+
+    def __init__(self, experiment_id: str, spec: Dict[str, Any], project_id: Optional[str] = None,
+                 resources: Optional[ResourceRequest] = None):
+        self.id = str(uuid.uuid4())
+        self.experiment_id = experiment_id
+        self.project_id = project_id
+        self.spec = spec
+        self.resources = resources or ResourceRequest()
+        self.status = JobStatus.QUEUED
+        self.submitted_at = datetime.now()
+        self.started_at = None
+        self.completed_at = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.history: Dict[str, List[float]] = {}
+        self.artifact: Optional[str] = None  # sha256 обученной модели в хранилище артефактов
+        self.timings: Dict[str, float] = {}  # длительность этапов в воркере (загрузка, обучение)
+        self.error: Optional[str] = None
+        self.cancel_requested = False
+        self._slot: Optional[int] = None
+        self._dataset_key: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in JobStatus.FINISHED
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "experiment_id": self.experiment_id,
+            "project_id": self.project_id,
+            "status": self.status,
+            "resources": self.resources.to_dict(),
+            "submitted_at": format_datetime(self.submitted_at),
+            "started_at": format_datetime(self.started_at),
+            "completed_at": format_datetime(self.completed_at),
+            "result": self.result,
+            "artifact": self.artifact,
+            "error": self.error,
+            "cancel_requested": self.cancel_requested
+        }
+
+
+# ============ СТОРОНА ВОРКЕРА ============
+
+_cancel_flags = None
+
+
+def _init_worker(cancel_flags):
+    global _cancel_flags
+    _cancel_flags = cancel_flags
+
+
+def _execute(run_fn: Callable, spec: Dict[str, Any], slot: int) -> Dict[str, Any]:
+    """Выполняется в процессе пула: обучение с проверкой флага отмены своего слота"""
+    def cancelled() -> bool:
+        return bool(_cancel_flags[slot])
+    return run_fn(spec, cancelled)
+
+
+def train_experiment(spec: Dict[str, Any], cancelled: Callable[[], bool]) -> Dict[str, Any]:
+    """Обучение по спецификации эксперимента
+
+    Возвращает {"metrics": итоговые метрики, "history": {имя: значения по итерациям},
+    "artifact": sha256 сохраненной модели, "timings": {этап: секунды}}.
+    """
+    return train(spec, cancelled)
+
+
+# ============ ДВИЖОК ============
+
+class ExperimentRunner:
+    """Очередь запусков поверх пула процессов с отменой и опросом статуса
+
+    Без явного resources хост считается из max_workers ядер - тогда
+    одновременно идут max_workers запусков по одному ядру.
+    on_update(job) вызывается при каждом переходе статуса - из потока запроса
+    или из служебного потока пула.
+    """
+
+    def __init__(self, run_fn: Callable = train_experiment, max_workers: Optional[int] = None,
+                 on_update: Optional[Callable[[Job], None]] = None,
+                 mp_context: str = "spawn", history: int = 1000,
+                 resources: Optional[ResourceManager] = None,
+                 dataset_cache: Optional[SharedDatasetCache] = None):
+        self.run_fn = run_fn
+        self.dataset_cache = dataset_cache
+        self.resources = resources or ResourceManager(total_cpus=max_workers)
+        # Каждый запуск занимает минимум ядро, так что процессов нужно не больше числа ядер
+        self.max_workers = self.resources.total_cpus
+        self.on_update = on_update
+        self.history = history
+        # spawn: родительский процесс многопоточен, fork здесь небезопасен
+        self._mp_context = multiprocessing.get_context(mp_context)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cancel_flags = None
+
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._queued: Dict[str, Job] = {}
+        self._finished = collections.deque()
+        self._free_slots = list(range(self.max_workers))
+        self._closed = False
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        # Пул создается при первом запуске: процессы не стартуют при импорте приложения
+        if self._executor is None:
+            if self._cancel_flags is None:
+                self._cancel_flags = self._mp_context.Array("b", self.max_workers, lock=False)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=self._mp_context,
+                initializer=_init_worker,
+                initargs=(self._cancel_flags,)
+            )
+        return self._executor
+
+    # ============ API ============
+
+    def submit(self, experiment_id: str, spec: Dict[str, Any], project_id: Optional[str] = None) -> Job:
+        """Ставит запуск в очередь, возвращает задачу в статусе queued
+
+        Запрос ресурсов берется из spec["hyperparameters"]; ValueError - если
+        он некорректен или не помещается на хост.
+        """
+        resources = ResourceRequest.from_hyperparameters(spec.get("hyperparameters"))
+        # Обучение узнает, сколько ядер ему выделено
+        spec = dict(spec, resources=resources.to_dict())
+        job = Job(experiment_id, spec, project_id, resources)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Движок запусков остановлен")
+            self.resources.submit(job.id, project_id or experiment_id, resources)
+            self._jobs[job.id] = job
+            self._queued[job.id] = job
+        self._notify(job)
+        self._dispatch()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self, experiment_id: Optional[str] = None) -> List[Job]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        if experiment_id is not None:
+            jobs = [job for job in jobs if job.experiment_id == experiment_id]
+        return jobs
+
+    def active_job(self, experiment_id: str) -> Optional[Job]:
+        """Незавершенная задача эксперимента, если есть"""
+        for job in self.list(experiment_id):
+            if not job.finished:
+                return job
+        return None
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Снимает задачу из очереди или просит выполняющуюся остановиться"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return job
+            job.cancel_requested = True
+            if job.status == JobStatus.QUEUED:
+                self.resources.cancel(job.id)
+                del self._queued[job.id]
+                self._finish(job, JobStatus.CANCELLED)
+            else:
+                self._cancel_flags[job._slot] = 1
+                return job
+        self._notify(job)
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = collections.Counter(job.status for job in self._jobs.values())
+            return {
+                "max_workers": self.max_workers,
+                "queued": len(self._queued),
+                "running": counts[JobStatus.RUNNING],
+                "completed": counts[JobStatus.COMPLETED],
+                "failed": counts[JobStatus.FAILED],
+                "cancelled": counts[JobStatus.CANCELLED],
+                "dataset_cache": self.dataset_cache.stats() if self.dataset_cache else None
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Отменяет очередь, останавливает выполняющиеся задачи и пул"""
+        with self._lock:
+            self._closed = True
+            queued = list(self._queued.values())
+            self._queued.clear()
+            for job in queued:
+                self.resources.cancel(job.id)
+                job.cancel_requested = True
+                self._finish(job, JobStatus.CANCELLED)
+            for job in self._jobs.values():
+                if job.status == JobStatus.RUNNING:
+                    job.cancel_requested = True
+                    self._cancel_flags[job._slot] = 1
+            executor = self._executor
+        for job in queued:
+            self._notify(job)
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    # ============ ДИСПЕТЧЕР ============
+
+    def _dispatch(self):
+        """Отдает в пул задачи, под которые планировщик выделил ресурсы"""
+        started = []
+        with self._lock:
+            if self._closed:
+                return
+            for job_id in self.resources.schedule():
+                job = self._queued.pop(job_id)
+                job._slot = self._free_slots.pop()
+                executor = self._ensure_executor()
+                self._cancel_flags[job._slot] = 0
+                job.status = JobStatus.RUNNING
+                job.started_at = datetime.now()
+                started.append(job)
+        for job in started:
+            self._attach_dataset(job)
+            self._notify(job)
+            try:
+                future = executor.submit(_execute, self.run_fn, job.spec, job._slot)
+            except (BrokenProcessPool, RuntimeError) as e:
+                self._on_done(job, None, error=e)
+                continue
+            future.add_done_callback(partial(self._on_done, job))
+
+    def _attach_dataset(self, job: Job):
+        """Берет ссылку на запись общего кэша датасетов; путь к ней уходит в spec"""
+        if self.dataset_cache is None or not (job.spec.get("dataset") or job.spec.get("dataset_path")):
+            return
+        try:
+            key = repr(dataset_key(**dataset_args(job.spec)))
+        except (OSError, TypeError, ValueError):
+            return  # некорректный датасет - обучение само сообщит об ошибке
+        job._dataset_key = key
+        job.spec["dataset_cache"] = self.dataset_cache.acquire(key)
+
+    def _on_done(self, job: Job, future, error: Optional[BaseException] = None):
+        if future is not None:
+            error = future.exception() if not future.cancelled() else JobCancelled()
+        with self._lock:
+            self._free_slots.append(job._slot)
+            self.resources.release(job.id)
+            if isinstance(error, BrokenProcessPool):
+                # Упавший воркер ломает весь пул - следующий запуск создаст новый
+                self._executor = None
+            if job.cancel_requested or isinstance(error, TrainingCancelled):
+                self._finish(job, JobStatus.CANCELLED)
+            elif error is not None:
+                job.error = "".join(traceback.format_exception_only(type(error), error)).strip()
+                self._finish(job, JobStatus.FAILED)
+            else:
+                outcome = future.result()
+                job.result = outcome["metrics"]
+                job.history = outcome.get("history") or {}
+                job.artifact = outcome.get("artifact")
+                job.timings = outcome.get("timings") or {}
+                self._finish(job, JobStatus.COMPLETED)
+        if job._dataset_key is not None:
+            self.dataset_cache.release(job._dataset_key)
+        self._notify(job)
+        self._dispatch()
+
+    def _finish(self, job: Job, status: str):
+        """Завершает задачу и ограничивает историю (под блокировкой)"""
+        job.status = status
+        job.completed_at = datetime.now()
+        self._finished.append(job.id)
+        while len(self._finished) > self.history:
+            self._jobs.pop(self._finished.popleft(), None)
+
+    def _notify(self, job: Job):
+        if self.on_update is None:
+            return
+        try:
+            self.on_update(job)
+        except Exception:
+            print(f"⚠️ Ошибка обработки статуса задачи {job.id}:\n{traceback.format_exc()}")
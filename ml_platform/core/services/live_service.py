@@ -0,0 +1,189 @@
+"""
+Сервис живых обновлений: подписки клиентов на темы с прореживанием
+
+Тема - строка вида "stats", "project:<id>", "experiment:<id>": префикс
+задает источник состояния (register), остаток - ключ. Изменение данных
+помечает тему (publish - из любого потока, O(1) и без расчета); обработчик
+в цикле событий считает состояние помеченной темы один раз на всех
+подписчиков и не чаще раза в min_interval, сколько бы изменений ни
+пришло за это время: первое изменение уходит сразу, остальные - одним
+состоянием в конце интервала.
+
+У клиента не очередь событий, а последнее неотправленное состояние
+каждой его темы: медленный клиент пропускает промежуточные состояния и
+получает сразу актуальное, память на клиента ограничена числом его тем.
+"""
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+DEFAULT_MIN_INTERVAL = 0.25
+MAX_TOPICS = 32
+
+
+# ============ ПОДПИСКА ============
+
+class Subscription:
+    """Темы одного клиента и их последние неотправленные состояния"""
+
+    def __init__(self, topics: Iterable[str]):
+        self.topics = tuple(dict.fromkeys(topics))
+        self._pending: "OrderedDict[str, Any]" = OrderedDict()
+        self._ready = asyncio.Event()
+        self.delivered = 0
+        self.replaced = 0  # состояния, замененные более новыми до отправки клиенту
+
+    def offer(self, topic: str, state: Any, replace: bool = True):
+        """Кладет состояние темы; неотправленное предыдущее заменяется (или остается при replace=False)"""
+        if topic in self._pending:
+            if not replace:
+                return
+            self.replaced += 1
+        self._pending[topic] = state
+        self._ready.set()
+
+    async def next(self, timeout: Optional[float] = None) -> List[Tuple[str, Any]]:
+        """Все накопившиеся состояния в порядке поступления; пустой список - истек timeout"""
+        if not self._pending:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        updates = list(self._pending.items())
+        self._pending.clear()
+        self.delivered += len(updates)
+        return updates
+
+
+# ============ ТЕМЫ ============
+
+class LiveHub:
+    """Источники состояний тем, подписчики и обработчик помеченных тем"""
+
+    def __init__(self, min_interval: float = DEFAULT_MIN_INTERVAL, max_topics: int = MAX_TOPICS):
+        self.min_interval = min_interval
+        self.max_topics = max_topics
+        self._sources: Dict[str, Callable[[str], Any]] = {}
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._dirty: Set[str] = set()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.published = 0  # пометки тем с подписчиками
+        self.computed = 0   # расчеты состояний после изменений
+
+    def register(self, prefix: str, state: Callable[[str], Any]):
+        """state(ключ) -> JSON-совместимое состояние темы; вызывается в потоке"""
+        self._sources[prefix] = state
+
+    def validate(self, topics: Iterable[str]) -> List[str]:
+        topics = list(dict.fromkeys(topics))
+        if not topics:
+            raise ValueError("Не указаны темы")
+        if len(topics) > self.max_topics:
+            raise ValueError(f"Не больше {self.max_topics} тем на подписку")
+        for topic in topics:
+            if topic.partition(":")[0] not in self._sources:
+                raise ValueError(f"Неизвестная тема: {topic}")
+        return topics
+
+    def state(self, topic: str) -> Any:
+        prefix, _, key = topic.partition(":")
+        return self._sources[prefix](key)
+
+    @property
+    def clients(self) -> int:
+        with self._lock:
+            return len(set().union(*self._subscribers.values()))
+
+    async def subscribe(self, topics: Iterable[str]) -> Subscription:
+        """Подписка с начальными состояниями всех тем"""
+        subscription = Subscription(self.validate(topics))
+        self._ensure_worker()
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscribers.setdefault(topic, set()).add(subscription)
+        # Подписчик уже зарегистрирован: изменение во время расчета снимка придет следом,
+        # а состояние, посчитанное обработчиком раньше снимка, снимком не затирается
+        try:
+            states = await asyncio.to_thread(self._compute, subscription.topics)
+        except BaseException:
+            self.unsubscribe(subscription)
+            raise
+        for topic, state in states:
+            subscription.offer(topic, state, replace=False)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscribers.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[topic]
+
+    def publish(self, *topics: str):
+        """Помечает темы измененными (потокобезопасно); темы без подписчиков пропускаются"""
+        with self._lock:
+            fresh = [t for t in topics if t in self._subscribers and t not in self._dirty]
+            if not fresh:
+                return
+            self._dirty.update(fresh)
+            self.published += len(fresh)
+            loop, wakeup = self._loop, self._wakeup
+        try:
+            loop.call_soon_threadsafe(wakeup.set)
+        except RuntimeError:
+            pass  # цикл событий закрыт - подписчиков в нем уже нет
+
+    def _ensure_worker(self):
+        # Обработчик привязан к циклу событий, в котором пришла первая подписка
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            with self._lock:
+                self._loop = loop
+                self._wakeup = asyncio.Event()
+                if self._dirty:
+                    self._wakeup.set()
+            self._task = loop.create_task(self._run())
+
+    def _compute(self, topics: Iterable[str]) -> List[Tuple[str, Any]]:
+        states = []
+        for topic in topics:
+            try:
+                states.append((topic, self.state(topic)))
+            except Exception as e:
+                print(f"⚠️ Состояние темы {topic} не посчитано: {e}")
+        return states
+
+    async def _run(self):
+        wakeup = self._wakeup
+        while True:
+            await wakeup.wait()
+            wakeup.clear()
+            with self._lock:
+                topics, self._dirty = self._dirty, set()
+            states = await asyncio.to_thread(self._compute, topics)
+            self.computed += len(states)
+            for topic, state in states:
+                with self._lock:
+                    subscribers = list(self._subscribers.get(topic, ()))
+                for subscription in subscribers:
+                    subscription.offer(topic, state)
+            # Изменения за интервал копятся в _dirty и уходят одним расчетом
+            await asyncio.sleep(self.min_interval)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            subscriptions = set().union(*self._subscribers.values())
+            return {
+                "clients": len(subscriptions),
+                "topics": len(self._subscribers),
+                "published": self.published,
+                "computed": self.computed,
+                "replaced": sum(s.replaced for s in subscriptions)
+            }
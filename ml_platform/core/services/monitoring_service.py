@@ -0,0 +1,488 @@
+"""
+Сервис мониторинга: метрики процесса в текстовом формате Prometheus
+
+Реестр хранит счетчики, измерители (gauge) и гистограммы с фиксированными
+границами корзин. Значения живут в памяти процесса веб-сервера: обновление -
+поиск дочерней метрики по кортежу меток в словаре и инкремент под ее
+блокировкой, без выделений памяти, поэтому метрики безопасно обновлять из
+обработчиков, потоков пула и служебных потоков. Процессы обучения метрики
+сами не пишут: замеры воркера (загрузка данных, обучение) приходят
+родителю вместе с результатом задачи и записываются здесь.
+
+Измеритель может считаться функцией в момент чтения (глубина очереди,
+объем кэша) - тогда его не нужно обновлять на каждое событие.
+
+Монитор дрейфа сравнивает живой поток развернутой модели с обучающей
+выборкой по скетчам (infrastructure/compute/sketches.py): пачки
+предсказаний обновляют профиль модели, PSI и KS считаются по накопленным
+корзинам - без повторного прохода по данным.
+"""
+import bisect
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ml_platform.infrastructure.compute.sketches import DataProfile
+
+# Границы корзин по умолчанию: задержки в секундах и размеры в байтах
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+DURATION_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+# PSI выше порога - распределение столбца заметно сдвинулось
+PSI_ALERT = 0.2
+# Пустые корзины считаются с такой долей, чтобы логарифм PSI был конечным
+PSI_EPSILON = 1e-4
+# Строки пачек копятся в буфере и попадают в скетчи блоком такого размера
+DRIFT_BLOCK_ROWS = 1024
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# ============ МЕТРИКИ ============
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value", "_lock", "_function")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]):
+        """Значение считается функцией в момент чтения"""
+        self._function = function
+
+    def read(self) -> Optional[float]:
+        if self._function is None:
+            return self.value
+        try:
+            return float(self._function())
+        except Exception:
+            return None  # источник недоступен - метрика пропускается
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # последняя корзина - +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+
+class _Timer:
+    """with histogram.time(): ... - наблюдает длительность блока"""
+
+    __slots__ = ("_histogram", "_started")
+
+    def __init__(self, histogram: _HistogramChild):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._started)
+
+
+class Metric:
+    """Метрика с метками; labels(...) возвращает дочернюю метрику для набора значений"""
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values) -> Any:
+        child = self._children.get(values)
+        if child is not None:
+            return child
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name}: ожидаются метки {self.labelnames}")
+        with self._lock:
+            return self._children.setdefault(values, self._new_child())
+
+    def __getattr__(self, attribute):
+        # Метрика без меток ведет себя как своя единственная дочерняя
+        if attribute.startswith("_") or self.labelnames:
+            raise AttributeError(attribute)
+        return getattr(self.labels(), attribute)
+
+    def _label_text(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def expose(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{self._label_text(values)} {_format_value(child.value)}"
+                for values, child in list(self._children.items())]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def samples(self) -> List[str]:
+        lines = []
+        for values, child in list(self._children.items()):
+            value = child.read()
+            if value is not None:
+                lines.append(f"{self.name}{self._label_text(values)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.bounds = tuple(sorted(float(bound) for bound in buckets if not math.isinf(bound)))
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def samples(self) -> List[str]:
+        lines = []
+        for values, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.bounds + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{self._label_text(values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(values)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._label_text(values)} {cumulative}")
+        return lines
+
+
+# ============ РЕЕСТР ============
+
+class MetricsRegistry:
+    """Именованные метрики процесса и их выдача в текстовом формате"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Метрика {metric.name} уже зарегистрирована с другим типом или метками")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = (),
+              function: Optional[Callable[[], float]] = None) -> Gauge:
+        gauge = self._register(Gauge(name, help, labelnames))
+        if function is not None:
+            gauge.labels().set_function(function)
+        return gauge
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def expose(self) -> str:
+        """Все метрики в текстовом формате Prometheus 0.0.4"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.expose() for metric in metrics) + "\n"
+
+
+# ============ ASGI ============
+
+class MetricsMiddleware:
+    """ASGI-middleware: число запросов, задержка и размеры тела по маршрутам
+
+    Метка маршрута - шаблон пути (/api/jobs/{job_id}), а не сам путь, чтобы
+    число рядов не росло с числом объектов. Запрос, не попавший ни в один
+    маршрут, учитывается как "unmatched".
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.requests = registry.counter("http_requests_total", "Обработанные HTTP-запросы",
+                                         ("method", "route", "status"))
+        self.latency = registry.histogram("http_request_duration_seconds", "Время обработки HTTP-запроса",
+                                          ("method", "route"), LATENCY_BUCKETS)
+        self.request_size = registry.histogram("http_request_size_bytes", "Размер тела HTTP-запроса",
+                                               ("method", "route"), SIZE_BUCKETS)
+        self.response_size = registry.histogram("http_response_size_bytes", "Размер тела HTTP-ответа",
+                                                ("method", "route"), SIZE_BUCKETS)
+        # (метод, маршрут, статус) -> дочерние метрики: на запрос - один поиск в словаре
+        self._children: Dict[Tuple[str, str, int], Tuple[Any, Any, Any, Any]] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+        received = sent = 0
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            received += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal status, sent
+            kind = message["type"]
+            if kind == "http.response.start":
+                status = message["status"]
+            elif kind == "http.response.body":
+                sent += len(message.get("body", b""))
+            elif kind == "http.response.zerocopysend":
+                sent += message.get("count") or 0
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            route = scope.get("route")
+            key = (scope["method"], route.path if route is not None else "unmatched", status)
+            children = self._children.get(key)
+            if children is None:
+                method, path, _ = key
+                children = self._children[key] = (
+                    self.requests.labels(method, path, str(status)), self.latency.labels(method, path),
+                    self.request_size.labels(method, path), self.response_size.labels(method, path))
+            requests, latency, request_size, response_size = children
+            requests.inc()
+            latency.observe(time.perf_counter() - started)
+            request_size.observe(received)
+            response_size.observe(sent)
+
+
+# ============ ДРЕЙФ ============
+
+def psi(expected: np.ndarray, actual: np.ndarray) -> np.ndarray:
+    """Population stability index по строкам долей корзин"""
+    expected = np.maximum(expected, PSI_EPSILON)
+    actual = np.maximum(actual, PSI_EPSILON)
+    return ((actual - expected) * np.log(actual / expected)).sum(axis=-1)
+
+
+def ks_distance(expected_cdf: np.ndarray, actual_cdf: np.ndarray) -> np.ndarray:
+    """Статистика KS на границах корзин - оценка снизу точной по строкам"""
+    if not expected_cdf.shape[-1]:
+        return np.zeros(expected_cdf.shape[:-1])
+    return np.abs(expected_cdf - actual_cdf).max(axis=-1)
+
+
+class _Tracked:
+    __slots__ = ("version", "baseline", "live", "lock", "buffer", "filled", "report")
+
+    def __init__(self, version: str, baseline: DataProfile):
+        self.version = version
+        self.baseline = baseline
+        self.live = baseline.empty()
+        self.lock = threading.Lock()
+        # Признаки и последним столбцом - предсказание
+        self.buffer = np.empty((DRIFT_BLOCK_ROWS, baseline.n_features + 1))
+        self.filled = 0
+        self.report: Optional[Dict[str, Any]] = None  # сбрасывается при обновлении скетчей
+
+    def update(self, X: np.ndarray, outputs: np.ndarray):
+        self.live.update(X, outputs)
+        self.report = None
+
+    def flush(self):
+        if self.filled:
+            block = self.buffer[:self.filled]
+            self.update(block[:, :-1], block[:, -1])
+            self.filled = 0
+
+
+class DriftMonitor:
+    """Дрейф входов и предсказаний развернутых моделей относительно обучения
+
+    Базовый профиль модели строится при обучении и хранится в артефакте
+    (model.drift_baseline). observe вызывается на пачку строк в потоке
+    предсказаний. Профиль, набранный другим процессом, добавляется merge.
+    С реестром метрик PSI столбцов выдается измерителем ml_drift_psi.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, psi_alert: float = PSI_ALERT):
+        self.psi_alert = psi_alert
+        self._models: Dict[str, _Tracked] = {}
+        self._lock = threading.Lock()
+        self._gauge = registry.gauge("ml_drift_psi", "PSI столбца относительно обучающей выборки",
+                                     ("model", "column")) if registry is not None else None
+
+    def track(self, model_id: str, baseline: DataProfile, version: str = ""):
+        """Начинает наблюдение; повторная загрузка той же версии сохраняет набранное"""
+        with self._lock:
+            tracked = self._models.get(model_id)
+            if tracked is not None and tracked.version == version:
+                return
+            tracked = self._models[model_id] = _Tracked(version, baseline)
+        if self._gauge is not None:
+            names = baseline.column_names() + [f"feature_{j}" for j in baseline.categorical]
+            for name in names:
+                self._gauge.labels(model_id, name).set_function(
+                    lambda model_id=model_id, name=name: self._column_psi(model_id, name))
+
+    def forget(self, model_id: str):
+        with self._lock:
+            self._models.pop(model_id, None)
+
+    def tracking(self, model_id: str) -> bool:
+        return model_id in self._models
+
+    def observe(self, model_id: str, X: np.ndarray, outputs: np.ndarray):
+        """Добавляет пачку; малые пачки копятся в буфере - у скетчей заметная цена вызова"""
+        tracked = self._models.get(model_id)
+        if tracked is None:
+            return
+        n = len(X)
+        with tracked.lock:
+            if tracked.filled + n > DRIFT_BLOCK_ROWS:
+                tracked.flush()
+            if n >= DRIFT_BLOCK_ROWS:
+                tracked.update(X, outputs)
+                return
+            rows = tracked.buffer[tracked.filled:tracked.filled + n]
+            rows[:, :-1] = X
+            rows[:, -1] = outputs
+            tracked.filled += n
+
+    def merge(self, model_id: str, live: DataProfile):
+        """Добавляет профиль, набранный другим процессом"""
+        tracked = self._models[model_id]
+        with tracked.lock:
+            tracked.live.merge(live)
+            tracked.report = None
+
+    def snapshot(self, model_id: str) -> DataProfile:
+        """Копия живого профиля - для передачи в другой процесс"""
+        tracked = self._models[model_id]
+        with tracked.lock:
+            tracked.flush()
+            return tracked.live.empty().merge(tracked.live)
+
+    def reset(self, model_id: str):
+        tracked = self._models[model_id]
+        with tracked.lock:
+            tracked.live = tracked.baseline.empty()
+            tracked.filled = 0
+            tracked.report = None
+
+    def report(self, model_id: str) -> Dict[str, Any]:
+        """PSI, KS и медианы по столбцам; пересчитывается только после новых строк"""
+        tracked = self._models[model_id]
+        with tracked.lock:
+            tracked.flush()
+            if tracked.report is None:
+                tracked.report = self._compute(tracked.baseline, tracked.live)
+            return tracked.report
+
+    def _column_psi(self, model_id: str, name: str) -> float:
+        return self.report(model_id)["columns"][name]["psi"]
+
+    def _compute(self, baseline: DataProfile, live: DataProfile) -> Dict[str, Any]:
+        base, current = baseline.histogram, live.histogram
+        column_psi = psi(base.fractions(), current.fractions())
+        column_ks = ks_distance(base.cdf(), current.cdf())
+        base_median, live_median = base.quantiles(0.5), current.quantiles(0.5)
+        observed = live.rows > 0  # без живых строк оценок нет
+        columns = {}
+        for j, name in enumerate(baseline.column_names()):
+            columns[name] = {"kind": "numeric",
+                             "psi": float(column_psi[j]) if observed else None,
+                             "ks": float(column_ks[j]) if observed else None,
+                             "baseline_median": float(base_median[j]),
+                             "live_median": float(live_median[j]) if observed else None}
+        for index, j in enumerate(baseline.categorical):
+            expected, actual = baseline.category_fractions(index), live.category_fractions(index)
+            columns[f"feature_{j}"] = {"kind": "categorical",
+                                       "psi": float(psi(expected, actual)) if observed else None,
+                                       "ks": None, "unseen_share": float(actual[-1]) if observed else None}
+        drifted = [name for name, column in columns.items() if observed and column["psi"] > self.psi_alert]
+        drifted.sort(key=lambda name: -columns[name]["psi"])
+        return {"baseline_rows": baseline.rows, "live_rows": live.rows, "psi_alert": self.psi_alert,
+                "drifted": drifted, "columns": columns}
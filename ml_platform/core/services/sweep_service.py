@@ -0,0 +1,294 @@
+"""
+Сервис переборов гиперпараметров
+
+Пространство поиска - словарь {параметр: описание}:
+    [a, b, c] или {"values": [...]}          - категориальный
+    {"min": 0.01, "max": 1, "log": true}      - вещественный (log - логарифмическая шкала)
+    {"min": 2, "max": 10, "type": "int"}      - целочисленный
+    {"steps": 5}                              - число точек диапазона для grid
+
+Испытания - дочерние эксперименты. В движке запусков одновременно находится
+не больше parallelism испытаний перебора; завершение испытания сразу
+ставит следующее, так что очередь планировщика не пустеет до конца перебора.
+Состояние раздачи живет в памяти процесса; после перезапуска recover()
+восстанавливает его по сохраненным переборам и статусам испытаний.
+"""
+import itertools
+import math
+import random
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from ml_platform.core.entities.experiment import Experiment
+from ml_platform.core.entities.sweep import Sweep
+
+MAX_TRIALS = 10000
+DEFAULT_RANDOM_BUDGET = 20
+DEFAULT_GRID_STEPS = 5
+_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71)
+
+
+# ============ ПРОСТРАНСТВО ПОИСКА ============
+
+def _dimension(name: str, spec: Any) -> Dict[str, Any]:
+    """Нормализует описание параметра"""
+    if isinstance(spec, list):
+        spec = {"values": spec}
+    if not isinstance(spec, dict):
+        raise ValueError(f"Параметр {name}: ожидается список значений или {{min, max}}")
+    if "values" in spec:
+        if not isinstance(spec["values"], list) or not spec["values"]:
+            raise ValueError(f"Параметр {name}: values должен быть непустым списком")
+        return {"values": spec["values"]}
+    try:
+        low, high = float(spec["min"]), float(spec["max"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Параметр {name}: нужны числовые min и max")
+    log = bool(spec.get("log", False))
+    if low > high or (log and low <= 0):
+        raise ValueError(f"Параметр {name}: некорректный диапазон")
+    return {"min": low, "max": high, "log": log, "int": spec.get("type") == "int",
+            "steps": int(spec.get("steps", DEFAULT_GRID_STEPS))}
+
+
+def _from_unit(dimension: Dict[str, Any], u: float):
+    """Значение параметра по точке единичного отрезка"""
+    if "values" in dimension:
+        values = dimension["values"]
+        return values[min(int(u * len(values)), len(values) - 1)]
+    low, high = dimension["min"], dimension["max"]
+    if dimension["log"]:
+        value = math.exp(math.log(low) + u * (math.log(high) - math.log(low)))
+    else:
+        value = low + u * (high - low)
+    return int(round(value)) if dimension["int"] else value
+
+
+def _grid_values(dimension: Dict[str, Any]) -> List[Any]:
+    if "values" in dimension:
+        return dimension["values"]
+    steps = max(1, dimension["steps"])
+    points = [i / (steps - 1) for i in range(steps)] if steps > 1 else [0.5]
+    values = [_from_unit(dimension, u) for u in points]
+    return list(dict.fromkeys(values))  # целые диапазоны могут дать повторы
+
+
+def halton(index: int, base: int) -> float:
+    """index-я точка последовательности ван дер Корпута по основанию base"""
+    result, fraction = 0.0, 1.0
+    while index > 0:
+        fraction /= base
+        index, digit = divmod(index, base)
+        result += digit * fraction
+    return result
+
+
+def generate_trials(search_space: Dict[str, Any], strategy: str, budget: Optional[int] = None,
+                    seed: int = 0) -> List[Dict[str, Any]]:
+    """Наборы гиперпараметров испытаний по стратегии grid, random или halton"""
+    if not isinstance(search_space, dict) or not search_space:
+        raise ValueError("Пространство поиска должно быть непустым объектом")
+    names = sorted(search_space)
+    dimensions = [_dimension(name, search_space[name]) for name in names]
+    if budget is not None and not 1 <= budget <= MAX_TRIALS:
+        raise ValueError(f"budget должен быть от 1 до {MAX_TRIALS}")
+
+    if strategy == "grid":
+        grid = itertools.product(*(_grid_values(d) for d in dimensions))
+        points = list(itertools.islice(grid, budget or MAX_TRIALS))
+        return [dict(zip(names, point)) for point in points]
+
+    budget = budget or DEFAULT_RANDOM_BUDGET
+    if strategy == "random":
+        rng = random.Random(seed)
+        return [{name: _from_unit(d, rng.random()) for name, d in zip(names, dimensions)}
+                for _ in range(budget)]
+    if strategy == "halton":
+        if len(dimensions) > len(_PRIMES):
+            raise ValueError(f"halton поддерживает до {len(_PRIMES)} параметров")
+        # Пропуск начала последовательности убирает выровненные первые точки
+        start = 20 + seed
+        return [{name: _from_unit(d, halton(start + i, _PRIMES[k]))
+                 for k, (name, d) in enumerate(zip(names, dimensions))}
+                for i in range(budget)]
+    raise ValueError(f"Неизвестная стратегия перебора: {strategy}")
+
+
+# ============ ВЫПОЛНЕНИЕ ============
+
+class SweepService:
+    """Раздает испытания переборов в движок запусков и сводит их прогресс
+
+    db - фасад хранилища (add_experiments, get_experiment_by_id, add_sweep,
+    update_sweep, get_running_sweeps, update_experiment_status, training_spec),
+    runner - ExperimentRunner.
+    on_job_update(job) нужно вызывать на каждый переход статуса задачи.
+    """
+
+    def __init__(self, db, runner):
+        self.db = db
+        self.runner = runner
+        self._lock = threading.RLock()
+        self._sweeps: Dict[str, Sweep] = {}          # активные переборы
+        self._pending: Dict[str, deque] = {}         # id перебора -> id еще не отданных испытаний
+        self._in_flight: Dict[str, int] = {}
+        self._trial_sweep: Dict[str, str] = {}       # id эксперимента -> id перебора
+        self._trial_status: Dict[str, str] = {}      # последний учтенный статус испытания
+        self._trial_jobs: Dict[str, str] = {}        # id эксперимента -> id задачи
+
+    def create(self, sweep: Sweep) -> Sweep:
+        """Создает испытания-эксперименты и запускает первые parallelism из них"""
+        trials = generate_trials(sweep.search_space, sweep.strategy, sweep.budget, sweep.seed)
+        if sweep.parallelism is None:
+            # По умолчанию - столько, сколько машина выполняет одновременно
+            sweep.parallelism = self.runner.max_workers
+        if sweep.parallelism < 1:
+            raise ValueError("parallelism должен быть не меньше 1")
+
+        experiments = []
+        for number, params in enumerate(trials, 1):
+            experiment = Experiment(f"{sweep.name} #{number}", sweep.algorithm, sweep.dataset, sweep.project_id)
+            experiment.hyperparameters = {**sweep.hyperparameters, **params}
+            experiments.append(experiment)
+        sweep.trial_ids = [experiment.id for experiment in experiments]
+        sweep.progress.update(total=len(experiments), created=len(experiments))
+
+        # Испытания еще не отданы в движок: пачка пишется без блокировки сервиса
+        self.db.add_experiments(experiments)
+        with self._lock:
+            for experiment in experiments:
+                self._trial_sweep[experiment.id] = sweep.id
+                self._trial_status[experiment.id] = "created"
+            self.db.add_sweep(sweep)
+            self._sweeps[sweep.id] = sweep
+            self._pending[sweep.id] = deque(sweep.trial_ids)
+            self._in_flight[sweep.id] = 0
+            self._fill(sweep)
+        return sweep
+
+    def recover(self) -> List[Sweep]:
+        """Возобновляет переборы, оставшиеся running после перезапуска процесса
+
+        Сводка пересчитывается по статусам испытаний (прерванные запуски
+        хранилище к этому моменту отметило неуспешными), неотданные
+        испытания снова ставятся в очередь. Уже активные переборы не трогаются.
+        """
+        recovered = []
+        with self._lock:
+            for sweep in self.db.get_running_sweeps():
+                if sweep.id in self._sweeps:
+                    continue
+                statuses = {}
+                for experiment_id in sweep.trial_ids:
+                    experiment = self.db.get_experiment_by_id(experiment_id)
+                    statuses[experiment_id] = experiment.status if experiment else "failed"
+                progress = sweep.progress
+                for status in ("created", "queued", "running", "completed", "failed", "cancelled"):
+                    progress[status] = 0
+                for status in statuses.values():
+                    progress[status] += 1
+                progress["total"] = len(sweep.trial_ids)
+                self._sweeps[sweep.id] = sweep
+                self._trial_sweep.update(dict.fromkeys(sweep.trial_ids, sweep.id))
+                self._trial_status.update(statuses)
+                self._pending[sweep.id] = deque(e for e, status in statuses.items() if status == "created")
+                # Задачи прошлого процесса потеряны: в движке испытаний этого перебора нет
+                self._in_flight[sweep.id] = 0
+                if not self._finish_if_done(sweep):
+                    self._fill(sweep)
+                self.db.update_sweep(sweep)
+                recovered.append(sweep)
+        return recovered
+
+    def _fill(self, sweep: Sweep):
+        """Дозаполняет движок испытаниями до parallelism (под блокировкой)"""
+        pending = self._pending[sweep.id]
+        while pending and self._in_flight[sweep.id] < sweep.parallelism:
+            experiment = self.db.get_experiment_by_id(pending.popleft())
+            self._in_flight[sweep.id] += 1
+            try:
+                job = self.runner.submit(experiment.id, self.db.training_spec(experiment),
+                                         project_id=sweep.project_id)
+            except ValueError as e:
+                # Запрос ресурсов испытания невыполним - испытание сразу неуспешно
+                print(f"⚠️ Испытание {experiment.name} не запущено: {e}")
+                self._in_flight[sweep.id] -= 1
+                self.db.update_experiment_status(experiment.id, "failed")
+                self._count(sweep, experiment.id, "failed", None)
+                continue
+            self._trial_jobs[experiment.id] = job.id
+
+    def on_job_update(self, job):
+        """Учитывает переход статуса испытания в сводке перебора"""
+        with self._lock:
+            sweep_id = self._trial_sweep.get(job.experiment_id)
+            if sweep_id is None:
+                return
+            sweep = self._sweeps[sweep_id]
+            self._count(sweep, job.experiment_id, job.status, job.result)
+            if job.finished and sweep_id in self._in_flight:
+                self._in_flight[sweep_id] -= 1
+                if sweep.status == "running":
+                    self._fill(sweep)
+            self.db.update_sweep(sweep)
+
+    def _count(self, sweep: Sweep, experiment_id: str, status: str, result: Optional[Dict[str, Any]]):
+        progress = sweep.progress
+        previous = self._trial_status.get(experiment_id)
+        if previous == status:
+            return
+        progress[previous] -= 1
+        progress[status] += 1
+        self._trial_status[experiment_id] = status
+
+        if status == "completed" and result and sweep.objective in result:
+            value = result[sweep.objective]
+            best = progress["best"]
+            if sweep.is_better(value, best["value"] if best else None):
+                experiment = self.db.get_experiment_by_id(experiment_id)
+                progress["best"] = {"experiment_id": experiment_id, "value": value,
+                                    "hyperparameters": experiment.hyperparameters if experiment else None}
+
+        self._finish_if_done(sweep)
+
+    def _finish_if_done(self, sweep: Sweep) -> bool:
+        """Завершает перебор, если все испытания закончились (под блокировкой)"""
+        progress = sweep.progress
+        finished = progress["completed"] + progress["failed"] + progress["cancelled"]
+        if finished < progress["total"]:
+            return False
+        if sweep.status == "running":
+            sweep.status = "completed"
+            sweep.completed_at = datetime.now()
+        self._forget(sweep)
+        return True
+
+    def cancel(self, sweep_id: str) -> Optional[Sweep]:
+        """Снимает неотданные испытания и отменяет выполняющиеся"""
+        with self._lock:
+            sweep = self._sweeps.get(sweep_id)
+            if sweep is None:
+                return None
+            sweep.status = "cancelled"
+            sweep.completed_at = datetime.now()
+            pending = list(self._pending.pop(sweep_id, ()))
+            job_ids = [self._trial_jobs[e] for e in sweep.trial_ids if e in self._trial_jobs]
+            for experiment_id in pending:
+                self.db.update_experiment_status(experiment_id, "cancelled")
+                self._count(sweep, experiment_id, "cancelled", None)
+            self.db.update_sweep(sweep)
+        for job_id in job_ids:
+            self.runner.cancel(job_id)
+        return sweep
+
+    def _forget(self, sweep: Sweep):
+        """Убирает служебное состояние завершенного перебора (под блокировкой)"""
+        self._sweeps.pop(sweep.id, None)
+        self._pending.pop(sweep.id, None)
+        self._in_flight.pop(sweep.id, None)
+        for experiment_id in sweep.trial_ids:
+            self._trial_sweep.pop(experiment_id, None)
+            self._trial_status.pop(experiment_id, None)
+            self._trial_jobs.pop(experiment_id, None)
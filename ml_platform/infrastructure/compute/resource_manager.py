@@ -0,0 +1,205 @@
+"""
+Планировщик вычислительных ресурсов хоста
+
+Хост описывается числом ядер и объемом памяти. Каждый запуск заявляет
+запрос (ядра, память, приоритет). Планировщик выбирает из очереди запуски,
+которые помещаются в свободный остаток (first-fit упаковка с дозаполнением),
+в порядке: приоритет, затем доля ресурсов проекта (fair share), затем время
+постановки. Суммарное выделение никогда не превышает емкость хоста.
+"""
+import collections
+import os
+import threading
+import time
+from typing import Any, Deque, Dict, List, Optional
+
+
+def detect_memory_mb(default: int = 4096) -> int:
+    """Объем физической памяти хоста в МБ (если ОС позволяет узнать)"""
+    try:
+        return int(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024))
+    except (AttributeError, ValueError, OSError):
+        return default
+
+
+class ResourceRequest:
+    """Запрос ресурсов одного запуска"""
+
+    __slots__ = ("cpus", "memory_mb", "priority")
+
+    def __init__(self, cpus: int = 1, memory_mb: int = 512, priority: int = 0):
+        if cpus < 1 or memory_mb < 0:
+            raise ValueError("Запрос ресурсов: cpus >= 1, memory_mb >= 0")
+        self.cpus = cpus
+        self.memory_mb = memory_mb
+        self.priority = priority
+
+    @classmethod
+    def from_hyperparameters(cls, hyperparameters: Optional[Dict[str, Any]]) -> "ResourceRequest":
+        """Запрос из гиперпараметров эксперимента: cpus, memory_mb, priority"""
+        hyperparameters = hyperparameters or {}
+        try:
+            return cls(
+                cpus=int(hyperparameters.get("cpus", 1)),
+                memory_mb=int(hyperparameters.get("memory_mb", 512)),
+                priority=int(hyperparameters.get("priority", 0))
+            )
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Некорректный запрос ресурсов: {e}")
+
+    def to_dict(self):
+        return {"cpus": self.cpus, "memory_mb": self.memory_mb, "priority": self.priority}
+
+
+class _Ticket:
+    __slots__ = ("id", "group", "request", "submitted", "started")
+
+    def __init__(self, ticket_id: str, group: str, request: ResourceRequest):
+        self.id = ticket_id
+        self.group = group
+        self.request = request
+        self.submitted = time.monotonic()
+        self.started = None
+
+
+class ResourceManager:
+    """Учет ядер и памяти, очередь с приоритетами и справедливым разделением
+
+    starvation_timeout - сколько большой запрос может ждать, пока мелкие
+    обходят его; после этого свободные ресурсы копятся под него.
+    """
+
+    def __init__(self, total_cpus: Optional[int] = None, total_memory_mb: Optional[int] = None,
+                 starvation_timeout: float = 60.0, wait_history: int = 1000):
+        self.total_cpus = total_cpus or os.cpu_count() or 1
+        self.total_memory_mb = total_memory_mb or detect_memory_mb()
+        self.starvation_timeout = starvation_timeout
+
+        self._lock = threading.Lock()
+        self._queued: Dict[str, _Ticket] = {}
+        self._running: Dict[str, _Ticket] = {}
+        self.used_cpus = 0
+        self.used_memory_mb = 0
+        self._group_usage: Dict[str, float] = collections.Counter()
+        self._waits: Deque[float] = collections.deque(maxlen=wait_history)
+
+        # Интеграл занятости по времени - средняя загрузка с момента старта
+        self._started_at = time.monotonic()
+        self._last_change = self._started_at
+        self._cpu_seconds = 0.0
+        self._memory_mb_seconds = 0.0
+
+    # ============ ОЧЕРЕДЬ ============
+
+    def submit(self, ticket_id: str, group: str, request: ResourceRequest):
+        """Ставит запрос в очередь; запрос больше емкости хоста отклоняется сразу"""
+        if request.cpus > self.total_cpus or request.memory_mb > self.total_memory_mb:
+            raise ValueError(
+                f"Запрос ({request.cpus} ядер, {request.memory_mb} МБ) превышает емкость хоста "
+                f"({self.total_cpus} ядер, {self.total_memory_mb} МБ)"
+            )
+        with self._lock:
+            self._queued[ticket_id] = _Ticket(ticket_id, group, request)
+
+    def cancel(self, ticket_id: str) -> bool:
+        """Убирает запрос из очереди (не выполняющийся)"""
+        with self._lock:
+            return self._queued.pop(ticket_id, None) is not None
+
+    def schedule(self) -> List[str]:
+        """Выделяет ресурсы всем запросам, которые можно запустить сейчас"""
+        started = []
+        with self._lock:
+            now = time.monotonic()
+            candidates = list(self._queued.values())
+            while candidates:
+                candidates.sort(key=lambda t: (-t.request.priority, self._share(t.group), t.submitted))
+                ticket = next((t for t in candidates if self._fits(t.request)), None)
+                if ticket is None:
+                    break
+                head = candidates[0]
+                if ticket is not head and now - head.submitted > self.starvation_timeout:
+                    # Голова очереди ждет слишком долго - не даем мелким занять ее место
+                    break
+                candidates.remove(ticket)
+                del self._queued[ticket.id]
+                self._allocate(ticket, now)
+                started.append(ticket.id)
+        return started
+
+    def release(self, ticket_id: str):
+        """Освобождает ресурсы завершившегося запуска"""
+        with self._lock:
+            ticket = self._running.pop(ticket_id, None)
+            if ticket is None:
+                return
+            self._accumulate(time.monotonic())
+            self.used_cpus -= ticket.request.cpus
+            self.used_memory_mb -= ticket.request.memory_mb
+            self._group_usage[ticket.group] -= self._weight(ticket.request)
+
+    def _fits(self, request: ResourceRequest) -> bool:
+        return (self.used_cpus + request.cpus <= self.total_cpus
+                and self.used_memory_mb + request.memory_mb <= self.total_memory_mb)
+
+    def _weight(self, request: ResourceRequest) -> float:
+        # Доминирующая доля (DRF): что запрос занимает сильнее - ядра или память
+        return max(request.cpus / self.total_cpus, request.memory_mb / self.total_memory_mb)
+
+    def _share(self, group: str) -> float:
+        return self._group_usage.get(group, 0.0)
+
+    def _allocate(self, ticket: _Ticket, now: float):
+        self._accumulate(now)
+        ticket.started = now
+        self._running[ticket.id] = ticket
+        self.used_cpus += ticket.request.cpus
+        self.used_memory_mb += ticket.request.memory_mb
+        self._group_usage[ticket.group] += self._weight(ticket.request)
+        self._waits.append(now - ticket.submitted)
+
+    def _accumulate(self, now: float):
+        elapsed = now - self._last_change
+        self._cpu_seconds += self.used_cpus * elapsed
+        self._memory_mb_seconds += self.used_memory_mb * elapsed
+        self._last_change = now
+
+    # ============ СТАТИСТИКА ============
+
+    def stats(self) -> Dict[str, Any]:
+        """Очередь, ожидание и загрузка - для подбора размера машин"""
+        with self._lock:
+            now = time.monotonic()
+            self._accumulate(now)
+            uptime = max(now - self._started_at, 1e-9)
+            waits = sorted(self._waits)
+            queued_by_group = collections.Counter(t.group for t in self._queued.values())
+            running_by_group = collections.Counter(t.group for t in self._running.values())
+            oldest = min((t.submitted for t in self._queued.values()), default=None)
+            return {
+                "capacity": {"cpus": self.total_cpus, "memory_mb": self.total_memory_mb},
+                "used": {"cpus": self.used_cpus, "memory_mb": self.used_memory_mb},
+                "utilization": {
+                    "cpus": self.used_cpus / self.total_cpus,
+                    "memory": self.used_memory_mb / self.total_memory_mb,
+                    "avg_cpus": self._cpu_seconds / uptime / self.total_cpus,
+                    "avg_memory": self._memory_mb_seconds / uptime / self.total_memory_mb
+                },
+                "queue_depth": len(self._queued),
+                "running": len(self._running),
+                "queued_by_project": dict(queued_by_group),
+                "running_by_project": dict(running_by_group),
+                "wait_seconds": {
+                    "samples": len(waits),
+                    "avg": sum(waits) / len(waits) if waits else 0.0,
+                    "p50": _percentile(waits, 0.50),
+                    "p95": _percentile(waits, 0.95),
+                    "oldest_queued": now - oldest if oldest is not None else 0.0
+                }
+            }
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
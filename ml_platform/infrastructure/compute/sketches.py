@@ -0,0 +1,252 @@
+"""
+Потоковые скетчи распределений с фиксированной памятью
+
+    HistogramSketch - гистограммы столбцов по общим границам (квантили
+                      обучающей выборки) с минимумом и максимумом:
+                      доли по корзинам, функция распределения, квантили
+    CountMinSketch  - частоты категорий всех категориальных столбцов
+                      в одной таблице depth x width
+    DataProfile     - профиль потока строк модели: гистограммы числовых
+                      признаков и предсказания, count-min категориальных
+
+Пачка строк обновляет скетч векторно: searchsorted по столбцам и один
+np.bincount на все корзины. Память не зависит от числа строк. Скетчи
+с одинаковой структурой складываются (merge) - профили, набранные
+в разных процессах, объединяются без исходных данных; состояние -
+массивы numpy, профиль передается между процессами через pickle.
+"""
+from typing import List
+
+import numpy as np
+
+DEFAULT_BINS = 32
+# Целочисленный столбец с не большим числом значений считается категориальным
+MAX_CATEGORIES = 32
+CMS_WIDTH = 2048
+CMS_DEPTH = 4
+
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _mix(keys: np.ndarray) -> np.ndarray:
+    """Перемешивание битов splitmix64 (переполнение uint64 - по модулю 2^64)"""
+    keys = keys ^ (keys >> np.uint64(30))
+    keys = keys * _MIX_1
+    keys = keys ^ (keys >> np.uint64(27))
+    keys = keys * _MIX_2
+    return keys ^ (keys >> np.uint64(31))
+
+
+# ============ ГИСТОГРАММЫ ============
+
+class HistogramSketch:
+    """Гистограммы столбцов с фиксированными границами
+
+    cuts - матрица столбцы x (bins - 1), лишние границы столбца заполнены
+    +inf. Значение x попадает в первую корзину с x <= граница, как в
+    разбиениях деревьев; NaN считается в отдельной последней корзине.
+    """
+
+    def __init__(self, cuts: np.ndarray):
+        self.cuts = np.asarray(cuts, dtype=np.float64)
+        n_columns, n_cuts = self.cuts.shape
+        self.n_bins = n_cuts + 1
+        self.counts = np.zeros((n_columns, self.n_bins + 1), dtype=np.int64)
+        self.minimum = np.full(n_columns, np.inf)
+        self.maximum = np.full(n_columns, -np.inf)
+
+    @classmethod
+    def from_sample(cls, X: np.ndarray, n_bins: int = DEFAULT_BINS) -> "HistogramSketch":
+        """Границы - квантили выборки по столбцам (одинаковые квантили схлопываются)"""
+        X = np.asarray(X, dtype=np.float64)
+        cuts = np.full((X.shape[1], n_bins - 1), np.inf)
+        levels = np.linspace(0, 1, n_bins + 1)[1:-1]
+        for j in range(X.shape[1]):
+            column = X[:, j][~np.isnan(X[:, j])]
+            if len(column):
+                unique = np.unique(np.quantile(column, levels))
+                cuts[j, :len(unique)] = unique
+        return cls(cuts)
+
+    @property
+    def n_columns(self) -> int:
+        return len(self.cuts)
+
+    def empty(self) -> "HistogramSketch":
+        return HistogramSketch(self.cuts)
+
+    def update(self, X: np.ndarray):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_columns:
+            raise ValueError(f"Ожидается матрица из {self.n_columns} столбцов")
+        if not len(X):
+            return
+        bins = np.empty(X.shape, dtype=np.int64)
+        for j in range(self.n_columns):
+            bins[:, j] = np.searchsorted(self.cuts[j], X[:, j], side="left")
+        missing = np.isnan(X)
+        bins[missing] = self.n_bins
+        # Номер корзины со сдвигом столбца: все гистограммы - одним bincount
+        width = self.n_bins + 1
+        codes = (bins + np.arange(self.n_columns) * width).ravel()
+        self.counts += np.bincount(codes, minlength=self.counts.size).reshape(self.counts.shape)
+        # fmin/fmax пропускают NaN
+        np.fmin(self.minimum, np.fmin.reduce(X, axis=0), out=self.minimum)
+        np.fmax(self.maximum, np.fmax.reduce(X, axis=0), out=self.maximum)
+
+    def merge(self, other: "HistogramSketch") -> "HistogramSketch":
+        if not np.array_equal(self.cuts, other.cuts):
+            raise ValueError("Гистограммы с разными границами не складываются")
+        self.counts += other.counts
+        np.fmin(self.minimum, other.minimum, out=self.minimum)
+        np.fmax(self.maximum, other.maximum, out=self.maximum)
+        return self
+
+    def fractions(self) -> np.ndarray:
+        """Доли корзин по столбцам (с корзиной NaN); у пустого столбца - нули"""
+        totals = self.counts.sum(axis=1, keepdims=True)
+        return self.counts / np.maximum(totals, 1)
+
+    def cdf(self) -> np.ndarray:
+        """Доля значений <= каждой границы (среди не-NaN)"""
+        finite = self.counts[:, :-1]
+        totals = finite.sum(axis=1, keepdims=True)
+        return np.cumsum(finite[:, :-1], axis=1) / np.maximum(totals, 1)
+
+    def quantiles(self, q: float) -> np.ndarray:
+        """Квантиль по столбцам: линейная интерполяция внутри корзины"""
+        result = np.full(self.n_columns, np.nan)
+        for j in range(self.n_columns):
+            counts = self.counts[j, :-1]
+            total = counts.sum()
+            if not total:
+                continue
+            real = self.cuts[j][np.isfinite(self.cuts[j])]
+            edges = np.concatenate([[self.minimum[j]], np.clip(real, self.minimum[j], self.maximum[j]),
+                                    [self.maximum[j]]])
+            cumulative = np.concatenate([[0], np.cumsum(counts[:len(real) + 1])]) / total
+            result[j] = np.interp(q, cumulative, edges)
+        return result
+
+
+# ============ COUNT-MIN ============
+
+class CountMinSketch:
+    """Оценка частот ключей (столбец, значение) сверху: min по depth строкам таблицы"""
+
+    def __init__(self, width: int = CMS_WIDTH, depth: int = CMS_DEPTH, seed: int = 0):
+        if width & (width - 1):
+            raise ValueError("width должен быть степенью двойки")
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        multipliers = np.random.default_rng(seed).integers(1, 2 ** 63, size=depth, dtype=np.uint64)
+        self._multipliers = (multipliers | np.uint64(1))[:, None]
+        self._shift = np.uint64(64 - (width.bit_length() - 1))
+
+    def empty(self) -> "CountMinSketch":
+        return CountMinSketch(self.width, self.depth, self.seed)
+
+    def _slots(self, columns: np.ndarray, values: np.ndarray) -> np.ndarray:
+        values = np.asarray(values, dtype=np.float64) + 0.0  # -0.0 и 0.0 - один ключ
+        values[np.isnan(values)] = np.nan                    # единое представление NaN
+        keys = _mix(values.view(np.uint64) ^ (np.asarray(columns, dtype=np.uint64) * _GOLDEN))
+        return (keys[None, :] * self._multipliers) >> self._shift
+
+    def update(self, columns: np.ndarray, values: np.ndarray):
+        slots = self._slots(columns, values)
+        codes = (slots + (np.arange(self.depth, dtype=np.uint64) * np.uint64(self.width))[:, None]).ravel()
+        self.table += np.bincount(codes.astype(np.int64), minlength=self.table.size).reshape(self.table.shape)
+
+    def estimate(self, columns: np.ndarray, values: np.ndarray) -> np.ndarray:
+        slots = self._slots(columns, values).astype(np.int64)
+        return np.take_along_axis(self.table, slots, axis=1).min(axis=0)
+
+    def merge(self, other: "CountMinSketch") -> "CountMinSketch":
+        if (self.width, self.depth, self.seed) != (other.width, other.depth, other.seed):
+            raise ValueError("Count-min с разными параметрами не складываются")
+        self.table += other.table
+        return self
+
+
+# ============ ПРОФИЛЬ ============
+
+class DataProfile:
+    """Профиль строк модели: признаки и предсказание
+
+    Структура (какие столбцы категориальные, границы корзин, известные
+    категории) задается обучающей выборкой в fit; профиль живого потока -
+    empty() от профиля обучения, поэтому их корзины совпадают.
+    """
+
+    def __init__(self, n_features: int, numeric: np.ndarray, categorical: np.ndarray,
+                 categories: List[np.ndarray], histogram: HistogramSketch, counts: CountMinSketch):
+        self.n_features = n_features
+        self.numeric = numeric
+        self.categorical = categorical
+        self.categories = categories
+        self.histogram = histogram  # числовые признаки и последним столбцом - предсказание
+        self.counts = counts
+        self.rows = 0
+
+    @classmethod
+    def fit(cls, X: np.ndarray, outputs: np.ndarray, n_bins: int = DEFAULT_BINS,
+            max_categories: int = MAX_CATEGORIES) -> "DataProfile":
+        X = np.asarray(X, dtype=np.float64)
+        numeric, categorical, categories = [], [], []
+        for j in range(X.shape[1]):
+            column = X[:, j]
+            finite = column[np.isfinite(column)]
+            values = np.unique(finite)
+            if len(finite) and len(values) <= max_categories and np.all(values == np.round(values)):
+                categorical.append(j)
+                categories.append(values)
+            else:
+                numeric.append(j)
+        numeric = np.array(numeric, dtype=np.int64)
+        histogram = HistogramSketch.from_sample(np.column_stack([X[:, numeric], outputs]), n_bins)
+        profile = cls(X.shape[1], numeric, np.array(categorical, dtype=np.int64), categories,
+                      histogram, CountMinSketch())
+        profile.update(X, outputs)
+        return profile
+
+    def empty(self) -> "DataProfile":
+        return DataProfile(self.n_features, self.numeric, self.categorical, self.categories,
+                           self.histogram.empty(), self.counts.empty())
+
+    def update(self, X: np.ndarray, outputs: np.ndarray):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Ожидается матрица из {self.n_features} признаков")
+        self.histogram.update(np.column_stack([X[:, self.numeric], outputs]))
+        if len(self.categorical):
+            block = X[:, self.categorical]
+            columns = np.broadcast_to(self.categorical, block.shape)
+            self.counts.update(columns.ravel(), block.ravel())
+        self.rows += len(X)
+
+    def merge(self, other: "DataProfile") -> "DataProfile":
+        if not (np.array_equal(self.numeric, other.numeric) and np.array_equal(self.categorical, other.categorical)):
+            raise ValueError("Профили с разной структурой не складываются")
+        self.histogram.merge(other.histogram)
+        self.counts.merge(other.counts)
+        self.rows += other.rows
+        return self
+
+    def category_fractions(self, index: int) -> np.ndarray:
+        """Доли известных категорий столбца categorical[index] и последней - прочих"""
+        column = self.categorical[index]
+        values = self.categories[index]
+        estimates = self.counts.estimate(np.full(len(values), column), values).astype(np.float64)
+        # Count-min завышает оценки: сумма по известным не больше числа строк
+        known = min(estimates.sum(), self.rows)
+        if estimates.sum() > 0:
+            estimates *= known / estimates.sum()
+        return np.append(estimates, self.rows - known) / max(self.rows, 1)
+
+    def column_names(self) -> List[str]:
+        """Имена столбцов гистограммы"""
+        return [f"feature_{j}" for j in self.numeric] + ["prediction"]
@@ -0,0 +1,635 @@
+"""
+Локальное обучение моделей на NumPy (бинарная классификация)
+
+Логистическая регрессия, градиентный бустинг на гистограммах, случайный лес
+и небольшая нейросеть. Деревья строятся по бинаризованным признакам (uint8)
+по уровням: гистограммы градиентов всех признаков всех узлов уровня
+считаются одним np.bincount, поэтому цикл Python идет по глубине, а не по узлам.
+"""
+import inspect
+import os
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ml_platform.infrastructure.compute.sketches import DataProfile
+from ml_platform.infrastructure.storage.artifact_store import ArtifactStore
+from ml_platform.infrastructure.storage.columnar import ColumnarDataset
+from ml_platform.infrastructure.storage.dataset_cache import build_entry
+from ml_platform.infrastructure.storage.model_format import save_model
+
+DEFAULT_SAMPLES = 5000
+DEFAULT_FEATURES = 20
+# Сколько датасетов держит процесс-воркер между запусками (испытания перебора - на одних данных)
+DATASET_CACHE_SIZE = 4
+
+_dataset_cache: "OrderedDict[tuple, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+
+
+class TrainingCancelled(Exception):
+    """Обучение прервано между итерациями"""
+
+
+def _never_cancelled() -> bool:
+    return False
+
+
+# ============ ДАННЫЕ ============
+
+def dataset_key(name: str, n_samples: int = DEFAULT_SAMPLES, n_features: int = DEFAULT_FEATURES,
+                data_dir: Optional[str] = None, features: Optional[List[str]] = None,
+                target: Optional[str] = None, rows: Optional[Tuple[int, int]] = None) -> tuple:
+    """Ключ подготовленного датасета; с mtime - перезаписанный файл не отдается из кэша"""
+    path = name if os.path.isabs(name) or data_dir is None else os.path.join(data_dir, name)
+    if ColumnarDataset.exists(path):
+        return ("columnar", path, os.path.getmtime(os.path.join(path, "meta.json")),
+                tuple(features or ()), target, tuple(rows or ()))
+    if name.endswith(".csv") and os.path.isfile(path):
+        return ("csv", path, os.path.getmtime(path))
+    return ("synthetic", name, n_samples, n_features)
+
+
+def load_dataset(name: str, n_samples: int = DEFAULT_SAMPLES, n_features: int = DEFAULT_FEATURES,
+                 data_dir: Optional[str] = None, features: Optional[List[str]] = None,
+                 target: Optional[str] = None, rows: Optional[Tuple[int, int]] = None,
+                 shared_path: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Загружает датасет: колоночный каталог, CSV или синтетический
+
+    Целевая переменная - target или последний столбец. Из колоночного
+    датасета читаются только столбцы features + target и строки rows
+    (start, stop). Для имен без файла (демо-датасеты) генерируются
+    воспроизводимые данные: одно и то же имя всегда дает одну и ту же выборку.
+    С shared_path подготовленные массивы берутся из общего кэша хоста
+    (см. dataset_cache) через mmap. Загруженное остается в кэше процесса,
+    поэтому следующий запуск в том же воркере не читает заново.
+    """
+    key = dataset_key(name, n_samples, n_features, data_dir, features, target, rows)
+    if key in _dataset_cache:
+        _dataset_cache.move_to_end(key)
+        return _dataset_cache[key]
+
+    build = partial(_read_dataset, key, features, target, rows)
+    if shared_path:
+        # Не держим mmap записи после запуска: вытесненная запись должна освобождать память
+        return build_entry(shared_path, build)
+    X, y = build()
+    # Общие для всех запусков массивы защищены от записи
+    X.flags.writeable = False
+    y.flags.writeable = False
+    _dataset_cache[key] = (X, y)
+    while len(_dataset_cache) > DATASET_CACHE_SIZE:
+        _dataset_cache.popitem(last=False)
+    return X, y
+
+
+def _read_dataset(key: tuple, features: Optional[List[str]], target: Optional[str],
+                  rows: Optional[Tuple[int, int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Читает датасет и один раз перемешивает строки (см. train_test_split)"""
+    kind = key[0]
+    if kind == "columnar":
+        X, y = _load_columnar(key[1], features, target, rows)
+    elif kind == "csv":
+        X, y = _load_csv(key[1])
+    else:
+        X, y = synthetic_dataset(key[1], key[2], key[3])
+    order = np.random.default_rng(0).permutation(len(y))
+    return X[order], y[order]
+
+
+def _load_csv(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    # Текстовые столбцы читаются как NaN целиком - отбрасываются до фильтра строк,
+    # иначе NaN в каждой строке отбросил бы весь датасет
+    table = np.genfromtxt(path, delimiter=",", skip_header=1, dtype=np.float64, ndmin=2)
+    table = table[:, ~np.isnan(table).all(axis=0)]
+    table = table[~np.isnan(table).any(axis=1)]
+    if table.shape[1] < 2 or not len(table):
+        raise ValueError(f"В датасете {os.path.basename(path)} нет числовых строк")
+    return table[:, :-1], _binary_target(table[:, -1])
+
+
+def _load_columnar(path: str, features: Optional[List[str]], target: Optional[str],
+                   rows: Optional[Tuple[int, int]]) -> Tuple[np.ndarray, np.ndarray]:
+    dataset = ColumnarDataset(path)
+    target = target or dataset.columns[-1]
+    features = list(features) if features else [c for c in dataset.columns if c != target]
+    start, stop = rows if rows else (0, None)
+    # Матрица признаков - единственная копия: столбцы читаются из mmap прямо в нее
+    X = np.empty((len(dataset.column(target, start, stop)), len(features)), dtype=np.float64)
+    for j, name in enumerate(features):
+        X[:, j] = dataset.column(name, start, stop)
+    y = np.asarray(dataset.column(target, start, stop), dtype=np.float64)
+    keep = ~(np.isnan(X).any(axis=1) | np.isnan(y))
+    if not keep.all():
+        X, y = X[keep], y[keep]
+    return X, _binary_target(y)
+
+
+def synthetic_dataset(name: str, n_samples: int = DEFAULT_SAMPLES,
+                      n_features: int = DEFAULT_FEATURES) -> Tuple[np.ndarray, np.ndarray]:
+    """Нелинейная задача классификации с шумом, зерно - от имени датасета"""
+    rng = np.random.default_rng(zlib.crc32(name.encode("utf-8")))
+    X = rng.normal(size=(n_samples, n_features))
+    weights = rng.normal(size=n_features) * (rng.random(n_features) < 0.5)
+    logits = X @ weights + 1.5 * np.sin(X[:, 0] * 2) + X[:, 1] * X[:, 2 % n_features]
+    logits += rng.normal(scale=0.5, size=n_samples)
+    return X, (logits > np.median(logits)).astype(np.float64)
+
+
+def _binary_target(column: np.ndarray) -> np.ndarray:
+    # Положительный класс - наибольшее значение целевой переменной
+    if not len(column):
+        raise ValueError("Пустая выборка: нет строк с целевой переменной")
+    classes = np.unique(column)
+    return (column == classes[-1]).astype(np.float64)
+
+
+def train_test_split(X: np.ndarray, y: np.ndarray, test_size: float = 0.2):
+    """Делит выборку срезами - без копий
+
+    Строки перемешаны один раз при загрузке, поэтому отложенная выборка -
+    просто первые test_size строк, а срезы общего датасета остаются видами mmap.
+    """
+    n_test = max(1, int(len(y) * test_size))
+    return X[n_test:], X[:n_test], y[n_test:], y[:n_test]
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -35, 35)))
+
+
+def _log_loss(y: np.ndarray, proba: np.ndarray) -> float:
+    proba = np.clip(proba, 1e-12, 1 - 1e-12)
+    return float(-np.mean(y * np.log(proba) + (1 - y) * np.log(1 - proba)))
+
+
+class _Standardizer:
+    def fit(self, X: np.ndarray):
+        self.mean = X.mean(axis=0)
+        self.scale = X.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+        return self
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (X - self.mean) / self.scale
+
+
+# ============ ДЕРЕВЬЯ ============
+
+class FeatureBinner:
+    """Квантильные границы признаков; бин = число границ меньше значения"""
+
+    def __init__(self, n_bins: int = 64):
+        if not 2 <= n_bins <= 256:
+            raise ValueError("n_bins должно быть от 2 до 256")
+        self.n_bins = n_bins
+        self.cuts: List[np.ndarray] = []
+
+    def fit(self, X: np.ndarray):
+        quantiles = np.linspace(0, 1, self.n_bins + 1)[1:-1]
+        self.cuts = [np.unique(np.quantile(X[:, j], quantiles)) for j in range(X.shape[1])]
+        return self
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        binned = np.empty(X.shape, dtype=np.uint8)
+        for j, cuts in enumerate(self.cuts):
+            binned[:, j] = np.searchsorted(cuts, X[:, j], side="left")
+        return binned
+
+
+class Tree:
+    """Дерево в массивах узлов; лист - feature == -1"""
+
+    __slots__ = ("feature", "threshold", "left", "right", "value", "depth")
+
+    def __init__(self, feature, threshold, left, right, value, depth):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.depth = depth
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Спуск всех объектов сразу, по уровню за шаг"""
+        rows = np.arange(len(X))
+        node = np.zeros(len(X), dtype=np.int32)
+        for _ in range(self.depth):
+            feature = self.feature[node]
+            internal = feature >= 0
+            go_left = X[rows, np.maximum(feature, 0)] <= self.threshold[node]
+            node = np.where(internal, np.where(go_left, self.left[node], self.right[node]), node)
+        return self.value[node]
+
+
+def build_tree(binned: np.ndarray, cuts: List[np.ndarray], n_bins: int, grad: np.ndarray,
+               hess: np.ndarray, max_depth: int = 6, min_samples_leaf: int = 20,
+               l2: float = 1.0, max_features: Optional[int] = None,
+               rng: Optional[np.random.Generator] = None,
+               max_hist_cells: int = 1 << 20) -> Tuple[Tree, np.ndarray]:
+    """Строит дерево по градиентам; возвращает дерево и его прогноз для обучающих объектов
+
+    Рост по уровням: гистограммы всех узлов уровня считаются одним np.bincount
+    (порциями не больше max_hist_cells ячеек), лучшие разбиения ищутся сразу
+    для всех узлов. Ньютоновский шаг в листе: -sum(g) / (sum(h) + l2).
+    С g = -y, h = 1 и l2 = 0 это среднее y, а выигрыш - уменьшение дисперсии
+    (дерево регрессии для случайного леса).
+    """
+    n_samples, n_features = binned.shape
+    rng = rng or np.random.default_rng()
+    cut_matrix = np.full((n_features, n_bins - 1), np.inf)
+    for j, feature_cuts in enumerate(cuts):
+        cut_matrix[j, :len(feature_cuts)] = feature_cuts
+
+    features, thresholds, lefts, rights, values = [], [], [], [], []
+    train_prediction = np.empty(n_samples)
+    slot = np.zeros(n_samples, dtype=np.int64)  # узел текущего уровня; -1 - объект уже в листе
+    base, width, depth = 0, 1, 0
+    while width:
+        active = np.flatnonzero(slot >= 0)
+        node = slot[active]
+        G = np.bincount(node, weights=grad[active], minlength=width)
+        H = np.bincount(node, weights=hess[active], minlength=width)
+        C = np.bincount(node, minlength=width)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = np.where(H + l2 > 0, -G / (H + l2), 0.0)
+
+        split_feature = np.full(width, -1, dtype=np.int64)
+        split_bin = np.zeros(width, dtype=np.int64)
+        if depth < max_depth:
+            candidates = np.flatnonzero(C >= 2 * min_samples_leaf)
+            step = max(1, max_hist_cells // (n_features * n_bins))
+            for lo in range(0, len(candidates), step):
+                chunk = candidates[lo:lo + step]
+                j, b = _best_splits(binned, active, node, chunk, G, H, C, grad, hess, n_bins,
+                                    l2, min_samples_leaf, max_features, rng)
+                split_feature[chunk], split_bin[chunk] = j, b
+
+        is_split = split_feature >= 0
+        rank = np.cumsum(is_split) - 1
+        left = np.where(is_split, base + width + 2 * rank, -1)
+        features.append(split_feature)
+        thresholds.append(np.where(is_split, cut_matrix[np.maximum(split_feature, 0), split_bin], 0.0))
+        lefts.append(left)
+        rights.append(np.where(is_split, left + 1, -1))
+        values.append(value)
+
+        # Объекты неразбитых узлов получают значение листа, остальные спускаются на уровень
+        moving = is_split[node]
+        finished = active[~moving]
+        train_prediction[finished] = value[node[~moving]]
+        slot[finished] = -1
+        rows, row_node = active[moving], node[moving]
+        goes_right = binned[rows, split_feature[row_node]] > split_bin[row_node]
+        slot[rows] = 2 * rank[row_node] + goes_right
+
+        base += width
+        width = 2 * int(is_split.sum())
+        depth += 1
+
+    tree = Tree(np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts),
+                np.concatenate(rights), np.concatenate(values), depth - 1)
+    return tree, train_prediction
+
+
+def _best_splits(binned, active, node, chunk, G, H, C, grad, hess, n_bins, l2,
+                 min_samples_leaf, max_features, rng):
+    """Лучшие (признак, бин) для узлов chunk; признак -1 - узел не разбивается"""
+    n_features = binned.shape[1]
+    position = np.full(len(G), -1, dtype=np.int64)
+    position[chunk] = np.arange(len(chunk))
+    in_chunk = position[node] >= 0
+    rows, row_position = active[in_chunk], position[node[in_chunk]]
+
+    cells = n_features * n_bins
+    codes = (row_position[:, None] * cells + np.arange(n_features) * n_bins + binned[rows]).ravel()
+    size = len(chunk) * cells
+    shape = (len(chunk), n_features, n_bins)
+    hist = np.stack([
+        np.bincount(codes, weights=np.repeat(grad[rows], n_features), minlength=size).reshape(shape),
+        np.bincount(codes, weights=np.repeat(hess[rows], n_features), minlength=size).reshape(shape),
+        np.bincount(codes, minlength=size).reshape(shape),
+    ])
+    selected = None
+    if max_features is not None and max_features < n_features:
+        # Случайное подмножество признаков на каждый узел (случайный лес): выигрыш считается только по нему
+        selected = np.argsort(rng.random((len(chunk), n_features)), axis=1)[:, :max_features]
+        hist = hist[:, np.arange(len(chunk))[:, None], selected]
+    GL, HL, CL = np.cumsum(hist[:, :, :, :-1], axis=3)
+
+    Gt, Ht, Ct = G[chunk][:, None, None], H[chunk][:, None, None], C[chunk][:, None, None]
+    GR, HR, CR = Gt - GL, Ht - HL, Ct - CL
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gain = GL ** 2 / (HL + l2) + GR ** 2 / (HR + l2) - Gt ** 2 / (Ht + l2)
+    gain[(CL < min_samples_leaf) | (CR < min_samples_leaf) | ~np.isfinite(gain)] = -np.inf
+
+    flat = gain.reshape(len(chunk), -1)
+    best = np.argmax(flat, axis=1)
+    best_gain = flat[np.arange(len(chunk)), best]
+    j, b = np.divmod(best, n_bins - 1)
+    if selected is not None:
+        j = selected[np.arange(len(chunk)), j]
+    return np.where(best_gain > 1e-12, j, -1), b
+
+
+# ============ МОДЕЛИ ============
+
+class LogisticRegression:
+    """Логистическая регрессия: полный градиентный спуск с L2"""
+
+    def __init__(self, learning_rate: float = 0.5, max_iter: int = 200, l2: float = 1e-4):
+        self.learning_rate = learning_rate
+        self.max_iter = max_iter
+        self.l2 = l2
+        self.history: Dict[str, List[float]] = {"train_loss": []}
+
+    def fit(self, X, y, cancelled: Callable[[], bool] = _never_cancelled):
+        self._scaler = _Standardizer().fit(X)
+        X = self._scaler.transform(X)
+        self.weights = np.zeros(X.shape[1])
+        self.bias = 0.0
+        for _ in range(self.max_iter):
+            if cancelled():
+                raise TrainingCancelled()
+            proba = _sigmoid(X @ self.weights + self.bias)
+            error = proba - y
+            self.weights -= self.learning_rate * (X.T @ error / len(y) + self.l2 * self.weights)
+            self.bias -= self.learning_rate * error.mean()
+            self.history["train_loss"].append(_log_loss(y, proba))
+        return self
+
+    def predict_proba(self, X) -> np.ndarray:
+        return _sigmoid(self._scaler.transform(X) @ self.weights + self.bias)
+
+
+class GradientBoostingClassifier:
+    """Градиентный бустинг на гистограммах (логистическая функция потерь)"""
+
+    def __init__(self, n_estimators: int = 100, learning_rate: float = 0.1, max_depth: int = 6,
+                 min_samples_leaf: int = 20, l2: float = 1.0, n_bins: int = 64, seed: int = 0):
+        self.n_estimators = n_estimators
+        self.learning_rate = learning_rate
+        self.max_depth = max_depth
+        self.min_samples_leaf = min_samples_leaf
+        self.l2 = l2
+        self.n_bins = n_bins
+        self.seed = seed
+        self.trees: List[Tree] = []
+        self.history: Dict[str, List[float]] = {"train_loss": []}
+
+    def fit(self, X, y, cancelled: Callable[[], bool] = _never_cancelled):
+        binner = FeatureBinner(self.n_bins).fit(X)
+        binned = binner.transform(X)
+        rate = np.clip(y.mean(), 1e-6, 1 - 1e-6)
+        self.base_score = float(np.log(rate / (1 - rate)))
+        raw = np.full(len(y), self.base_score)
+        rng = np.random.default_rng(self.seed)
+        for _ in range(self.n_estimators):
+            if cancelled():
+                raise TrainingCancelled()
+            proba = _sigmoid(raw)
+            tree, update = build_tree(binned, binner.cuts, self.n_bins, proba - y, proba * (1 - proba),
+                                      self.max_depth, self.min_samples_leaf, self.l2, rng=rng)
+            tree.value *= self.learning_rate
+            raw += self.learning_rate * update
+            self.trees.append(tree)
+            self.history["train_loss"].append(_log_loss(y, _sigmoid(raw)))
+        return self
+
+    def decision_function(self, X) -> np.ndarray:
+        raw = np.full(len(X), self.base_score)
+        for tree in self.trees:
+            raw += tree.predict(X)
+        return raw
+
+    def predict_proba(self, X) -> np.ndarray:
+        return _sigmoid(self.decision_function(X))
+
+
+class RandomForestClassifier:
+    """Случайный лес: бутстрэп, случайные признаки в узлах, деревья строятся параллельно"""
+
+    def __init__(self, n_estimators: int = 100, max_depth: int = 12, min_samples_leaf: int = 5,
+                 max_features: Optional[int] = None, n_bins: int = 64, n_jobs: int = 1, seed: int = 0):
+        self.n_estimators = n_estimators
+        self.max_depth = max_depth
+        self.min_samples_leaf = min_samples_leaf
+        self.max_features = max_features
+        self.n_bins = n_bins
+        self.n_jobs = max(1, n_jobs)
+        self.seed = seed
+        self.trees: List[Tree] = []
+        self.history: Dict[str, List[float]] = {}
+
+    def fit(self, X, y, cancelled: Callable[[], bool] = _never_cancelled):
+        binner = FeatureBinner(self.n_bins).fit(X)
+        binned = binner.transform(X)
+        max_features = self.max_features or max(1, int(np.sqrt(X.shape[1])))
+        seeds = np.random.SeedSequence(self.seed).spawn(self.n_estimators)
+        grow = partial(_grow_trees, binned, y, binner.cuts, self.n_bins,
+                       self.max_depth, self.min_samples_leaf, max_features)
+        # Порции по несколько деревьев: между ними проверяется отмена
+        batches = [list(batch) for batch in np.array_split(seeds, min(len(seeds), self.n_jobs * 4)) if len(batch)]
+
+        self.trees = []
+        if self.n_jobs == 1:
+            for batch in batches:
+                if cancelled():
+                    raise TrainingCancelled()
+                self.trees.extend(grow(batch))
+            return self
+
+        # Потоки по числу выделенных ядер: гистограммы и поиск разбиений - NumPy без GIL,
+        # бинаризованная матрица общая (процессам ее пришлось бы копировать на каждую порцию)
+        with ThreadPoolExecutor(max_workers=self.n_jobs, thread_name_prefix="forest") as executor:
+            futures = [executor.submit(grow, batch) for batch in batches]
+            for future in futures:
+                if cancelled():
+                    for pending in futures:
+                        pending.cancel()
+                    raise TrainingCancelled()
+                self.trees.extend(future.result())
+        return self
+
+    def predict_proba(self, X) -> np.ndarray:
+        return np.mean([tree.predict(X) for tree in self.trees], axis=0)
+
+
+def _grow_trees(binned, y, cuts, n_bins, max_depth, min_samples_leaf, max_features, seeds) -> List[Tree]:
+    """Строит деревья леса по бутстрэп-выборкам (выполняется и в потоках пула)"""
+    trees = []
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        sample = rng.integers(0, len(y), len(y))
+        tree, _ = build_tree(binned[sample], cuts, n_bins, -y[sample], np.ones(len(y)),
+                             max_depth, min_samples_leaf, 0.0, max_features, rng)
+        trees.append(tree)
+    return trees
+
+
+class MLPClassifier:
+    """Сеть с одним скрытым слоем (tanh), мини-батчи и Adam"""
+
+    def __init__(self, hidden: int = 32, epochs: int = 30, batch_size: int = 128,
+                 learning_rate: float = 0.01, seed: int = 0):
+        self.hidden = hidden
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.learning_rate = learning_rate
+        self.seed = seed
+        self.history: Dict[str, List[float]] = {"train_loss": []}
+
+    def fit(self, X, y, cancelled: Callable[[], bool] = _never_cancelled):
+        self._scaler = _Standardizer().fit(X)
+        X = self._scaler.transform(X)
+        rng = np.random.default_rng(self.seed)
+        self.params = [rng.normal(scale=1 / np.sqrt(X.shape[1]), size=(X.shape[1], self.hidden)),
+                       np.zeros(self.hidden),
+                       rng.normal(scale=1 / np.sqrt(self.hidden), size=self.hidden),
+                       np.zeros(1)]
+        moments = [np.zeros_like(p) for p in self.params]
+        velocities = [np.zeros_like(p) for p in self.params]
+        step = 0
+        for _ in range(self.epochs):
+            if cancelled():
+                raise TrainingCancelled()
+            order = rng.permutation(len(y))
+            for start in range(0, len(y), self.batch_size):
+                batch = order[start:start + self.batch_size]
+                step += 1
+                for i, grad in enumerate(self._gradients(X[batch], y[batch])):
+                    moments[i] = 0.9 * moments[i] + 0.1 * grad
+                    velocities[i] = 0.999 * velocities[i] + 0.001 * grad ** 2
+                    m_hat = moments[i] / (1 - 0.9 ** step)
+                    v_hat = velocities[i] / (1 - 0.999 ** step)
+                    self.params[i] -= self.learning_rate * m_hat / (np.sqrt(v_hat) + 1e-8)
+            self.history["train_loss"].append(_log_loss(y, self._forward(X)[1]))
+        return self
+
+    def _forward(self, X):
+        W1, b1, w2, b2 = self.params
+        hidden = np.tanh(X @ W1 + b1)
+        return hidden, _sigmoid(hidden @ w2 + b2[0])
+
+    def _gradients(self, X, y):
+        W1, b1, w2, b2 = self.params
+        hidden, proba = self._forward(X)
+        error = (proba - y) / len(y)
+        hidden_error = np.outer(error, w2) * (1 - hidden ** 2)
+        return [X.T @ hidden_error, hidden_error.sum(axis=0), hidden.T @ error, np.array([error.sum()])]
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self._forward(self._scaler.transform(X))[1]
+
+
+# ============ ЗАПУСК ============
+
+# Алгоритмы форм создания эксперимента: бустинги - одна реализация на гистограммах
+MODEL_CLASSES = {
+    "Logistic Regression": LogisticRegression,
+    "XGBoost": GradientBoostingClassifier,
+    "LightGBM": GradientBoostingClassifier,
+    "CatBoost": GradientBoostingClassifier,
+    "Gradient Boosting": GradientBoostingClassifier,
+    "Random Forest": RandomForestClassifier,
+    "Neural Network": MLPClassifier,
+}
+
+# Служебные ключи гиперпараметров, которые не передаются в модель
+_RESERVED_PARAMS = {"cpus", "memory_mb", "priority", "n_samples", "n_features", "test_size",
+                    "features", "target", "rows"}
+
+
+def classification_metrics(y: np.ndarray, proba: np.ndarray) -> Dict[str, float]:
+    predicted = proba >= 0.5
+    actual = y >= 0.5
+    tp = float(np.sum(predicted & actual))
+    fp = float(np.sum(predicted & ~actual))
+    fn = float(np.sum(~predicted & actual))
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    return {
+        "accuracy": round(float(np.mean(predicted == actual)), 4),
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        "f1_score": round(2 * precision * recall / (precision + recall) if precision + recall else 0.0, 4),
+        "loss": round(_log_loss(y, proba), 4),
+    }
+
+
+def create_model(algorithm: str, hyperparameters: Optional[Dict[str, Any]] = None, n_jobs: int = 1):
+    """Модель алгоритма; гиперпараметры, которых у алгоритма нет, пропускаются
+
+    Одни и те же гиперпараметры (шаблон формы, подбор) подходят к разным
+    алгоритмам: learning_rate без n_estimators - уже не ошибка.
+    """
+    if algorithm not in MODEL_CLASSES:
+        raise ValueError(f"Неизвестный алгоритм: {algorithm}. Доступны: {', '.join(MODEL_CLASSES)}")
+    model_class = MODEL_CLASSES[algorithm]
+    accepted = set(inspect.signature(model_class).parameters) - {"n_jobs"}
+    params = {k: v for k, v in (hyperparameters or {}).items() if k not in _RESERVED_PARAMS}
+    ignored = sorted(set(params) - accepted)
+    if ignored:
+        print(f"⚠️ {algorithm} не использует гиперпараметры: {', '.join(ignored)}")
+    params = {k: v for k, v in params.items() if k in accepted}
+    if model_class is RandomForestClassifier:
+        params["n_jobs"] = n_jobs
+    try:
+        return model_class(**params)
+    except TypeError as e:
+        raise ValueError(f"Некорректные гиперпараметры для {algorithm}: {e}")
+
+
+def dataset_args(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Аргументы load_dataset из спецификации эксперимента
+
+    Загруженный на платформу датасет приходит путем к файлу в хранилище.
+    """
+    hyperparameters = spec.get("hyperparameters") or {}
+    return {
+        "name": spec.get("dataset_path") or spec["dataset"],
+        "n_samples": int(hyperparameters.get("n_samples", DEFAULT_SAMPLES)),
+        "n_features": int(hyperparameters.get("n_features", DEFAULT_FEATURES)),
+        "data_dir": spec.get("data_dir"),
+        "features": hyperparameters.get("features"),
+        "target": hyperparameters.get("target"),
+        "rows": hyperparameters.get("rows"),
+    }
+
+
+def train(spec: Dict[str, Any], cancelled: Callable[[], bool] = _never_cancelled) -> Dict[str, Any]:
+    """Обучает модель по спецификации эксперимента
+
+    Возвращает {"metrics": итоговые метрики на отложенной выборке,
+    "history": {имя: значения по итерациям}, "artifact": sha256 модели,
+    "timings": {этап: секунды}}.
+    Модель сохраняется в хранилище артефактов, если в спецификации есть artifact_dir.
+    """
+    hyperparameters = spec.get("hyperparameters") or {}
+    n_jobs = (spec.get("resources") or {}).get("cpus", 1)
+    started = time.perf_counter()
+    X, y = load_dataset(**dataset_args(spec), shared_path=spec.get("dataset_cache"))
+    X_train, X_test, y_train, y_test = train_test_split(X, y, float(hyperparameters.get("test_size", 0.2)))
+    load_time = time.perf_counter() - started
+
+    model = create_model(spec["algorithm"], hyperparameters, n_jobs)
+    started = time.perf_counter()
+    model.fit(X_train, y_train, cancelled)
+    training_time = time.perf_counter() - started
+    model.n_features = X.shape[1]  # ширина строки для проверки запросов на предсказание
+
+    metrics = classification_metrics(y_test, model.predict_proba(X_test))
+    metrics["training_time"] = round(training_time, 3)
+    outcome = {"metrics": metrics, "history": model.history,
+               "timings": {"load": load_time, "fit": training_time}}
+    if spec.get("artifact_dir"):
+        started = time.perf_counter()
+        # Профиль обучающей выборки - база для мониторинга дрейфа развернутой модели
+        model.drift_baseline = DataProfile.fit(X_train, model.predict_proba(X_train))
+        outcome["artifact"] = save_model(model, ArtifactStore(spec["artifact_dir"])).sha256
+        outcome["timings"]["save"] = time.perf_counter() - started
+    return outcome
@@ -0,0 +1,191 @@
+"""
+Хранилище артефактов, адресуемое по содержимому
+
+Артефакт (веса модели, отчет, любой файл) хранится один раз под sha256
+исходных байт: objects/<sha[:2]>/<sha>[.gz|.bz2|.xz] и рядом <sha>.json
+с размером и кодеком. Запись идет потоком во временный файл того же
+каталога и публикуется os.replace: сначала объект, затем meta - объект
+без meta считается незаписанным. Одинаковое содержимое с любым кодеком
+дает тот же адрес, повторная запись только удаляет временный файл.
+"""
+import bz2
+import gzip
+import hashlib
+import json
+import lzma
+import os
+import time
+import uuid
+import zlib
+from typing import Any, Dict, Iterator, NamedTuple, Optional
+
+READ_BLOCK = 256 * 1024
+
+# Кодеки stdlib: суффикс файла, потоковый компрессор, открытие на чтение
+CODECS = {
+    "gzip": (".gz", lambda: zlib.compressobj(6, zlib.DEFLATED, 31), lambda path: gzip.open(path, "rb")),
+    "bz2": (".bz2", lambda: bz2.BZ2Compressor(9), lambda path: bz2.open(path, "rb")),
+    "xz": (".xz", lambda: lzma.LZMACompressor(), lambda path: lzma.open(path, "rb")),
+}
+
+
+class ArtifactInfo(NamedTuple):
+    sha256: str
+    size: int                   # байт исходного содержимого
+    compression: Optional[str]
+    stored_size: int            # байт на диске
+    deduplicated: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+
+class ArtifactWriter:
+    """Потоковая запись артефакта: sha256 и сжатие считаются по мере поступления"""
+
+    def __init__(self, store: "ArtifactStore", compression: Optional[str] = None):
+        if compression is not None and compression not in CODECS:
+            raise ValueError(f"Неизвестный кодек: {compression}. Доступны: {', '.join(CODECS)}")
+        self.store = store
+        self.compression = compression
+        self._hasher = hashlib.sha256()
+        self._compressor = CODECS[compression][1]() if compression else None
+        self._tmp_path = os.path.join(store.objects_dir, f".{uuid.uuid4().hex}.tmp")
+        self._file = open(self._tmp_path, "wb")
+        self.size = 0
+
+    def write(self, data: bytes):
+        self._hasher.update(data)
+        self.size += len(data)
+        self._file.write(self._compressor.compress(data) if self._compressor else data)
+
+    def commit(self) -> ArtifactInfo:
+        """Публикует объект; если такой уже есть - только удаляет временный файл"""
+        try:
+            if self._compressor:
+                self._file.write(self._compressor.flush())
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            sha256 = self._hasher.hexdigest()
+            existing = self.store.info(sha256)
+            if existing is not None:
+                return existing._replace(deduplicated=True)
+            path = self.store._object_path(sha256, self.compression)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self._tmp_path, path)
+            info = ArtifactInfo(sha256, self.size, self.compression, os.path.getsize(path))
+            self.store._write_meta(info)
+            return info
+        finally:
+            self.abort()
+
+    def abort(self):
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+class ArtifactStore:
+    """Артефакты по sha256: дедупликация, сжатие stdlib, атомарная запись, чтение диапазонов"""
+
+    def __init__(self, root: str, compression: Optional[str] = None):
+        self.root = root
+        self.compression = compression  # кодек по умолчанию для put
+        self.objects_dir = os.path.join(root, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    def _object_path(self, sha256: str, compression: Optional[str]) -> str:
+        suffix = CODECS[compression][0] if compression else ""
+        return os.path.join(self.objects_dir, sha256[:2], sha256 + suffix)
+
+    def _meta_path(self, sha256: str) -> str:
+        return os.path.join(self.objects_dir, sha256[:2], sha256 + ".json")
+
+    def _write_meta(self, info: ArtifactInfo):
+        path = self._meta_path(info.sha256)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"size": info.size, "compression": info.compression,
+                       "stored_size": info.stored_size, "created_at": time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    # ============ ЗАПИСЬ ============
+
+    def writer(self, compression: Optional[str] = "default") -> ArtifactWriter:
+        return ArtifactWriter(self, self.compression if compression == "default" else compression)
+
+    def put_bytes(self, data: bytes, compression: Optional[str] = "default") -> ArtifactInfo:
+        writer = self.writer(compression)
+        writer.write(data)
+        return writer.commit()
+
+    def put_file(self, path: str, compression: Optional[str] = "default") -> ArtifactInfo:
+        writer = self.writer(compression)
+        try:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(READ_BLOCK), b""):
+                    writer.write(block)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit()
+
+    # ============ ЧТЕНИЕ ============
+
+    def info(self, sha256: str) -> Optional[ArtifactInfo]:
+        if len(sha256) != 64 or not all(c in "0123456789abcdef" for c in sha256):
+            return None
+        try:
+            with open(self._meta_path(sha256), encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        return ArtifactInfo(sha256, meta["size"], meta["compression"], meta["stored_size"])
+
+    def path(self, info: ArtifactInfo) -> str:
+        """Файл объекта на диске (для несжатого - ровно исходные байты)"""
+        return self._object_path(info.sha256, info.compression)
+
+    def iter_range(self, info: ArtifactInfo, start: int = 0, end: Optional[int] = None,
+                   block: int = READ_BLOCK) -> Iterator[bytes]:
+        """Байты [start, end] исходного содержимого блоками
+
+        Несжатый объект читается pread с нужного смещения; сжатый
+        распаковывается потоком, начало диапазона пропускается.
+        """
+        end = info.size - 1 if end is None else min(end, info.size - 1)
+        remaining = end - start + 1
+        if info.compression is None:
+            fd = os.open(self.path(info), os.O_RDONLY)
+            try:
+                offset = start
+                while remaining > 0:
+                    data = os.pread(fd, min(block, remaining), offset)
+                    if not data:
+                        break
+                    offset += len(data)
+                    remaining -= len(data)
+                    yield data
+            finally:
+                os.close(fd)
+            return
+        with CODECS[info.compression][2](self.path(info)) as f:
+            skip = start
+            while skip > 0:
+                skip -= len(f.read(min(block, skip)))
+            while remaining > 0:
+                data = f.read(min(block, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+
+    def read_bytes(self, sha256: str) -> bytes:
+        info = self.info(sha256)
+        if info is None:
+            raise KeyError(f"Артефакт {sha256} не найден")
+        return b"".join(self.iter_range(info))
@@ -0,0 +1,223 @@
+"""
+Журнал изменений (write-ahead log) для хранилища ML платформы.
+
+Каждая мутация записывается в журнал одной JSON-строкой, поэтому стоимость
+записи не зависит от размера хранилища. fsync выполняется группами фоновым
+потоком, компакция журнала в снапшот тоже идет в фоне.
+
+Файлы в каталоге данных:
+    <name>.json            - снапшот состояния (с номером последней записи)
+    <name>.log             - активный сегмент журнала
+    <name>.log.compacting  - сегмент, который сейчас сворачивается в снапшот
+"""
+import json
+import os
+import threading
+from typing import Any, Dict, Iterator, Optional
+
+State = Dict[str, Dict[str, Dict[str, Any]]]
+
+
+def apply_record(state: State, record: Dict[str, Any]) -> None:
+    """Применяет одну запись журнала к состоянию {kind: {id: data}}"""
+    entities = state.setdefault(record["kind"], {})
+    if record["op"] == "delete":
+        entities.pop(record["id"], None)
+    else:
+        entities[record["id"]] = record["data"]
+
+
+class ChangeLog:
+    """Append-only журнал с групповым fsync, фоновой компакцией и воспроизведением"""
+
+    def __init__(self, directory: str, name: str = "database",
+                 commit_interval: float = 0.05, compact_threshold: int = 10000):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, f"{name}.json")
+        self.log_path = os.path.join(directory, f"{name}.log")
+        self.compacting_path = self.log_path + ".compacting"
+        self.commit_interval = commit_interval
+        self.compact_threshold = compact_threshold
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._file = None
+        self._lsn = 0              # номер последней записанной записи
+        self._durable_lsn = 0      # номер последней записи, прошедшей fsync
+        self._segment_records = 0  # записей в активном сегменте
+        self._snapshot_records = 0  # сущностей в последнем снапшоте
+        self._committer = None
+        self._compactor = None
+        self._closed = False
+        self._valid_log_size = None  # длина журнала без оборванного хвоста
+
+    # ============ ВОССТАНОВЛЕНИЕ ============
+
+    def replay(self) -> State:
+        """Восстанавливает состояние: снапшот плюс хвост журнала"""
+        state: State = {}
+        snapshot_lsn = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            # Старый формат (полный дамп без номера записи) не восстанавливаем
+            if "entities" in snapshot:
+                state = snapshot["entities"]
+                snapshot_lsn = snapshot.get("lsn", 0)
+                self._snapshot_records = sum(len(entities) for entities in state.values())
+
+        last_lsn = snapshot_lsn
+        for path in (self.compacting_path, self.log_path):
+            for record in self._read_segment(path):
+                if record["lsn"] > snapshot_lsn:
+                    apply_record(state, record)
+                last_lsn = max(last_lsn, record["lsn"])
+
+        self._lsn = self._durable_lsn = last_lsn
+        return state
+
+    def _read_segment(self, path: str) -> Iterator[Dict[str, Any]]:
+        if not os.path.exists(path):
+            return
+        valid_size = records = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    # Оборванная последняя строка после сбоя - отбрасываем хвост
+                    break
+                valid_size += len(line)
+                records += 1
+                yield record
+        if path == self.log_path:
+            self._valid_log_size = valid_size
+            self._segment_records = records
+
+    # ============ ЗАПИСЬ ============
+
+    def open(self):
+        """Открывает журнал на дозапись и запускает поток группового fsync"""
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(self.compacting_path):
+            # Компакция была прервана - доводим ее до конца
+            self._start_compaction()
+        if self._valid_log_size is not None and os.path.getsize(self.log_path) > self._valid_log_size:
+            with open(self.log_path, "r+b") as f:
+                f.truncate(self._valid_log_size)
+        self._file = open(self.log_path, "a", encoding="utf-8")
+        self._committer = threading.Thread(target=self._commit_loop, name="changelog-commit", daemon=True)
+        self._committer.start()
+        return self
+
+    def append(self, kind: str, entity_id: str, data: Optional[Dict[str, Any]] = None,
+               op: str = "put") -> int:
+        """Дописывает изменение одной сущности в журнал, возвращает номер записи"""
+        with self._cond:
+            self._lsn += 1
+            record = {"lsn": self._lsn, "op": op, "kind": kind, "id": entity_id}
+            if data is not None:
+                record["data"] = data
+            self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            self._segment_records += 1
+            lsn = self._lsn
+            self._cond.notify_all()
+
+            # Порог растет вместе со снапшотом, чтобы стоимость компакции амортизировалась
+            threshold = max(self.compact_threshold, self._snapshot_records)
+            if self._segment_records >= threshold and self._compactor is None:
+                self._rotate()
+                self._start_compaction()
+        return lsn
+
+    def wait_durable(self, lsn: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """Ждет, пока запись с номером lsn (по умолчанию последняя) попадет на диск"""
+        with self._cond:
+            target = self._lsn if lsn is None else lsn
+            return self._cond.wait_for(lambda: self._durable_lsn >= target or self._closed, timeout)
+
+    def _commit_loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._lsn > self._durable_lsn or self._closed)
+                if self._closed:
+                    return
+            # Даем накопиться группе записей, затем один fsync на всю группу
+            self._cond_sleep(self.commit_interval)
+            with self._cond:
+                if self._closed:
+                    return
+                self._file.flush()
+                # Дубликат дескриптора переживет ротацию сегмента во время fsync
+                fd = os.dup(self._file.fileno())
+                lsn = self._lsn
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            with self._cond:
+                self._durable_lsn = max(self._durable_lsn, lsn)
+                self._cond.notify_all()
+
+    def _cond_sleep(self, seconds: float):
+        with self._cond:
+            self._cond.wait_for(lambda: self._closed, seconds)
+
+    def close(self):
+        """Сбрасывает журнал на диск и останавливает фоновые потоки"""
+        with self._cond:
+            if self._closed or self._file is None:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._durable_lsn = self._lsn
+            self._closed = True
+            self._file.close()
+            self._cond.notify_all()
+            compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    # ============ КОМПАКЦИЯ ============
+
+    def _rotate(self):
+        """Запечатывает активный сегмент (вызывается под блокировкой)"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._durable_lsn = self._lsn
+        self._file.close()
+        os.replace(self.log_path, self.compacting_path)
+        self._file = open(self.log_path, "a", encoding="utf-8")
+        self._segment_records = 0
+
+    def _start_compaction(self):
+        self._compactor = threading.Thread(target=self._compact, name="changelog-compact", daemon=True)
+        self._compactor.start()
+
+    def _compact(self):
+        """Сворачивает запечатанный сегмент в новый снапшот, не трогая живые объекты"""
+        state: State = {}
+        lsn = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            if "entities" in snapshot:
+                state = snapshot["entities"]
+                lsn = snapshot.get("lsn", 0)
+
+        for record in self._read_segment(self.compacting_path):
+            if record["lsn"] > lsn:
+                apply_record(state, record)
+                lsn = record["lsn"]
+
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"lsn": lsn, "entities": state}, f, ensure_ascii=False, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        os.remove(self.compacting_path)
+
+        with self._cond:
+            self._snapshot_records = sum(len(entities) for entities in state.values())
+            self._compactor = None
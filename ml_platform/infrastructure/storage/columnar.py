@@ -0,0 +1,193 @@
+"""
+Колоночный формат датасетов на диске
+
+Каталог датасета:
+    meta.json     - схема, число строк, статистика min/max по столбцам и группам строк
+    NNNN.bin      - значения столбца подряд, little-endian, без заголовка
+
+Столбец читается через np.memmap: в память попадают только нужные столбцы
+и нужный диапазон строк, без копирования. Строковые столбцы хранятся
+кодами int32, словарь значений - в meta.json. Группы строк с min/max
+позволяют не трогать диапазоны, заведомо не подходящие под фильтр.
+"""
+import json
+import math
+import os
+import shutil
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+ROW_GROUP_SIZE = 65536
+
+# Типы столбцов и их представление на диске
+COLUMN_DTYPES = {
+    "float64": np.dtype("<f8"),
+    "int64": np.dtype("<i8"),
+    "category": np.dtype("<i4"),
+}
+
+
+def _stat(value) -> Optional[float]:
+    # В JSON нет NaN: пустой столбец или группа без значений - None
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+class ColumnarWriter:
+    """Пишет датасет группами строк; каталог появляется целиком при close()"""
+
+    def __init__(self, path: str, schema: Sequence[Tuple[str, str]]):
+        for name, kind in schema:
+            if kind not in COLUMN_DTYPES:
+                raise ValueError(f"Столбец {name}: неизвестный тип {kind}")
+        self.path = path
+        self.schema = list(schema)
+        self._tmp_path = path + ".tmp"
+        shutil.rmtree(self._tmp_path, ignore_errors=True)
+        os.makedirs(self._tmp_path)
+        self._files = [open(os.path.join(self._tmp_path, f"{i:04d}.bin"), "wb")
+                       for i in range(len(self.schema))]
+        self._categories: List[Dict[str, int]] = [{} for _ in self.schema]
+        self._row_groups: List[Dict[str, Any]] = []
+        self.n_rows = 0
+
+    def write(self, columns: Sequence):
+        """Дописывает группу строк: по массиву на столбец в порядке схемы
+
+        Строковый столбец - массив строк или уже закодированная пара
+        (уникальные значения, коды в них).
+        """
+        if len(columns) != len(self.schema):
+            raise ValueError(f"Ожидалось {len(self.schema)} столбцов, получено {len(columns)}")
+        lengths = [len(column[1]) if isinstance(column, tuple) else len(column) for column in columns]
+        n = lengths[0] if lengths else 0
+        if any(length != n for length in lengths):
+            raise ValueError("Столбцы группы строк разной длины")
+        if not n:
+            return
+        mins, maxs = [], []
+        for i, ((name, kind), values) in enumerate(zip(self.schema, columns)):
+            if kind == "category":
+                values = self._encode(i, values)
+                mins.append(None)
+                maxs.append(None)
+            else:
+                values = np.asarray(values, dtype=COLUMN_DTYPES[kind])
+                if kind == "float64" and np.isnan(values).all():
+                    mins.append(None)
+                    maxs.append(None)
+                else:
+                    mins.append(_stat(np.nanmin(values)))
+                    maxs.append(_stat(np.nanmax(values)))
+            values.astype(COLUMN_DTYPES[kind], copy=False).tofile(self._files[i])
+        self._row_groups.append({"start": self.n_rows, "stop": self.n_rows + n, "min": mins, "max": maxs})
+        self.n_rows += n
+
+    def _encode(self, index: int, values) -> np.ndarray:
+        """Коды строковых значений; новые значения пополняют словарь столбца"""
+        mapping = self._categories[index]
+        if isinstance(values, tuple):
+            uniques, inverse = values
+        else:
+            uniques, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+        codes = np.empty(len(uniques), dtype=COLUMN_DTYPES["category"])
+        for j, value in enumerate(uniques.tolist()):
+            code = mapping.get(value)
+            if code is None:
+                code = mapping[value] = len(mapping)
+            codes[j] = code
+        return codes[inverse]
+
+    def close(self, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Дописывает meta.json и атомарно публикует каталог"""
+        for f in self._files:
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+        columns = []
+        for i, (name, kind) in enumerate(self.schema):
+            mins = [group["min"][i] for group in self._row_groups if group["min"][i] is not None]
+            maxs = [group["max"][i] for group in self._row_groups if group["max"][i] is not None]
+            column = {"name": name, "type": kind, "file": f"{i:04d}.bin",
+                      "min": min(mins) if mins else None, "max": max(maxs) if maxs else None}
+            if kind == "category":
+                column["categories"] = list(self._categories[i])
+            columns.append(column)
+        meta = {"version": FORMAT_VERSION, "n_rows": self.n_rows, "columns": columns,
+                "row_groups": self._row_groups, **(extra or {})}
+        with open(os.path.join(self._tmp_path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.replace(self._tmp_path, self.path)
+        return meta
+
+    def abort(self):
+        for f in self._files:
+            f.close()
+        shutil.rmtree(self._tmp_path, ignore_errors=True)
+
+
+class ColumnarDataset:
+    """Чтение колоночного датасета: проекция столбцов и строк без копирования"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.n_rows = self.meta["n_rows"]
+        self._columns = {column["name"]: column for column in self.meta["columns"]}
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.isfile(os.path.join(path, META_FILE))
+
+    @property
+    def columns(self) -> List[str]:
+        return [column["name"] for column in self.meta["columns"]]
+
+    def stats(self, name: str) -> Dict[str, Any]:
+        column = self._info(name)
+        return {"type": column["type"], "min": column["min"], "max": column["max"]}
+
+    def categories(self, name: str) -> Optional[List[str]]:
+        return self._info(name).get("categories")
+
+    def _info(self, name: str) -> Dict[str, Any]:
+        try:
+            return self._columns[name]
+        except KeyError:
+            raise KeyError(f"В датасете нет столбца {name}")
+
+    def column(self, name: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Строки [start, stop) столбца - read-only memmap (в память читается только диапазон)"""
+        column = self._info(name)
+        start, stop, _ = slice(start, stop).indices(self.n_rows)
+        dtype = COLUMN_DTYPES[column["type"]]
+        if stop <= start:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(self.path, column["file"]), dtype=dtype, mode="r",
+                         offset=start * dtype.itemsize, shape=(stop - start,))
+
+    def read(self, columns: Optional[Iterable[str]] = None, start: int = 0,
+             stop: Optional[int] = None) -> Dict[str, np.ndarray]:
+        return {name: self.column(name, start, stop) for name in (columns or self.columns)}
+
+    def row_ranges(self, name: str, low=None, high=None) -> List[Tuple[int, int]]:
+        """Диапазоны строк, где значения столбца могут попасть в [low, high] (по min/max групп)"""
+        index = self.columns.index(name)
+        ranges = []
+        for group in self.meta["row_groups"]:
+            group_min, group_max = group["min"][index], group["max"][index]
+            if group_min is None:
+                continue
+            if (low is not None and group_max < low) or (high is not None and group_min > high):
+                continue
+            if ranges and ranges[-1][1] == group["start"]:
+                ranges[-1] = (ranges[-1][0], group["stop"])
+            else:
+                ranges.append((group["start"], group["stop"]))
+        return ranges
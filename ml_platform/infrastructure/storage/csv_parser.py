@@ -0,0 +1,248 @@
+"""
+Параллельный разбор CSV в колоночный формат
+
+Файл делится на диапазоны байт по границам строк, диапазоны разбираются
+в пуле процессов. Текст разбирает C-парсер np.loadtxt за один проход сразу
+в структурированный массив с типизированными полями, без объектов строк
+Python. Типы столбцов выводятся по выборке из начала файла; если
+диапазон не укладывается в выведенный тип, столбец расширяется
+(int64 -> float64 -> category), а итоговый тип сводится по всем диапазонам.
+
+Воркеры сбрасывают массивы в .npy во временный каталог, родитель дописывает
+их в ColumnarWriter по порядку - через каналы пула идут только метаданные.
+
+Пустые поля числовых столбцов - nan, строковых - пустая строка.
+
+Ограничения: перевод строки внутри значения в кавычках не поддерживается
+(границы диапазонов ищутся по символу перевода строки).
+"""
+import csv
+import io
+import multiprocessing
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ml_platform.infrastructure.storage.columnar import ROW_GROUP_SIZE, ColumnarWriter
+
+CHUNK_BYTES = 32 * 1024 * 1024
+SAMPLE_ROWS = 1000
+# Ширина строкового поля - с запасом к самому длинному значению выборки;
+# значения, упершиеся в ширину, перечитываются без ограничения
+MIN_STR_WIDTH = 16
+# Порядок расширения типа: столбец принимает наибольший тип среди диапазонов
+TYPE_ORDER = ("int64", "float64", "category")
+
+# Пустое поле (между разделителями или у края строки) - пропуск числового значения
+_EMPTY_FIELD = re.compile(r"(?<=,)(?=,|\n|$)|(?<![^\n])(?=,)")
+_INT = re.compile(r"[+-]?\d+")
+
+
+def _widest(kinds) -> str:
+    return max(kinds, key=TYPE_ORDER.index)
+
+
+# ============ ВЫВОД ТИПОВ ============
+
+def _infer_kind(values: List[str]) -> str:
+    present = [value.strip() for value in values if value.strip()]
+    if all(_INT.fullmatch(value) for value in present) and len(present) == len(values):
+        return "int64"  # целые без пропусков (пропуск в int64 не выразить)
+    try:
+        for value in present:
+            float(value)
+        return "float64"
+    except ValueError:
+        return "category"
+
+
+def infer_schema(source: str, sample_rows: int = SAMPLE_ROWS) -> Tuple[List[Tuple[str, str]], List[int], int]:
+    """Схема по заголовку и первым строкам
+
+    Возвращает (схема, ширины строковых полей, смещение начала данных).
+    """
+    with open(source, "rb") as f:
+        header_line = f.readline()
+        data_start = f.tell()
+        sample = [f.readline() for _ in range(sample_rows)]
+    header = next(csv.reader([header_line.decode("utf-8-sig")]), None)
+    if not header:
+        raise ValueError("CSV без заголовка")
+    rows = [row for row in csv.reader(line.decode("utf-8") for line in sample if line.strip()) if row]
+    if any(len(row) != len(header) for row in rows):
+        raise ValueError("Строки CSV с другим числом столбцов, чем в заголовке")
+    columns = list(zip(*rows)) if rows else [() for _ in header]
+    schema = [(name, _infer_kind(list(values)) if values else "float64") for name, values in zip(header, columns)]
+    widths = [max(MIN_STR_WIDTH, 2 * max(map(len, values), default=0)) for values in columns]
+    return schema, widths, data_start
+
+
+def split_ranges(source: str, start: int, chunk_bytes: int = CHUNK_BYTES) -> List[Tuple[int, int]]:
+    """Диапазоны байт [start, stop) примерно по chunk_bytes, каждый - целыми строками"""
+    size = os.path.getsize(source)
+    ranges = []
+    with open(source, "rb") as f:
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            if f.tell() < size:
+                f.readline()  # дочитываем строку, на которую попала граница
+            stop = f.tell()
+            ranges.append((start, stop))
+            start = stop
+    return ranges
+
+
+# ============ СТОРОНА ВОРКЕРА ============
+
+def _read_text(source: str, start: int, stop: int) -> Tuple[str, str]:
+    """Текст диапазона для числовых столбцов (пустые поля - nan) и исходный - для строковых
+
+    Без пустых полей это один и тот же объект строки.
+    """
+    with open(source, "rb") as f:
+        f.seek(start)
+        raw = f.read(stop - start).decode("utf-8")
+    if "\r" in raw:
+        raw = raw.replace("\r\n", "\n")
+    raw = raw.rstrip("\n")
+    text = raw
+    if ",," in raw or ",\n" in raw or "\n," in raw or raw.startswith(",") or raw.endswith(","):
+        text = _EMPTY_FIELD.sub("nan", raw)
+    return text, raw
+
+
+def _load(text: str, columns: List[int], kind: str) -> np.ndarray:
+    return np.loadtxt(io.StringIO(text), delimiter=",", quotechar='"', comments=None,
+                      usecols=columns, ndmin=2, dtype=str if kind == "category" else kind)
+
+
+def _load_table(text: str, kinds: List[str], widths: List[int]) -> np.ndarray:
+    """Все столбцы одним проходом в структурированный массив"""
+    dtype = np.dtype([(f"f{i}", f"U{width}" if kind == "category" else kind)
+                      for i, (kind, width) in enumerate(zip(kinds, widths))])
+    return np.loadtxt(io.StringIO(text), delimiter=",", quotechar='"', comments=None, ndmin=1, dtype=dtype)
+
+
+def _load_column(text: str, column: int, kind: str) -> Tuple[str, np.ndarray]:
+    """Один столбец с расширением типа до первого подходящего"""
+    for candidate in TYPE_ORDER[TYPE_ORDER.index(kind):]:
+        try:
+            return candidate, _load(text, [column], candidate)[:, 0]
+        except ValueError:
+            continue
+    raise ValueError(f"Столбец {column} не разобран")
+
+
+def _parse_range(source: str, start: int, stop: int, kinds: List[str], widths: List[int],
+                 spill_dir: str, index: int) -> Tuple[int, int, List[str]]:
+    """Разбирает диапазон: массивы столбцов - в spill_dir, наружу - число строк и типы"""
+    text, raw = _read_text(source, start, stop)
+    used = list(kinds)
+    if not text:
+        return index, 0, used
+    try:
+        table = _load_table(text, kinds, widths)
+        arrays = [table[f"f{i}"] for i in range(len(kinds))]
+    except ValueError:
+        # Диапазон не укладывается в выведенные типы - разбираем столбцы по одному
+        arrays = []
+        for column, kind in enumerate(kinds):
+            used[column], values = _load_column(text, column, kind)
+            arrays.append(values)
+    for column, values in enumerate(arrays):
+        if used[column] == "category":
+            if raw is not text:
+                values = _load(raw, [column], "category")[:, 0]  # пустые поля остаются пустыми строками
+            elif values.dtype.itemsize // 4 == widths[column] and np.char.str_len(values).max() >= widths[column]:
+                values = _load(text, [column], "category")[:, 0]  # значение могло обрезаться
+            _save_category(spill_dir, index, column, values)
+        else:
+            np.save(_spill_path(spill_dir, index, column), np.ascontiguousarray(values))
+    return index, len(arrays[0]), used
+
+
+def _save_category(spill_dir: str, index: int, column: int, values: np.ndarray):
+    # Кодирование (сортировка строк) - тоже в воркере: родителю остается сопоставить словари
+    uniques, codes = np.unique(values, return_inverse=True)
+    np.save(_spill_path(spill_dir, index, column), codes.astype(np.int32))
+    np.save(_spill_path(spill_dir, index, column, "uniques"), uniques)
+
+
+def _reparse_column(source: str, start: int, stop: int, column: int, spill_dir: str, index: int):
+    """Переразбирает столбец диапазона как строки (итоговый тип - category)"""
+    _, raw = _read_text(source, start, stop)
+    _save_category(spill_dir, index, column, _load(raw, [column], "category")[:, 0])
+
+
+def _spill_path(spill_dir: str, index: int, column: int, part: str = "values") -> str:
+    return os.path.join(spill_dir, f"{index:06d}-{column:04d}-{part}.npy")
+
+
+# ============ РАЗБОР ============
+
+def parse_csv(source: str, destination: str, workers: Optional[int] = None,
+              chunk_bytes: int = CHUNK_BYTES, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Переводит CSV с заголовком в колоночный формат; возвращает meta датасета
+
+    workers=1 - разбор в текущем процессе (однопоточная база для сравнения).
+    """
+    schema, widths, data_start = infer_schema(source)
+    kinds = [kind for _, kind in schema]
+    ranges = split_ranges(source, data_start, chunk_bytes)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(ranges) or 1))
+    spill_dir = destination + ".parts"
+    shutil.rmtree(spill_dir, ignore_errors=True)
+    os.makedirs(spill_dir)
+
+    executor = None
+    try:
+        if workers > 1:
+            # spawn: вызывающий процесс (веб-сервер) многопоточен
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            futures = [executor.submit(_parse_range, source, start, stop, kinds, widths, spill_dir, i)
+                       for i, (start, stop) in enumerate(ranges)]
+            results = [future.result() for future in futures]
+        else:
+            results = [_parse_range(source, start, stop, kinds, widths, spill_dir, i)
+                       for i, (start, stop) in enumerate(ranges)]
+
+        # Итоговый тип столбца - наибольший из встреченных в диапазонах
+        final = [_widest([kind] + [used[c] for _, _, used in results]) for c, kind in enumerate(kinds)]
+        reparse = [(i, c) for i, _, used in results for c, kind in enumerate(final)
+                   if kind == "category" and used[c] != "category"]
+        if executor is not None:
+            for future in [executor.submit(_reparse_column, source, *ranges[i], c, spill_dir, i)
+                           for i, c in reparse]:
+                future.result()
+        else:
+            for i, c in reparse:
+                _reparse_column(source, *ranges[i], c, spill_dir, i)
+
+        writer = ColumnarWriter(destination, [(name, kind) for (name, _), kind in zip(schema, final)])
+        try:
+            for index, n_rows, _ in results:
+                if not n_rows:
+                    continue
+                arrays = [np.load(_spill_path(spill_dir, index, c), mmap_mode="r") for c in range(len(schema))]
+                uniques = {c: np.load(_spill_path(spill_dir, index, c, "uniques"))
+                           for c, kind in enumerate(final) if kind == "category"}
+                for offset in range(0, n_rows, ROW_GROUP_SIZE):
+                    part = slice(offset, offset + ROW_GROUP_SIZE)
+                    writer.write([(uniques[c], values[part]) if c in uniques else values[part]
+                                  for c, values in enumerate(arrays)])
+                del arrays
+                for name in os.listdir(spill_dir):
+                    if name.startswith(f"{index:06d}-"):
+                        os.remove(os.path.join(spill_dir, name))
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.close(extra)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        shutil.rmtree(spill_dir, ignore_errors=True)
@@ -0,0 +1,206 @@
+"""
+Общий для хоста кэш подготовленных датасетов
+
+Подготовленный датасет (матрица признаков и целевая переменная) лежит
+файлами .npy в каталоге записи - по умолчанию в /dev/shm, то есть в общей
+памяти. Воркеры открывают их через mmap, поэтому параллельные запуски
+на одном датасете делят одни физические страницы вместо копии на процесс.
+
+Учет ведет родительский процесс (движок запусков): acquire перед запуском,
+release после. Запись с ненулевым счетчиком ссылок не вытесняется; прочие
+вытесняются по давности использования, пока объем больше бюджета.
+Строит запись первый воркер, которому она понадобилась (build_entry).
+"""
+import collections
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+SHM_DIR = "/dev/shm"
+CACHE_NAME = "ml_platform_datasets"
+
+
+def _cache_base() -> str:
+    return SHM_DIR if os.path.isdir(SHM_DIR) and os.access(SHM_DIR, os.W_OK) else tempfile.gettempdir()
+
+
+def default_cache_dir(name: str = CACHE_NAME) -> str:
+    """Каталог в общей памяти, если она есть, иначе во временном каталоге"""
+    return os.path.join(_cache_base(), f"{name}-{os.getpid()}")
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # процесс есть, но чужой
+    return True
+
+
+def remove_orphaned_caches(name: str = CACHE_NAME, base: Optional[str] = None) -> List[str]:
+    """Удаляет каталоги кэша процессов, которые завершились, не убрав за собой (например, упали)
+
+    Каталог в /dev/shm занимает память до перезагрузки; каталоги живых процессов не трогаются.
+    """
+    base = base or _cache_base()
+    removed = []
+    try:
+        names = os.listdir(base)
+    except OSError:
+        return removed
+    prefix = f"{name}-"
+    for entry in names:
+        pid = entry[len(prefix):]
+        if not entry.startswith(prefix) or not pid.isdigit() or int(pid) == os.getpid() or _alive(int(pid)):
+            continue
+        shutil.rmtree(os.path.join(base, entry), ignore_errors=True)
+        removed.append(entry)
+    return removed
+
+
+class _Entry:
+    __slots__ = ("path", "refs", "size")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.refs = 0
+        self.size = 0
+
+
+class SharedDatasetCache:
+    """Записи датасетов со счетчиками ссылок и LRU-вытеснением по бюджету байт"""
+
+    def __init__(self, root: Optional[str] = None, budget_bytes: int = 1 << 30):
+        if root is None:
+            # Каталоги упавших процессов (в имени - их pid) иначе остались бы в памяти до перезагрузки
+            remove_orphaned_caches()
+        self.root = root or default_cache_dir()
+        self.budget_bytes = budget_bytes
+        # Записи прошлого процесса с тем же каталогом не учтены - начинаем с пустого
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root)
+        self._lock = threading.Lock()
+        self._entries: "collections.OrderedDict[str, _Entry]" = collections.OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    def acquire(self, key: str) -> str:
+        """Берет ссылку на запись; возвращает ее каталог (может быть еще не построен)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._measure(entry)
+            if entry is not None and entry.size:
+                self.hits += 1
+            else:
+                self.misses += 1
+            if entry is None:
+                entry = self._entries[key] = _Entry(self._path(key))
+            entry.refs += 1
+            self._entries.move_to_end(key)
+            return entry.path
+
+    def release(self, key: str):
+        """Отпускает ссылку; построенная запись учитывается в объеме кэша"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refs -= 1
+            self._measure(entry)
+            if not entry.size and not entry.refs:
+                # Запись так и не построена (запуск упал до загрузки данных)
+                del self._entries[key]
+            self._evict()
+
+    def _measure(self, entry: _Entry):
+        """Учитывает объем записи, как только воркер ее построил (под блокировкой)"""
+        if not entry.size:
+            entry.size = _directory_size(entry.path)
+            self.bytes += entry.size
+
+    def _evict(self):
+        """Вытесняет давно не использованные записи без ссылок (под блокировкой)"""
+        for key in list(self._entries):
+            if self.bytes <= self.budget_bytes:
+                break
+            entry = self._entries[key]
+            if entry.refs:
+                continue
+            del self._entries[key]
+            self.bytes -= entry.size
+            self.evictions += 1
+            # Уже открытые mmap остаются валидными и после удаления файлов
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+    def close(self):
+        """Удаляет каталог кэша (память /dev/shm не переживет процесс впустую)"""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "root": self.root,
+                "entries": len(self._entries),
+                "in_use": sum(1 for entry in self._entries.values() if entry.refs),
+                "bytes": self.bytes,
+                "budget_bytes": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions
+            }
+
+
+def _directory_size(path: str) -> int:
+    if not os.path.isdir(path):
+        return 0
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+# ============ СТОРОНА ВОРКЕРА ============
+
+def open_entry(path: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Готовая запись через mmap (read-only) или None"""
+    try:
+        return np.load(os.path.join(path, "X.npy"), mmap_mode="r"), np.load(os.path.join(path, "y.npy"), mmap_mode="r")
+    except FileNotFoundError:
+        return None
+
+
+def build_entry(path: str, build: Callable[[], Tuple[np.ndarray, np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Открывает запись, а если ее нет - строит и публикует атомарным переименованием
+
+    Два воркера могут строить одну запись одновременно: каталог публикует
+    первый, второй свою копию удаляет и открывает опубликованную.
+    """
+    cached = open_entry(path)
+    if cached is not None:
+        return cached
+    X, y = build()
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(tmp_path)
+    try:
+        np.save(os.path.join(tmp_path, "X.npy"), np.ascontiguousarray(X))
+        np.save(os.path.join(tmp_path, "y.npy"), np.ascontiguousarray(y))
+        try:
+            os.rename(tmp_path, path)
+        except OSError:
+            pass  # запись уже опубликована другим воркером
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return open_entry(path)
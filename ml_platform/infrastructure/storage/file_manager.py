@@ -0,0 +1,214 @@
+"""
+Файловое хранилище датасетов с возобновляемой загрузкой по частям
+
+Загрузка - сессия с файлом-заготовкой uploads/<id>.part. Части дописываются
+строго по смещению: клиент, потерявший соединение, узнает текущее смещение
+и продолжает с него. Тело части пишется на диск по мере чтения из сети,
+без накопления в памяти, а sha256 считается попутно. Завершенный файл
+переносится в blobs/<sha256[:2]>/<sha256>.<ext>; одинаковое содержимое
+хранится один раз. Колоночная копия табличного файла - columnar/<sha256>.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Dict, NamedTuple, Optional
+
+HASH_BLOCK = 1024 * 1024
+
+
+class UploadConflict(Exception):
+    """Часть пришла не с текущего смещения или сессия занята другой записью"""
+
+    def __init__(self, message: str, offset: int):
+        super().__init__(message)
+        self.offset = offset
+
+
+class UploadSession:
+    """Незавершенная загрузка: имя файла, заявленный размер, принятые байты"""
+
+    __slots__ = ("id", "filename", "size", "offset", "created_at", "_hasher", "_busy")
+
+    def __init__(self, filename: str, size: Optional[int] = None, upload_id: Optional[str] = None):
+        self.id = upload_id or uuid.uuid4().hex
+        self.filename = filename
+        self.size = size
+        self.offset = 0
+        self.created_at = time.time()
+        self._hasher = None  # состояние sha256 для байтов [0, offset)
+        self._busy = False
+
+    def to_dict(self):
+        return {"upload_id": self.id, "filename": self.filename, "size": self.size, "offset": self.offset}
+
+
+class StoredFile(NamedTuple):
+    sha256: str
+    path: str
+    size: int
+    deduplicated: bool
+
+
+class ChunkWriter:
+    """Запись одной части: байты сразу уходят в файл и в sha256"""
+
+    def __init__(self, session: UploadSession, path: str):
+        self.session = session
+        self._file = open(path, "ab")
+
+    def write(self, data: bytes):
+        session = self.session
+        if session.size is not None and session.offset + len(data) > session.size:
+            raise ValueError(f"Загрузка больше заявленного размера {session.size} байт")
+        self._file.write(data)
+        session._hasher.update(data)
+        session.offset += len(data)
+
+    def close(self):
+        """Фиксирует принятое на диске: после сбоя загрузка продолжится с этого смещения"""
+        try:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        finally:
+            self.session._busy = False
+
+
+class FileManager:
+    """Сессии загрузок и хранилище файлов, адресуемое по содержимому"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.uploads_dir = os.path.join(root, "uploads")
+        self.blobs_dir = os.path.join(root, "blobs")
+        self.columnar_dir = os.path.join(root, "columnar")
+        os.makedirs(self.uploads_dir, exist_ok=True)
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        self._sessions: Dict[str, UploadSession] = {}
+        self._lock = threading.Lock()
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.uploads_dir, f"{upload_id}.part")
+
+    def _meta_path(self, upload_id: str) -> str:
+        return os.path.join(self.uploads_dir, f"{upload_id}.json")
+
+    def blob_path(self, sha256: str, filename: str) -> str:
+        ext = os.path.splitext(filename)[1].lower()
+        return os.path.join(self.blobs_dir, sha256[:2], sha256 + ext)
+
+    def columnar_path(self, sha256: str) -> str:
+        return os.path.join(self.columnar_dir, sha256)
+
+    # ============ СЕССИИ ============
+
+    def create_upload(self, filename: str, size: Optional[int] = None) -> UploadSession:
+        filename = os.path.basename(filename or "")
+        if not filename:
+            raise ValueError("Не указано имя файла")
+        if size is not None and size < 0:
+            raise ValueError("Размер файла не может быть отрицательным")
+        session = UploadSession(filename, size)
+        open(self._part_path(session.id), "wb").close()
+        with open(self._meta_path(session.id), "w", encoding="utf-8") as f:
+            json.dump({"filename": filename, "size": size, "created_at": session.created_at}, f)
+        with self._lock:
+            self._sessions[session.id] = session
+        return session
+
+    def get_upload(self, upload_id: str) -> Optional[UploadSession]:
+        """Сессия по id; после перезапуска восстанавливается с диска"""
+        session = self._sessions.get(upload_id)
+        if session is not None:
+            return session
+        # id - hex от uuid4, иное в путь файла не попадает
+        if len(upload_id) != 32 or not all(c in "0123456789abcdef" for c in upload_id):
+            return None
+        meta_path = self._meta_path(upload_id)
+        if not os.path.isfile(meta_path):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        with self._lock:
+            session = self._sessions.get(upload_id)
+            if session is None:
+                session = UploadSession(meta["filename"], meta.get("size"), upload_id)
+                session.created_at = meta.get("created_at", session.created_at)
+                # Принято ровно то, что лежит в заготовке
+                session.offset = os.path.getsize(self._part_path(upload_id))
+                self._sessions[upload_id] = session
+        return session
+
+    def open_chunk(self, session: UploadSession, offset: int) -> ChunkWriter:
+        """Начинает запись части с offset; смещение должно совпасть с принятым"""
+        with self._lock:
+            if session._busy:
+                raise UploadConflict("Загрузка уже принимает другую часть", session.offset)
+            if offset != session.offset:
+                raise UploadConflict(f"Ожидалось смещение {session.offset}", session.offset)
+            session._busy = True
+        try:
+            if session._hasher is None:
+                self._rehash(session)
+            return ChunkWriter(session, self._part_path(session.id))
+        except BaseException:
+            session._busy = False
+            raise
+
+    def _rehash(self, session: UploadSession):
+        """Восстанавливает sha256 принятой части заготовки (после перезапуска)"""
+        hasher = hashlib.sha256()
+        with open(self._part_path(session.id), "rb") as f:
+            remaining = session.offset
+            while remaining:
+                block = f.read(min(HASH_BLOCK, remaining))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+        session._hasher = hasher
+
+    def complete(self, session: UploadSession) -> StoredFile:
+        """Завершает загрузку: файл переносится в хранилище по sha256"""
+        with self._lock:
+            if session._busy:
+                raise UploadConflict("Загрузка еще принимает часть", session.offset)
+            if session.size is not None and session.offset != session.size:
+                raise ValueError(f"Принято {session.offset} из {session.size} байт")
+            session._busy = True
+        try:
+            if session._hasher is None:
+                self._rehash(session)
+            sha256 = session._hasher.hexdigest()
+            path = self.blob_path(sha256, session.filename)
+            part_path = self._part_path(session.id)
+            deduplicated = os.path.exists(path)
+            if deduplicated:
+                os.remove(part_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(part_path, path)
+            self._forget(session)
+            return StoredFile(sha256, path, session.offset, deduplicated)
+        finally:
+            session._busy = False
+
+    def abort(self, session: UploadSession):
+        """Отменяет загрузку и удаляет заготовку"""
+        with self._lock:
+            if session._busy:
+                raise UploadConflict("Загрузка еще принимает часть", session.offset)
+        part_path = self._part_path(session.id)
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        self._forget(session)
+
+    def _forget(self, session: UploadSession):
+        meta_path = self._meta_path(session.id)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        with self._lock:
+            self._sessions.pop(session.id, None)
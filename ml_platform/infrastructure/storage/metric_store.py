@@ -0,0 +1,289 @@
+"""
+Хранилище временных рядов метрик обучения (по шагам)
+
+Каждая пара (эксперимент, метрика) - отдельный ряд из чанков фиксированного
+размера. Чанк - структурированный массив NumPy (step, timestamp, value).
+Заполненные чанки сбрасываются в файлы .npy и дальше читаются через mmap,
+поэтому в памяти живет только текущий чанк каждого ряда. Сам текущий чанк
+фиксируется на диске файлом tail-NNNNNNNN.npy по commit() - один раз на пачку.
+"""
+import glob
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+POINT_DTYPE = np.dtype([("step", "<i8"), ("timestamp", "<f8"), ("value", "<f8")])
+
+
+class MetricChunk:
+    """Запечатанный чанк ряда с границами для отсечения при запросах"""
+
+    __slots__ = ("points", "step_min", "step_max", "time_min", "time_max", "steps_sorted")
+
+    def __init__(self, points: np.ndarray):
+        self.points = points
+        steps = points["step"]
+        times = points["timestamp"]
+        self.step_min, self.step_max = int(steps.min()), int(steps.max())
+        self.time_min, self.time_max = float(times.min()), float(times.max())
+        self.steps_sorted = bool(np.all(steps[1:] >= steps[:-1]))
+
+
+class MetricSeries:
+    """Ряд одной метрики: append-only чанки и сводка min/max/last"""
+
+    def __init__(self, chunk_size: int = 4096, spill_dir: Optional[str] = None):
+        self.chunk_size = chunk_size
+        self.spill_dir = spill_dir
+        self.chunks: List[MetricChunk] = []
+        self._active = np.empty(chunk_size, dtype=POINT_DTYPE)
+        self._active_len = 0
+        self._lock = threading.Lock()
+
+        # Сводка поддерживается при каждой записи
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.last = None  # (step, timestamp, value)
+
+        if spill_dir and os.path.isdir(spill_dir):
+            self._load_spilled()
+
+    # ============ ЗАПИСЬ ============
+
+    def append(self, step: int, value: float, timestamp: Optional[float] = None):
+        self.append_many(np.array([step]), np.array([value], dtype="f8"),
+                         None if timestamp is None else np.array([timestamp], dtype="f8"))
+
+    def append_many(self, steps, values, timestamps=None):
+        """Векторная дозапись пачки точек"""
+        steps = np.asarray(steps, dtype="i8")
+        values = np.asarray(values, dtype="f8")
+        if timestamps is None:
+            timestamps = np.full(len(steps), time.time())
+        timestamps = np.asarray(timestamps, dtype="f8")
+        if not len(steps) == len(values) == len(timestamps):
+            raise ValueError("steps, values и timestamps должны быть одной длины")
+        if not len(steps):
+            return
+
+        with self._lock:
+            self._update_summary(steps, timestamps, values)
+            offset = 0
+            while offset < len(steps):
+                room = self.chunk_size - self._active_len
+                take = min(room, len(steps) - offset)
+                target = self._active[self._active_len:self._active_len + take]
+                target["step"] = steps[offset:offset + take]
+                target["timestamp"] = timestamps[offset:offset + take]
+                target["value"] = values[offset:offset + take]
+                self._active_len += take
+                offset += take
+                if self._active_len == self.chunk_size:
+                    self._seal()
+
+    def _update_summary(self, steps, timestamps, values):
+        batch_min, batch_max = float(values.min()), float(values.max())
+        self.min = batch_min if self.min is None else min(self.min, batch_min)
+        self.max = batch_max if self.max is None else max(self.max, batch_max)
+        self.last = (int(steps[-1]), float(timestamps[-1]), float(values[-1]))
+        self.count += len(values)
+
+    def _seal(self):
+        """Запечатывает текущий чанк; с spill_dir он уходит в файл и читается через mmap"""
+        points = self._active[:self._active_len].copy()
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = os.path.join(self.spill_dir, f"{len(self.chunks):08d}.npy")
+            np.save(path, points)
+            points = np.load(path, mmap_mode="r")
+            # Хвост этого чанка теперь целиком лежит в файле чанка
+            for tail in glob.glob(os.path.join(self.spill_dir, "tail-*.npy")):
+                os.remove(tail)
+        self.chunks.append(MetricChunk(points))
+        self._active = np.empty(self.chunk_size, dtype=POINT_DTYPE)
+        self._active_len = 0
+
+    def commit(self):
+        """Фиксирует текущий неполный чанк на диске (атомарной заменой файла хвоста)"""
+        with self._lock:
+            if not self._active_len or not self.spill_dir:
+                return
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = os.path.join(self.spill_dir, f"tail-{len(self.chunks):08d}.npy")
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, self._active[:self._active_len])
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+
+    def _load_spilled(self):
+        names = sorted(os.listdir(self.spill_dir))
+        for name in names:
+            if name.endswith(".npy") and not name.startswith("tail-"):
+                self.chunks.append(MetricChunk(np.load(os.path.join(self.spill_dir, name), mmap_mode="r")))
+        for chunk in self.chunks:
+            self._update_summary(chunk.points["step"], chunk.points["timestamp"], chunk.points["value"])
+
+        # Хвост от уже запечатанного чанка (сбой между записью чанка и удалением хвоста) пропускаем
+        tail_name = f"tail-{len(self.chunks):08d}.npy"
+        if tail_name in names:
+            tail = np.load(os.path.join(self.spill_dir, tail_name))
+            self._active[:len(tail)] = tail
+            self._active_len = len(tail)
+            self._update_summary(tail["step"], tail["timestamp"], tail["value"])
+
+    # ============ ЧТЕНИЕ ============
+
+    def query(self, step_from: Optional[int] = None, step_to: Optional[int] = None,
+              time_from: Optional[float] = None, time_to: Optional[float] = None) -> np.ndarray:
+        """Точки в диапазоне шагов и/или времени (границы включительно)"""
+        with self._lock:
+            chunks = list(self.chunks)
+            if self._active_len:
+                chunks.append(MetricChunk(self._active[:self._active_len].copy()))
+
+        parts = []
+        for chunk in chunks:
+            if step_from is not None and chunk.step_max < step_from:
+                continue
+            if step_to is not None and chunk.step_min > step_to:
+                continue
+            if time_from is not None and chunk.time_max < time_from:
+                continue
+            if time_to is not None and chunk.time_min > time_to:
+                continue
+            points = chunk.points
+            if chunk.steps_sorted and (step_from is not None or step_to is not None):
+                steps = points["step"]
+                lo = 0 if step_from is None else np.searchsorted(steps, step_from, side="left")
+                hi = len(points) if step_to is None else np.searchsorted(steps, step_to, side="right")
+                points = points[lo:hi]
+            elif step_from is not None or step_to is not None:
+                points = points[_between(points["step"], step_from, step_to)]
+            if time_from is not None or time_to is not None:
+                points = points[_between(points["timestamp"], time_from, time_to)]
+            parts.append(points)
+
+        if not parts:
+            return np.empty(0, dtype=POINT_DTYPE)
+        return np.concatenate(parts)
+
+    def summary(self) -> Dict[str, object]:
+        last = self.last
+        return {
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "last": None if last is None else {"step": last[0], "timestamp": last[1], "value": last[2]},
+        }
+
+
+def _between(column: np.ndarray, lo, hi) -> np.ndarray:
+    mask = np.ones(len(column), dtype=bool)
+    if lo is not None:
+        mask &= column >= lo
+    if hi is not None:
+        mask &= column <= hi
+    return mask
+
+
+class MetricStore:
+    """Ряды метрик всех экспериментов: {(experiment_id, metric): MetricSeries}"""
+
+    def __init__(self, root: Optional[str] = None, chunk_size: int = 4096):
+        self.root = root
+        self.chunk_size = chunk_size
+        self._series: Dict[Tuple[str, str], MetricSeries] = {}
+        self._names: Dict[str, Set[str]] = {}  # experiment_id -> имена рядов в памяти
+        self._lock = threading.Lock()
+
+    def _spill_dir(self, experiment_id: str, metric: str) -> Optional[str]:
+        if not self.root:
+            return None
+        return os.path.join(self.root, quote(experiment_id, safe=""), quote(metric, safe=""))
+
+    def series(self, experiment_id: str, metric: str) -> MetricSeries:
+        key = (experiment_id, metric)
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.get(key)
+                if series is None:
+                    series = MetricSeries(self.chunk_size, self._spill_dir(experiment_id, metric))
+                    self._series[key] = series
+                    self._names.setdefault(experiment_id, set()).add(metric)
+        return series
+
+    def append(self, experiment_id: str, metric: str, step: int, value: float,
+               timestamp: Optional[float] = None):
+        self.series(experiment_id, metric).append(step, value, timestamp)
+
+    def append_many(self, experiment_id: str, metric: str, steps, values, timestamps=None):
+        self.series(experiment_id, metric).append_many(steps, values, timestamps)
+
+    def metrics(self, experiment_id: str) -> List[str]:
+        """Имена метрик эксперимента, включая сброшенные на диск"""
+        with self._lock:
+            names = set(self._names.get(experiment_id, ()))
+        if self.root:
+            directory = os.path.join(self.root, quote(experiment_id, safe=""))
+            if os.path.isdir(directory):
+                names.update(unquote(name) for name in os.listdir(directory))
+        return sorted(names)
+
+    def has_series(self, experiment_id: str, metric: str) -> bool:
+        if (experiment_id, metric) in self._series:
+            return True
+        spill_dir = self._spill_dir(experiment_id, metric)
+        return spill_dir is not None and os.path.exists(spill_dir)
+
+    def commit(self, keys=None):
+        """Фиксирует хвосты указанных рядов (по умолчанию всех)"""
+        with self._lock:
+            if keys is None:
+                series = list(self._series.values())
+            else:
+                series = [self._series[key] for key in keys if key in self._series]
+        for item in series:
+            item.commit()
+
+    def flush(self):
+        self.commit()
+
+
+class MetricBatch:
+    """Пачка точек многих рядов: проверка за один проход, запись по рядам векторно"""
+
+    def __init__(self):
+        # (experiment_id, metric) -> ([steps], [timestamps], [values])
+        self._columns: Dict[Tuple[str, str], Tuple[list, list, list]] = {}
+        self.size = 0
+
+    def add(self, experiment_id: str, metric: str, value: float,
+            step: Optional[int] = None, timestamp: Optional[float] = None):
+        steps, timestamps, values = self._columns.setdefault((experiment_id, metric), ([], [], []))
+        steps.append(step)
+        timestamps.append(timestamp)
+        values.append(value)
+        self.size += 1
+
+    def apply(self, store: MetricStore, commit: bool = True) -> List[Tuple[str, str]]:
+        """Дописывает пачку в хранилище и фиксирует затронутые ряды одним commit"""
+        now = time.time()
+        for (experiment_id, metric), (steps, timestamps, values) in self._columns.items():
+            series = store.series(experiment_id, metric)
+            # Точки без шага продолжают ряд по порядку следования в пачке
+            base = series.count
+            steps = [base + i if step is None else step for i, step in enumerate(steps)]
+            timestamps = [now if ts is None else ts for ts in timestamps]
+            series.append_many(steps, values, timestamps)
+        keys = list(self._columns)
+        if commit:
+            store.commit(keys)
+        return keys
@@ -0,0 +1,98 @@
+"""
+Формат артефакта модели: pickle 5 с весами вне потока
+
+    MAGIC (8 байт) | длина заголовка (8 байт, little-endian) | заголовок JSON
+    | выравнивание | поток pickle | массивы весов, каждый с выравниванием 64
+
+Большие непрерывные массивы numpy pickle 5 отдает отдельными буферами -
+они пишутся в файл как есть. При загрузке файл отображается в память
+(mmap), и массивы модели становятся read-only видами на страницы файла:
+веса не копируются в кучу процесса и читаются с диска по мере обращения.
+Поэтому модели сохраняются без сжатия. Артефакт обычного pickle (без MAGIC)
+тоже загружается - целиком в память.
+"""
+import json
+import mmap
+import pickle
+from typing import Any, List, NamedTuple
+
+from ml_platform.infrastructure.storage.artifact_store import ArtifactInfo, ArtifactStore
+
+MAGIC = b"MLPMDL01"
+ALIGN = 64
+# Буферы меньше этого размера остаются в потоке pickle
+OUT_OF_BAND_MIN = 4096
+
+
+class LoadedModel(NamedTuple):
+    model: Any
+    heap_bytes: int     # поток pickle - объекты Python в куче процесса
+    mapped_bytes: int   # массивы весов, отображенные из файла
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def save_model(model, store: ArtifactStore) -> ArtifactInfo:
+    """Сохраняет модель артефактом (одинаковые модели хранятся один раз)"""
+    buffers: List[memoryview] = []
+
+    def out_of_band(buffer: pickle.PickleBuffer) -> bool:
+        raw = buffer.raw()
+        if raw.nbytes < OUT_OF_BAND_MIN:
+            return True  # в потоке
+        buffers.append(raw)
+        return False
+
+    payload = pickle.dumps(model, protocol=5, buffer_callback=out_of_band)
+    # Смещения - от начала данных, чтобы заголовок не зависел от своей длины
+    layout, offset = [], _align(len(payload))
+    for raw in buffers:
+        layout.append([offset, raw.nbytes])
+        offset = _align(offset + raw.nbytes)
+    header = json.dumps({"pickle_size": len(payload), "buffers": layout}).encode("utf-8")
+    data_start = _align(16 + len(header))
+
+    writer = store.writer(compression=None)
+    try:
+        writer.write(MAGIC + len(header).to_bytes(8, "little") + header)
+        writer.write(b"\0" * (data_start - 16 - len(header)))
+        position = 0
+        for chunk, (start, size) in zip([payload] + buffers, [[0, len(payload)]] + layout):
+            writer.write(b"\0" * (start - position))
+            writer.write(chunk)
+            position = start + size
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.commit()
+
+
+def _read(view: memoryview) -> LoadedModel:
+    if bytes(view[:8]) != MAGIC:
+        return LoadedModel(pickle.loads(view), view.nbytes, 0)
+    header_size = int.from_bytes(view[8:16], "little")
+    header = json.loads(bytes(view[16:16 + header_size]))
+    data_start = _align(16 + header_size)
+    payload = view[data_start:data_start + header["pickle_size"]]
+    buffers = [view[data_start + start:data_start + start + size] for start, size in header["buffers"]]
+    model = pickle.loads(payload, buffers=buffers)
+    return LoadedModel(model, header["pickle_size"], sum(size for _, size in header["buffers"]))
+
+
+def open_model(store: ArtifactStore, sha256: str) -> LoadedModel:
+    """Загружает модель; веса несжатого артефакта отображаются из файла"""
+    info = store.info(sha256)
+    if info is None:
+        raise KeyError(f"Артефакт {sha256} не найден")
+    if info.compression is not None or not info.size:
+        return _read(memoryview(store.read_bytes(sha256)))
+    with open(store.path(info), "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    # Отображение живет, пока на него ссылаются массивы модели
+    return _read(memoryview(mapped))
+
+
+def load_model(store: ArtifactStore, sha256: str):
+    return open_model(store, sha256).model
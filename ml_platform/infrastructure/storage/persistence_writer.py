@@ -0,0 +1,151 @@
+"""
+Фоновая запись изменений хранилища (write-behind)
+
+Обработчики запросов только отмечают сущность как измененную. Отдельный поток
+собирает отметки за окно flush_window, схлопывает повторные изменения одной
+сущности и сбрасывает пачку в хранилище одной операцией на репозиторий.
+"""
+import asyncio
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class PersistenceWriter:
+    """Поток записи с коалесценцией изменений и ожиданием долговечности
+
+    on_flush(число записей, секунды) вызывается после каждой записанной пачки.
+    """
+
+    def __init__(self, flush_window: float = 0.02, retry_delay: float = 1.0,
+                 on_flush: Optional[Callable[[int, float], None]] = None):
+        self.flush_window = flush_window
+        self.retry_delay = retry_delay
+        self.on_flush = on_flush
+
+        self._cond = threading.Condition()
+        # (id репозитория, id сущности) -> (репозиторий, id сущности, данные, номер)
+        self._dirty: Dict[Tuple[int, str], Tuple[Any, str, Dict[str, Any], int]] = {}
+        self._seq = 0          # номер последней отметки
+        self._flushed_seq = 0  # все отметки с номером <= этого записаны
+        self._async_waiters: List[Tuple[int, asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._closed = False
+        self.flushes = 0
+        self.last_flush_size = 0
+        self.last_flush_seconds = 0.0
+        self.last_error: Optional[str] = None
+
+        self._thread = threading.Thread(target=self._run, name="persistence-writer", daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self, repository, entity_id: str, data: Dict[str, Any]) -> int:
+        """Ставит снимок сущности в очередь на запись, возвращает номер отметки"""
+        with self._cond:
+            self._seq += 1
+            # Повторная отметка той же сущности заменяет предыдущую: пишется только последняя версия
+            self._dirty.pop((id(repository), entity_id), None)
+            self._dirty[(id(repository), entity_id)] = (repository, entity_id, data, self._seq)
+            self._cond.notify_all()
+            return self._seq
+
+    @property
+    def pending(self) -> int:
+        return len(self._dirty)
+
+    # ============ ОЖИДАНИЕ ============
+
+    def wait_flushed(self, seq: Optional[int] = None, timeout: Optional[float] = None) -> bool:
+        """Блокирующее ожидание записи всех отметок до seq (по умолчанию всех текущих)"""
+        with self._cond:
+            target = self._seq if seq is None else seq
+            return self._cond.wait_for(lambda: self._flushed_seq >= target or self._closed, timeout)
+
+    async def wait_flushed_async(self, seq: Optional[int] = None):
+        """Ожидание записи без блокировки event loop"""
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            target = self._seq if seq is None else seq
+            if self._flushed_seq >= target or self._closed:
+                return
+            future = loop.create_future()
+            self._async_waiters.append((target, loop, future))
+        await future
+
+    def _wake_async_waiters(self):
+        """Будит async-ожидающих, чьи отметки уже записаны (под блокировкой)"""
+        remaining = []
+        for target, loop, future in self._async_waiters:
+            if self._flushed_seq >= target or self._closed:
+                loop.call_soon_threadsafe(_resolve, future)
+            else:
+                remaining.append((target, loop, future))
+        self._async_waiters = remaining
+
+    # ============ ЗАПИСЬ ============
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._dirty or self._closed)
+                if not self._dirty and self._closed:
+                    return
+                if not self._closed:
+                    # Окно коалесценции: всплеск изменений уходит одной пачкой
+                    self._cond.wait_for(lambda: self._closed, self.flush_window)
+                batch, self._dirty = self._dirty, {}
+                batch_seq = self._seq
+
+            started = time.perf_counter()
+            try:
+                self._write(batch.values())
+            except Exception:
+                self.last_error = traceback.format_exc()
+                print(f"⚠️ Ошибка фоновой записи, повтор через {self.retry_delay} с:\n{self.last_error}")
+                with self._cond:
+                    # Возвращаем пачку в очередь, не затирая более свежие версии
+                    for key, item in batch.items():
+                        self._dirty.setdefault(key, item)
+                    self._cond.wait_for(lambda: self._closed, self.retry_delay)
+                    if self._closed:
+                        return
+                continue
+
+            with self._cond:
+                self.flushes += 1
+                self.last_flush_size = len(batch)
+                self.last_flush_seconds = time.perf_counter() - started
+                # Отметки, пришедшие во время записи, имеют номера больше batch_seq
+                self._flushed_seq = batch_seq
+                self._cond.notify_all()
+                self._wake_async_waiters()
+            if self.on_flush is not None:
+                try:
+                    self.on_flush(len(batch), self.last_flush_seconds)
+                except Exception:
+                    print(f"⚠️ Ошибка обработчика записи:\n{traceback.format_exc()}")
+
+    @staticmethod
+    def _write(items):
+        """Группирует пачку по репозиториям и пишет одной операцией на каждый"""
+        by_repository: Dict[int, Tuple[Any, list]] = {}
+        for repository, entity_id, data, seq in items:
+            by_repository.setdefault(id(repository), (repository, []))[1].append((entity_id, data, seq))
+        for repository, records in by_repository.values():
+            repository.write_batch(records)
+
+    def close(self, timeout: Optional[float] = None):
+        """Дописывает все отметки и останавливает поток"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        with self._cond:
+            self._wake_async_waiters()
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
@@ -9,6 +9,10 @@ from datetime import datetime  # ИМПОРТ ВНУТРИ ФАЙЛА!
 # Добавляем текущую директорию в sys.path
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
+# Корень репозитория - для импорта пакета ml_platform
+sys.path.insert(0, os.path.dirname(current_dir))
+
+from ml_platform.infrastructure.storage.metric_store import MetricStore
 
 print(f"📁 Текущая директория main.py: {current_dir}")
 
@@ -82,15 +86,13 @@ class Experiment:
         self.created_at = created_at
         self.started_at = None
         self.completed_at = None
-        self.metrics = []
+        # Метрики по шагам хранятся в колоночных чанках, а не в словаре на точку
+        self.metrics = MetricStore()
         self.artifact_path = None
     
-    def add_metric(self, name, value):
-        self.metrics.append({
-            "name": name,
-            "value": value,
-            "timestamp": datetime.now()
-        })
+    def add_metric(self, name, value, step=None):
+        series = self.metrics.series(self.id, name)
+        series.append(series.count if step is None else step, value)
     
     def update_status(self, status):
         self.status = status
@@ -215,9 +217,11 @@ def demonstrate_object_model():
     
     print(f"\n5. ✅ Эксперимент завершен")
     print(f"   Финальный статус: {experiment.status}")
-    print(f"   Метрики: {len(experiment.metrics)}")
-    for metric in experiment.metrics:
-        print(f"     - {metric['name']}: {metric['value']:.2f}")
+    metric_names = experiment.metrics.metrics(experiment.id)
+    print(f"   Метрики: {len(metric_names)}")
+    for name in metric_names:
+        summary = experiment.metrics.series(experiment.id, name).summary()
+        print(f"     - {name}: {summary['last']['value']:.2f}")
     print(f"   Путь к модели: {experiment.artifact_path}")
     
     # 6. Создание модели
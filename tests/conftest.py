@@ -0,0 +1,9 @@
+"""
+Общая настройка тестов: приложение работает с временным каталогом данных
+"""
+import os
+import tempfile
+
+os.environ.setdefault("ML_PLATFORM_DATA_DIR", tempfile.mkdtemp(prefix="ml_platform_test_"))
+# Тесты опираются на демо-проекты в пустой базе
+os.environ.setdefault("ML_PLATFORM_SEED_DEMO", "1")
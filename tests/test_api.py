@@ -0,0 +1,416 @@
+"""
+Тесты HTTP API
+"""
+import asyncio
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+from app import Experiment, app, db, deployments, live, runner
+from ml_platform.infrastructure.compute.trainers import load_dataset, train
+from ml_platform.infrastructure.storage.model_format import load_model
+
+
+def _p99(latencies):
+    return sorted(latencies)[max(0, int(len(latencies) * 0.99) - 1)]
+
+
+# ============ ФОНОВАЯ ЗАПИСЬ ============
+
+def test_gets_do_not_stall_during_write_bursts(monkeypatch):
+    # Медленный диск: каждая пачка записи занимает 50 мс
+    repository = db._backend.experiments
+    write_batch = repository.write_batch
+
+    def slow_write_batch(records):
+        time.sleep(0.05)
+        write_batch(records)
+
+    monkeypatch.setattr(repository, "write_batch", slow_write_batch)
+    project_id = db.get_all_projects()[0].id
+    before = db.get_stats()["experiments"]
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            latencies = []
+
+            async def poll_stats():
+                for _ in range(100):
+                    started = time.perf_counter()
+                    response = await client.get("/api/stats")
+                    latencies.append(time.perf_counter() - started)
+                    assert response.status_code == 200
+
+            async def write_burst(durable):
+                for i in range(30):
+                    response = await client.post(
+                        f"/api/experiments?durable={str(durable).lower()}",
+                        data={"name": f"burst {i}", "algorithm": "XGBoost",
+                              "dataset": "data.csv", "project_id": project_id}
+                    )
+                    assert response.status_code == 200
+
+            await asyncio.gather(poll_stats(), write_burst(False), write_burst(True))
+            return latencies
+
+    latencies = asyncio.run(scenario())
+    assert _p99(latencies) < 0.05
+    assert db.flush(timeout=5)
+    assert repository.count() == before + 60
+
+
+# ============ ПАКЕТНАЯ ЗАГРУЗКА МЕТРИК ============
+
+async def _post_metrics(**kwargs):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post("/api/metrics/batch", **kwargs)
+
+
+def test_metric_batch_accepts_json_array_with_per_item_errors():
+    experiment_id = db.get_all_experiments()[0].id
+    points = [{"experiment_id": experiment_id, "metric": "batch_loss", "step": i, "value": 1.0 / (i + 1)}
+              for i in range(100)]
+    points.insert(10, {"experiment_id": "missing", "metric": "batch_loss", "value": 1.0})
+    points.insert(20, {"experiment_id": experiment_id, "metric": "batch_loss", "value": "bad"})
+
+    response = asyncio.run(_post_metrics(json=points))
+    body = response.json()
+    assert response.status_code == 200
+    assert body["accepted"] == 100
+    assert [error["index"] for error in body["errors"]] == [10, 20]
+    series = db.metric_store.series(experiment_id, "batch_loss")
+    assert series.summary()["count"] == 100
+    assert series.summary()["last"]["step"] == 99
+
+
+def test_metric_batch_accepts_ndjson_stream():
+    experiment_id = db.get_all_experiments()[0].id
+    lines = [json.dumps({"experiment_id": experiment_id, "metric": "ndjson_acc", "value": i / 10})
+             for i in range(10)]
+    lines.insert(3, "{not json")
+    body = ("\n".join(lines) + "\n").encode()
+
+    response = asyncio.run(_post_metrics(content=body, headers={"content-type": "application/x-ndjson"}))
+    assert response.json()["accepted"] == 10
+    assert response.json()["errors"][0]["index"] == 3
+    steps = db.metric_store.series(experiment_id, "ndjson_acc").query()["step"].tolist()
+    assert steps == list(range(10))
+
+
+# ============ ЗАПУСК ПРИЛОЖЕНИЯ ============
+
+def test_import_has_no_side_effects_and_factory_starts(tmp_path):
+    # Импорт в чужом рабочем каталоге: ни шаблонов, ни каталогов, ни базы
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root, ML_PLATFORM_DATA_DIR=str(tmp_path / "data"),
+               ML_PLATFORM_SEED_DEMO="0")
+    code = ("import app; assert not app.db._lazy_loaded and not app.runner._lazy_loaded; "
+            "fresh = app.create_app(); assert fresh is not app.app")
+    subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, check=True)
+    assert os.listdir(tmp_path) == []
+
+    async def scenario():
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.get("/"), await client.get("/static/css/style.css")
+
+    page, css = asyncio.run(scenario())
+    assert page.status_code == 200 and "ML Platform" in page.text
+    assert css.status_code == 200 and "experiment-card" in css.text
+
+
+# ============ УСЛОВНЫЕ ЗАПРОСЫ ============
+
+def test_pages_and_stats_answer_304_until_data_changes():
+    project_id = db.get_all_projects()[0].id
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = {path: await client.get(path) for path in ("/", "/api/stats")}
+            repeated = {path: await client.get(path, headers={"If-None-Match": response.headers["etag"]})
+                        for path, response in first.items()}
+            await client.post("/api/experiments", data={
+                "name": "etag", "algorithm": "XGBoost", "dataset": "data.csv", "project_id": project_id})
+            changed = {path: await client.get(path, headers={"If-None-Match": response.headers["etag"]})
+                       for path, response in first.items()}
+            return first, repeated, changed
+
+    first, repeated, changed = asyncio.run(scenario())
+    for path in ("/", "/api/stats"):
+        assert first[path].status_code == 200 and first[path].headers["etag"].startswith('W/"')
+        assert repeated[path].status_code == 304 and repeated[path].content == b""
+        assert changed[path].status_code == 200
+        assert changed[path].headers["etag"] != first[path].headers["etag"]
+    assert changed["/api/stats"].json()["experiments"] == first["/api/stats"].json()["experiments"] + 1
+    # Страница знает свою версию, чтобы опрашивать сервер условными запросами
+    assert json.dumps(first["/"].headers["etag"]) in first["/"].text
+
+
+# ============ ЖИВЫЕ ОБНОВЛЕНИЯ ============
+
+def test_live_stream_sends_snapshot_then_coalesced_changes():
+    project_id = db.get_all_projects()[0].id
+    path = "/api/live"
+    scope = {"type": "http", "method": "GET", "path": path, "raw_path": path.encode(),
+             "query_string": f"topics=stats,project:{project_id}".encode(), "headers": [(b"host", b"test")],
+             "scheme": "http", "server": ("test", 80), "client": ("127.0.0.1", 1), "http_version": "1.1",
+             "root_path": ""}
+
+    async def scenario():
+        # Поток событий бесконечный: приложение вызывается напрямую, отключение - через receive
+        messages = asyncio.Queue()
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        stream = asyncio.create_task(app(scope, receive, messages.put))
+        start = await asyncio.wait_for(messages.get(), 5)
+
+        async def events(count):
+            received = []
+            while len(received) < count:
+                body = (await asyncio.wait_for(messages.get(), 5))["body"].decode()
+                received += [json.loads(block[len("data: "):]) for block in body.split("\n\n")
+                             if block.startswith("data: ")]
+            return received
+
+        snapshot = await events(2)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for i in range(3):
+                await client.post("/api/experiments", data={
+                    "name": f"live {i}", "algorithm": "XGBoost", "dataset": "data.csv", "project_id": project_id})
+            unknown = await client.get("/api/live", params={"topics": "stats,nothing:1"})
+        updates = await events(2)
+        disconnected.set()
+        await asyncio.wait_for(stream, 5)
+        return start, snapshot, updates, unknown
+
+    start, snapshot, updates, unknown = asyncio.run(scenario())
+    assert dict(start["headers"])[b"content-type"].startswith(b"text/event-stream")
+    topics = {event["topic"]: event["data"] for event in snapshot}
+    assert set(topics) == {"stats", f"project:{project_id}"}
+    latest = {event["topic"]: event["data"] for event in updates}
+    assert set(latest) == {"stats", f"project:{project_id}"}
+    # Изменения приходят состоянием темы, а не отдельными событиями
+    assert latest["stats"]["experiments"] > topics["stats"]["experiments"]
+    assert latest[f"project:{project_id}"]["experiments"] > topics[f"project:{project_id}"]["experiments"]
+    assert unknown.status_code == 400
+    # Отключившийся клиент снят с подписки
+    assert live.stats()["clients"] == 0
+
+
+# ============ МОНИТОРИНГ ============
+
+def test_metrics_endpoint_reports_routes_and_hooks():
+    project_id = db.get_all_projects()[0].id
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/api/experiments?durable=true", data={
+                "name": "metrics", "algorithm": "XGBoost", "dataset": "data.csv", "project_id": project_id})
+            for _ in range(3):
+                await client.get("/api/jobs/missing")
+            return await client.get("/metrics")
+
+    response = asyncio.run(scenario())
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    # Метка - шаблон маршрута, а не конкретный путь
+    assert 'http_requests_total{method="GET",route="/api/jobs/{job_id}",status="404"} 3' in text
+    assert 'http_request_duration_seconds_count{method="POST",route="/api/experiments"}' in text
+    assert "ml_persistence_flush_seconds_count" in text
+    assert "ml_scheduler_queued_jobs 0" in text
+
+
+# ============ ЗАГРУЗКА ДАТАСЕТОВ ============
+
+def test_chunked_upload_registers_dataset_once():
+    content = b"x1,x2,label\n" + b"".join(b"%d,%d,%d\n" % (i, i * 2, i % 2) for i in range(5000))
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            created = await client.post("/api/uploads", json={"filename": "uploaded.csv", "size": len(content)})
+            upload_id = created.json()["upload_id"]
+            url = f"/api/uploads/{upload_id}"
+            first = await client.patch(url, content=content[:20000], headers={"Upload-Offset": "0"})
+            stale = await client.patch(url, content=content[20000:], headers={"Upload-Offset": "0"})
+            status = await client.head(url)
+            offset = status.headers["Upload-Offset"]
+            rest = await client.patch(url, content=content[20000:], headers={"Upload-Offset": offset})
+            completed = await client.post(f"{url}/complete")
+            known = await client.post("/api/uploads", json={"filename": "again.csv", "sha256": sha256})
+            return first, stale, offset, rest, completed, known
+
+    first, stale, offset, rest, completed, known = asyncio.run(scenario())
+    assert first.json()["offset"] == 20000
+    assert stale.status_code == 409 and stale.json()["offset"] == 20000
+    assert offset == "20000"
+    assert rest.json()["offset"] == len(content)
+    assert completed.status_code == 201
+    dataset = completed.json()["dataset"]
+    assert dataset["sha256"] == sha256 and dataset["size_bytes"] == len(content)
+    assert known.json() == {"deduplicated": True, "dataset": dataset}
+
+    # Колоночная копия строится в фоне; после нее запуски читают ее, а не CSV
+    deadline = time.time() + 30
+    while db.get_dataset_by_id(dataset["id"]).columnar_path is None and time.time() < deadline:
+        time.sleep(0.05)
+    converted = db.get_dataset_by_id(dataset["id"])
+    assert converted.n_rows == 5000
+    assert converted.columns[0] == {"name": "x1", "type": "int64", "min": 0, "max": 4999}
+    experiment = Experiment("На загруженных данных", "Logistic Regression", "uploaded.csv",
+                            db.get_all_projects()[0].id)
+    assert db.training_spec(experiment)["dataset_path"] == converted.columnar_path
+
+
+# ============ АРТЕФАКТЫ ============
+
+def test_artifact_upload_and_range_download():
+    content = b"".join(b"%08d" % i for i in range(100_000))
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            created = await client.post("/api/artifacts?compression=gzip", content=content)
+            url = f"/api/artifacts/{created.json()['sha256']}"
+            repeated = await client.post("/api/artifacts", content=content)
+            full = await client.get(url)
+            part = await client.get(url, headers={"Range": "bytes=80-95"})
+            tail = await client.get(url, headers={"Range": "bytes=-8"})
+            stale = await client.get(url, headers={"Range": "bytes=0-7", "If-Range": '"other"'})
+            outside = await client.get(url, headers={"Range": f"bytes={len(content)}-"})
+            reversed_range = await client.get(url, headers={"Range": "bytes=5-3"})
+            head = await client.head(url)
+            return created, repeated, full, part, tail, stale, outside, reversed_range, head
+
+    created, repeated, full, part, tail, stale, outside, reversed_range, head = asyncio.run(scenario())
+    assert created.status_code == 201 and created.json()["compression"] == "gzip"
+    assert created.json()["sha256"] == hashlib.sha256(content).hexdigest()
+    assert repeated.status_code == 200 and repeated.json()["deduplicated"]
+    assert full.content == content and full.headers["accept-ranges"] == "bytes"
+    assert part.status_code == 206 and part.content == b"0000001000000011"
+    assert part.headers["content-range"] == f"bytes 80-95/{len(content)}"
+    assert tail.content == b"00099999"
+    assert stale.status_code == 200 and len(stale.content) == len(content)
+    assert outside.status_code == 416
+    # Неверный по синтаксису диапазон игнорируется: весь артефакт
+    assert reversed_range.status_code == 200 and len(reversed_range.content) == len(content)
+    assert head.headers["content-length"] == str(len(content)) and head.content == b""
+
+
+# ============ РАЗВЕРТЫВАНИЕ МОДЕЛЕЙ ============
+
+def test_deployed_model_batches_concurrent_predictions():
+    outcome = train({"algorithm": "Logistic Regression", "dataset": "serving", "artifact_dir": db.artifacts.root,
+                     "hyperparameters": {"n_samples": 500, "n_features": 8, "max_iter": 20}})
+    experiment = Experiment("Для развертывания", "Logistic Regression", "serving", db.get_all_projects()[0].id)
+    experiment.status = "completed"
+    experiment.artifact_path = outcome["artifact"]
+    db.add_experiment(experiment)
+    X, _ = load_dataset("serving", n_samples=500, n_features=8)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            model = (await client.post(f"/api/experiments/{experiment.id}/models", json={"name": "serving"})).json()
+            url = f"/api/models/{model['id']}"
+            before = await client.post(f"{url}/predict", json={"features": X[0].tolist()})
+            deployed = await client.post(f"{url}/deploy")
+            responses = await asyncio.gather(*(client.post(f"{url}/predict", json={"features": row.tolist()})
+                                               for row in X[:50]))
+            wrong = await client.post(f"{url}/predict", json={"features": [1.0, 2.0]})
+            drift_report = (await client.get(f"{url}/drift")).json()
+            return model, before, deployed, responses, wrong, drift_report
+
+    model, before, deployed, responses, wrong, drift_report = asyncio.run(scenario())
+    assert model["artifact"] == outcome["artifact"]
+    assert before.status_code == 409
+    assert deployed.json()["deployment_status"] == "deployed"
+    expected = load_model(db.artifacts, outcome["artifact"]).predict_proba(np.asarray(X[:50]))
+    assert np.allclose([response.json()["probability"] for response in responses], expected)
+    assert wrong.status_code == 400
+    stats = deployments.stats()["models"][model["id"]]
+    assert stats["requests"] == 50 and stats["batches"] < 50
+    # Посчитанные пачки попали в профиль дрейфа модели
+    assert drift_report["live_rows"] == 50 and drift_report["baseline_rows"] == 400
+    assert set(drift_report["columns"]) == {f"feature_{j}" for j in range(8)} | {"prediction"}
+
+
+# ============ ЗАПУСК ЭКСПЕРИМЕНТОВ ============
+
+def test_start_returns_job_and_completes_in_background():
+    experiment = db.add_experiment(Experiment("async run", "XGBoost", "data.csv", db.get_all_projects()[0].id))
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post(f"/api/experiments/{experiment.id}/start")
+            assert response.status_code == 202
+            job_id = response.json()["job_id"]
+            for _ in range(3000):
+                job = (await client.get(f"/api/jobs/{job_id}")).json()
+                # Статус задачи виден чуть раньше, чем переход перенесен в эксперимент
+                if job["status"] in ("completed", "failed", "cancelled") \
+                        and db.get_experiment_by_id(experiment.id).status == job["status"]:
+                    return job
+                await asyncio.sleep(0.01)
+
+    job = asyncio.run(scenario())
+    assert job["status"] == "completed"
+    stored = db.get_experiment_by_id(experiment.id)
+    assert stored.status == "completed"
+    assert stored.started_at and stored.completed_at
+    assert stored.metrics == job["result"]
+    assert db.metric_store.series(experiment.id, "train_loss").summary()["count"] == 100
+    # Обученная модель сохранена артефактом эксперимента
+    assert job["artifact"] and stored.artifact_path == job["artifact"]
+    assert db.artifacts.info(stored.artifact_path).size > 0
+    # Данные запуска прошли через общий кэш и отпущены после завершения
+    cache = runner.dataset_cache.stats()
+    assert cache["misses"] + cache["hits"] >= 1 and cache["in_use"] == 0 and cache["bytes"] > 0
+
+
+def test_sweep_runs_trials_and_aggregates_progress():
+    project_id = db.get_all_projects()[0].id
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/sweeps", json={
+                "name": "lr sweep", "project_id": project_id,
+                "algorithm": "Logistic Regression", "dataset": "customer_data.csv",
+                "strategy": "halton", "budget": 4, "parallelism": 2,
+                "search_space": {"learning_rate": {"min": 0.01, "max": 1.0, "log": True}},
+                "hyperparameters": {"n_samples": 500, "max_iter": 20}
+            })
+            assert response.status_code == 202
+            sweep_id = response.json()["id"]
+            for _ in range(3000):
+                sweep = (await client.get(f"/api/sweeps/{sweep_id}")).json()
+                if sweep["status"] != "running":
+                    break
+                await asyncio.sleep(0.01)
+            trials = (await client.get(f"/api/sweeps/{sweep_id}/trials")).json()["trials"]
+            return sweep, trials
+
+    sweep, trials = asyncio.run(scenario())
+    assert sweep["status"] == "completed"
+    assert sweep["progress"]["completed"] == 4
+    assert len(trials) == 4 and all(t["status"] == "completed" for t in trials)
+    assert sweep["progress"]["best"]["value"] == max(t["metrics"]["accuracy"] for t in trials)
@@ -0,0 +1,61 @@
+"""
+Тесты сущностей
+"""
+import gc
+import json
+
+import pytest
+
+from ml_platform.core.entities.experiment import Experiment
+from ml_platform.core.entities.metrics_table import EXPERIMENT_METRICS, MetricsTable
+
+
+# ============ EXPERIMENT ============
+
+def test_experiment_keeps_attribute_access_without_dict():
+    experiment = Experiment("exp", "XGBoost", "data.csv", "project-1")
+    experiment.status = "running"
+
+    assert experiment.status == "running"
+    assert experiment.algorithm == "XGBoost"
+    with pytest.raises(AttributeError):
+        experiment.unknown_field = 1
+
+
+def test_experiment_metrics_behave_like_dict():
+    experiment = Experiment("exp", "XGBoost", "data.csv", "project-1")
+    assert not experiment.metrics
+
+    experiment.metrics = {"accuracy": 0.9, "training_time": 42, "note": "baseline"}
+    experiment.metrics["loss"] = 0.1
+
+    assert experiment.metrics == {"accuracy": 0.9, "training_time": 42, "note": "baseline", "loss": 0.1}
+    assert experiment.metrics.get("recall", "N/A") == "N/A"
+    assert json.loads(json.dumps(experiment.metrics))["training_time"] == 42
+
+    restored = Experiment.from_dict(experiment.to_dict())
+    assert restored.metrics == experiment.metrics
+
+
+def test_experiment_metrics_row_is_reused():
+    experiment = Experiment("exp", "XGBoost", "data.csv", "project-1")
+    experiment.metrics = {"accuracy": 0.9}
+    row = experiment._metrics_row
+    del experiment
+    gc.collect()
+
+    reused = Experiment("exp", "XGBoost", "data.csv", "project-1")
+    assert reused._metrics_row == row
+    assert not reused.metrics
+    assert EXPERIMENT_METRICS.column("accuracy")[row] != 0.9
+
+
+def test_metrics_table_release_does_not_take_the_lock():
+    table = MetricsTable()
+    row = table.allocate()
+    table.set(row, "loss", 0.5)
+    # Финализатор эксперимента может сработать внутри allocate/set того же потока
+    with table._lock:
+        table.release(row)
+    assert table.allocate() == row
+    assert table.items(row) == []
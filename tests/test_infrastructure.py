@@ -0,0 +1,361 @@
+"""
+Тесты инфраструктурного слоя
+"""
+import hashlib
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from ml_platform.infrastructure.compute.resource_manager import ResourceManager, ResourceRequest
+from ml_platform.infrastructure.compute.trainers import (
+    MODEL_CLASSES, FeatureBinner, build_tree, create_model, load_dataset, synthetic_dataset, train
+)
+from ml_platform.infrastructure.compute.tree_compiler import compile_model
+from ml_platform.infrastructure.storage.artifact_store import ArtifactStore
+from ml_platform.infrastructure.storage.change_log import ChangeLog
+from ml_platform.infrastructure.storage.columnar import ColumnarDataset
+from ml_platform.infrastructure.storage.csv_parser import parse_csv
+from ml_platform.infrastructure.storage.dataset_cache import SharedDatasetCache, remove_orphaned_caches
+from ml_platform.infrastructure.storage.file_manager import FileManager, UploadConflict
+from ml_platform.infrastructure.storage.metric_store import MetricStore
+
+
+# ============ ЖУРНАЛ ИЗМЕНЕНИЙ ============
+
+def test_change_log_replays_snapshot_and_tail(tmp_path):
+    log = ChangeLog(str(tmp_path), compact_threshold=3).open()
+    log.append("experiment", "e1", {"status": "created"})
+    log.append("experiment", "e2", {"status": "created"})
+    log.append("experiment", "e1", {"status": "running"})  # запускает компакцию
+    log.append("experiment", "e2", {"status": "completed"})
+    log.append("project", "p1", {"name": "demo"})
+    log.close()
+
+    assert os.path.exists(log.snapshot_path)
+    assert not os.path.exists(log.compacting_path)
+
+    state = ChangeLog(str(tmp_path)).replay()
+    assert state["experiment"] == {"e1": {"status": "running"}, "e2": {"status": "completed"}}
+    assert state["project"] == {"p1": {"name": "demo"}}
+
+
+def test_change_log_ignores_torn_tail(tmp_path):
+    log = ChangeLog(str(tmp_path)).open()
+    log.append("experiment", "e1", {"status": "created"})
+    log.append("experiment", "e1", None, op="delete")
+    log.append("experiment", "e2", {"status": "created"})
+    log.close()
+    with open(log.log_path, "a", encoding="utf-8") as f:
+        f.write('{"lsn": 4, "op": "put", "kind"')
+
+    reopened = ChangeLog(str(tmp_path))
+    assert reopened.replay() == {"experiment": {"e2": {"status": "created"}}}
+    reopened.open()
+    assert reopened.append("experiment", "e3", {}) == 4
+    assert reopened.wait_durable(timeout=5)
+    reopened.close()
+
+
+# ============ ВРЕМЕННЫЕ РЯДЫ МЕТРИК ============
+
+def test_metric_series_spills_chunks_and_answers_ranges(tmp_path):
+    store = MetricStore(str(tmp_path), chunk_size=100)
+    steps = np.arange(250)
+    store.append_many("e1", "loss", steps, 1.0 / (steps + 1), timestamps=1000.0 + steps)
+    series = store.series("e1", "loss")
+
+    assert len(series.chunks) == 2
+    assert isinstance(series.chunks[0].points, np.memmap)
+    assert series.summary()["count"] == 250
+    assert series.summary()["max"] == 1.0
+    assert series.summary()["last"]["step"] == 249
+
+    assert series.query(step_from=95, step_to=205)["step"].tolist() == list(range(95, 206))
+    assert series.query(time_from=1240.0)["step"].tolist() == list(range(240, 250))
+    assert len(series.query(step_from=1000)) == 0
+
+
+def test_metric_store_reopens_spilled_series(tmp_path):
+    store = MetricStore(str(tmp_path), chunk_size=4)
+    for step in range(10):
+        store.append("e1", "acc", step, step / 10)
+    store.flush()
+
+    reopened = MetricStore(str(tmp_path), chunk_size=4)
+    assert reopened.metrics("e1") == ["acc"]
+    assert reopened.has_series("e1", "acc") and not reopened.has_series("e1", "loss")
+    reopened.series("e2", "loss")
+    assert reopened.metrics("e2") == ["loss"] and reopened.has_series("e2", "loss")
+    series = reopened.series("e1", "acc")
+    assert series.summary()["count"] == 10
+    assert series.summary()["last"]["value"] == 0.9
+    assert series.query()["step"].tolist() == list(range(10))
+
+
+# ============ ЗАГРУЗКА ФАЙЛОВ ============
+
+def test_upload_resumes_after_restart_and_deduplicates(tmp_path):
+    data = os.urandom(300_000)
+    files = FileManager(str(tmp_path))
+    session = files.create_upload("train.csv", size=len(data))
+    writer = files.open_chunk(session, 0)
+    writer.write(data[:100_000])
+    writer.close()
+
+    # Новый экземпляр (перезапуск): смещение берется из заготовки, sha256 пересчитывается
+    files = FileManager(str(tmp_path))
+    session = files.get_upload(session.id)
+    assert session.offset == 100_000
+    try:
+        files.open_chunk(session, 0)
+        assert False, "часть не с текущего смещения должна отклоняться"
+    except UploadConflict as e:
+        assert e.offset == 100_000
+    writer = files.open_chunk(session, 100_000)
+    writer.write(data[100_000:])
+    writer.close()
+    stored = files.complete(session)
+    assert stored.sha256 == hashlib.sha256(data).hexdigest()
+    assert stored.path.endswith(".csv") and not stored.deduplicated
+    assert files.get_upload(session.id) is None
+
+    again = files.create_upload("copy.csv")
+    writer = files.open_chunk(again, 0)
+    writer.write(data)
+    writer.close()
+    assert files.complete(again) == stored._replace(deduplicated=True)
+    assert os.listdir(files.uploads_dir) == []
+
+
+def test_columnar_conversion_projects_columns_and_rows(tmp_path):
+    source = tmp_path / "sales.csv"
+    lines = ["amount,region,label"] + [f"{i},{'north' if i % 3 else 'south'},{i % 2}" for i in range(1000)]
+    lines[151] = ",north,0"  # пропуск в числовом столбце - NaN
+    source.write_text("\n".join(lines) + "\n")
+
+    meta = parse_csv(str(source), str(tmp_path / "sales"), workers=1)
+    assert meta["n_rows"] == 1000
+    dataset = ColumnarDataset(str(tmp_path / "sales"))
+    assert dataset.columns == ["amount", "region", "label"]
+    assert dataset.stats("amount") == {"type": "float64", "min": 0.0, "max": 999.0}
+    assert dataset.categories("region") == ["north", "south"]
+
+    amounts = dataset.column("amount", 200, 300)
+    assert isinstance(amounts, np.memmap) and not amounts.flags.writeable
+    assert amounts.tolist() == [float(i) for i in range(200, 300)]
+
+    X, y = load_dataset(dataset.path, features=["amount"], target="label", rows=(0, 500))
+    assert X.shape == (499, 1)  # строка с NaN отброшена
+    assert y.sum() == 250
+
+
+def test_csv_dataset_with_categorical_column_keeps_numeric_rows(tmp_path):
+    source = tmp_path / "raw.csv"
+    lines = ["amount,region,label"] + [f"{i},{'north' if i % 3 else 'south'},{i % 2}" for i in range(100)]
+    lines[11] = ",north,0"  # пропуск в числовом столбце - строка отбрасывается
+    source.write_text("\n".join(lines) + "\n")
+
+    X, y = load_dataset(str(source))
+    assert X.shape == (99, 1)  # текстовый столбец region отброшен целиком
+    assert y.sum() == 50
+
+    text = tmp_path / "text.csv"
+    text.write_text("region,segment\nnorth,a\nsouth,b\n")
+    with pytest.raises(ValueError, match="нет числовых строк"):
+        load_dataset(str(text))
+
+
+def test_parallel_csv_parser_reconciles_types_across_chunks(tmp_path):
+    source = tmp_path / "mixed.csv"
+    rows = [f"{i},{i * 2},{i % 7}" for i in range(3000)]
+    rows[2500] = "2500,5000.5,seven"  # в последних диапазонах - дробное и строка
+    rows[10] = "10,,"                   # пустое поле: в числовом столбце nan, в строковом - ""
+    rows[2600] = "2600,5200,nan"        # строка "nan" - отдельная категория
+    source.write_text("id,score,code\n" + "\n".join(rows) + "\n")
+
+    meta = parse_csv(str(source), str(tmp_path / "mixed"), workers=2, chunk_bytes=4096)
+    dataset = ColumnarDataset(str(tmp_path / "mixed"))
+    assert [column["type"] for column in meta["columns"]] == ["int64", "float64", "category"]
+    assert dataset.n_rows == 3000
+    assert dataset.column("id").tolist() == list(range(3000))
+    assert dataset.column("score", 2499, 2502).tolist() == [4998.0, 5000.5, 5002.0]
+    codes = dataset.column("code")
+    categories = dataset.categories("code")
+    assert [categories[c] for c in codes[[0, 6, 2500, 10, 2600]]] == ["0", "6", "seven", "", "nan"]
+    assert np.isnan(dataset.column("score", 10, 11)[0])
+    # min/max групп строк отсекают начало файла
+    (start, stop), = dataset.row_ranges("id", 2990, None)
+    assert 0 < start <= 2990 and stop == 3000
+
+
+def test_orphaned_dataset_caches_of_dead_processes_are_removed(tmp_path):
+    finished = subprocess.Popen([sys.executable, "-c", "pass"])
+    finished.wait()
+    names = [f"ml_platform_datasets-{pid}" for pid in (finished.pid, os.getpid(), 1)] + ["ml_platform_datasets-x"]
+    for name in names:
+        (tmp_path / name).mkdir()
+    assert remove_orphaned_caches(base=str(tmp_path)) == [names[0]]
+    assert sorted(os.listdir(tmp_path)) == sorted(names[1:])
+
+
+def test_shared_dataset_cache_counts_refs_and_evicts_lru(tmp_path):
+    cache = SharedDatasetCache(str(tmp_path / "cache"), budget_bytes=700_000)
+    # Синтетический датасет 5000 x 10: около 420 КБ на запись
+    first = cache.acquire("a")
+    X, y = load_dataset("cache_a", n_features=10, shared_path=first)
+    assert isinstance(X, np.memmap) and not X.flags.writeable
+    again = load_dataset("cache_a", n_features=10, shared_path=cache.acquire("a"))
+    assert np.array_equal(again[0], X)
+    cache.release("a")
+    cache.release("a")
+
+    second = cache.acquire("b")
+    load_dataset("cache_b", n_features=10, shared_path=second)
+    # "a" без ссылок и давнее "b" - вытесняется при превышении бюджета
+    cache.release("b")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 2, 1)
+    assert stats["entries"] == 1 and stats["bytes"] <= cache.budget_bytes
+    assert not os.path.exists(first) and os.path.exists(second)
+
+    cache.acquire("b")
+    assert cache.stats()["hits"] == 2
+
+
+# ============ ХРАНИЛИЩЕ АРТЕФАКТОВ ============
+
+def test_artifact_store_deduplicates_and_reads_ranges(tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts"))
+    content = bytes(range(256)) * 4000
+    plain = store.put_bytes(content)
+    assert plain.sha256 == hashlib.sha256(content).hexdigest() and plain.stored_size == len(content)
+    # Тот же адрес с другим кодеком - повторно не пишется
+    again = store.put_bytes(content, compression="xz")
+    assert again.deduplicated and again.compression is None
+    assert b"".join(store.iter_range(plain, 1000, 1999)) == content[1000:2000]
+
+    for codec in ("gzip", "bz2", "xz"):
+        data = content + codec.encode()
+        info = store.put_bytes(data, compression=codec)
+        assert info.stored_size < info.size
+        assert store.read_bytes(info.sha256) == data
+        assert b"".join(store.iter_range(info, 700_000, None, block=4096)) == data[700_000:]
+    # Временные файлы не остаются
+    assert not [name for name in os.listdir(store.objects_dir) if name.endswith(".tmp")]
+
+
+# ============ ПЛАНИРОВЩИК РЕСУРСОВ ============
+
+def test_scheduler_packs_without_oversubscription():
+    manager = ResourceManager(total_cpus=4, total_memory_mb=8192)
+    manager.submit("big", "p1", ResourceRequest(cpus=3, memory_mb=512))
+    manager.submit("too_big", "p1", ResourceRequest(cpus=2, memory_mb=1024))
+    manager.submit("small", "p1", ResourceRequest(cpus=1, memory_mb=7680))
+
+    # Второй запрос не помещается после первого - освободившееся ядро дозаполняет третий
+    assert manager.schedule() == ["big", "small"]
+    assert (manager.used_cpus, manager.used_memory_mb) == (4, 8192)
+    assert manager.schedule() == []
+
+    manager.release("big")
+    assert manager.schedule() == []  # памяти на too_big еще нет
+    manager.release("small")
+    assert manager.schedule() == ["too_big"]
+
+    stats = manager.stats()
+    assert stats["queue_depth"] == 0 and stats["running"] == 1
+    assert stats["wait_seconds"]["samples"] == 3
+
+    try:
+        manager.submit("huge", "p1", ResourceRequest(cpus=5))
+        assert False, "запрос больше хоста должен отклоняться"
+    except ValueError:
+        pass
+
+
+def test_scheduler_orders_by_priority_then_fair_share():
+    manager = ResourceManager(total_cpus=2, total_memory_mb=4096)
+    manager.submit("a1", "busy", ResourceRequest())
+    assert manager.schedule() == ["a1"]
+
+    manager.submit("a2", "busy", ResourceRequest())
+    manager.submit("b1", "idle", ResourceRequest())
+    # При равном приоритете вперед проект с меньшей долей, хотя a2 поставлен раньше
+    assert manager.schedule() == ["b1"]
+
+    manager.release("b1")
+    manager.submit("c1", "idle", ResourceRequest())
+    manager.submit("urgent", "busy", ResourceRequest(priority=10))
+    # Приоритет важнее доли
+    assert manager.schedule() == ["urgent"]
+
+
+def test_scheduler_reserves_for_starving_request():
+    manager = ResourceManager(total_cpus=2, total_memory_mb=4096, starvation_timeout=0)
+    manager.submit("running", "p1", ResourceRequest())
+    manager.schedule()
+    manager.submit("wide", "p1", ResourceRequest(cpus=2))
+    manager.submit("narrow", "p1", ResourceRequest())
+    # wide ждет дольше порога - narrow не занимает освобождаемое под него ядро
+    assert manager.schedule() == []
+    manager.release("running")
+    assert manager.schedule() == ["wide"]
+
+
+# ============ ОБУЧЕНИЕ ============
+
+def test_tree_prediction_matches_training_assignment():
+    X, y = synthetic_dataset("tree.csv", n_samples=2000, n_features=8)
+    binner = FeatureBinner(32).fit(X)
+    tree, fitted = build_tree(binner.transform(X), binner.cuts, 32, -y, np.ones(len(y)),
+                              max_depth=5, min_samples_leaf=10, l2=0.0)
+    assert tree.depth == 5
+    np.testing.assert_allclose(tree.predict(X), fitted)
+
+
+def test_compiled_ensembles_match_tree_prediction():
+    X, y = synthetic_dataset("compiled.csv", n_samples=3000, n_features=8)
+    X_test = np.random.default_rng(1).normal(size=(1500, 8))
+    X_test[::7, 2] = np.nan  # пропуск уходит вправо в обоих вариантах
+    for algorithm in ("XGBoost", "Random Forest"):
+        model = create_model(algorithm, {"n_estimators": 20, "max_depth": 5}).fit(X, y)
+        compiled = compile_model(model)
+        np.testing.assert_allclose(compiled.predict_proba(X_test), model.predict_proba(X_test), atol=1e-12)
+        half = compile_model(model, np.float32)
+        assert half.nbytes < compiled.nbytes
+        np.testing.assert_allclose(half.predict_proba(X_test), model.predict_proba(X_test), atol=1e-5)
+    assert compile_model(create_model("Logistic Regression")).__class__.__name__ == "LogisticRegression"
+
+
+def test_create_model_skips_hyperparameters_of_other_algorithms():
+    placeholder = {"learning_rate": 0.1, "max_depth": 6, "n_estimators": 100}  # шаблон формы
+    for algorithm in MODEL_CLASSES:
+        model = create_model(algorithm, placeholder)
+        assert getattr(model, "learning_rate", 0.1) == 0.1
+    assert create_model("Random Forest", placeholder, n_jobs=2).n_estimators == 100
+    assert not hasattr(create_model("Logistic Regression", placeholder), "n_estimators")
+
+
+def test_random_forest_threads_give_same_trees():
+    X, y = synthetic_dataset("forest.csv", n_samples=2000, n_features=6)
+    params = {"n_estimators": 12, "max_depth": 4}
+    serial = create_model("Random Forest", params).fit(X, y)
+    threaded = create_model("Random Forest", params, n_jobs=3).fit(X, y)
+    np.testing.assert_array_equal(threaded.predict_proba(X), serial.predict_proba(X))
+
+
+def test_trainers_report_real_metrics():
+    for algorithm in ("Logistic Regression", "XGBoost", "Random Forest", "Neural Network"):
+        result = train({
+            "algorithm": algorithm,
+            "dataset": "customer_data.csv",
+            "hyperparameters": {"n_samples": 2000, "n_features": 10},
+            "resources": {"cpus": 2}
+        })
+        metrics = result["metrics"]
+        assert metrics["accuracy"] > 0.7, algorithm
+        assert metrics["training_time"] > 0
+        assert set(metrics) >= {"precision", "recall", "f1_score", "loss"}
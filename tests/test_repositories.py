@@ -0,0 +1,122 @@
+"""
+Тесты хранилища данных
+"""
+import threading
+
+import pytest
+
+from app import Database, Experiment, Project
+from ml_platform.core.repositories.backends import SQLiteBackend
+from ml_platform.core.repositories.experiment_repository import InMemoryExperimentRepository
+
+BACKENDS = ["memory", "sqlite"]
+
+
+# ============ РЕПОЗИТОРИИ ============
+
+def test_sqlite_repository_queries_by_indexed_fields(tmp_path):
+    backend = SQLiteBackend(str(tmp_path))
+    project = Project("demo", "desc", owner=None)
+    backend.projects.add(project)
+    experiments = [Experiment(f"exp {i}", "XGBoost" if i % 2 else "Random Forest", "data.csv", project.id)
+                   for i in range(10)]
+    backend.experiments.add_many(experiments)
+
+    experiments[0].status = "running"
+    experiments[0].metrics = {"loss": 0.5}
+    backend.experiments.update(experiments[0])
+
+    loaded = backend.experiments.get(experiments[0].id)
+    assert loaded.status == "running"
+    assert loaded.metrics == {"loss": 0.5}
+    assert [e.id for e in backend.experiments.list(limit=3)] == [e.id for e in experiments[:3]]
+    assert len(backend.experiments.list_by_algorithm("XGBoost")) == 5
+    assert backend.experiments.count(project_id=project.id, status="created") == 9
+    backend.close()
+
+
+def test_memory_repository_reads_while_other_thread_writes():
+    repository = InMemoryExperimentRepository()
+    project = Project("demo", "desc", owner=None)
+    done = threading.Event()
+
+    def write():
+        for i in range(20000):
+            experiment = repository.add(Experiment(f"exp {i}", "XGBoost", "data.csv", project.id))
+            experiment.status = "running"
+            repository.update(experiment)
+        done.set()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while not done.is_set():
+        repository.list()
+        repository.find_by("status", "running")
+        repository.count(project_id=project.id, status="running")
+    writer.join()
+    assert repository.count(status="running") == 20000
+
+
+# ============ DATABASE ============
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_database_indexes_follow_mutations(tmp_path, backend):
+    db = Database(str(tmp_path), backend)
+    project = db.get_all_projects()[0]
+    experiment = db.add_experiment(Experiment("exp", "Random Forest", "data.csv", project.id))
+
+    def ids(experiments):
+        return [e.id for e in experiments]
+
+    assert db.get_experiment_by_id(experiment.id).name == "exp"
+    assert db.get_project_by_id(project.id).name == project.name
+    assert experiment.id in ids(db.get_experiments_by_project(project.id))
+    assert experiment.id in ids(db.get_experiments_by_algorithm("Random Forest"))
+    assert experiment.id in ids(db.get_experiments_by_status("created"))
+
+    db.update_experiment_status(experiment.id, "running")
+    assert experiment.id not in ids(db.get_experiments_by_status("created"))
+    assert experiment.id in ids(db.get_experiments_by_status("running"))
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_database_keeps_running_demo_experiment_when_seeded(tmp_path, backend):
+    db = Database(str(tmp_path), backend)
+    assert len(db.get_experiments_by_status("running")) == 1
+    assert db.get_stats()["running_experiments"] == 1
+    assert not db.get_experiments_by_status("failed")
+    db.verify_counters()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_database_restores_after_restart(tmp_path, backend):
+    db = Database(str(tmp_path), backend)
+    experiment = db.add_experiment(Experiment("exp", "XGBoost", "data.csv", db.get_all_projects()[0].id))
+    db.update_experiment_status(experiment.id, "completed", {"accuracy": 0.9})
+    db.close()
+    del Database._instances[str(tmp_path)]
+
+    restored = Database(str(tmp_path), backend)
+    loaded = restored.get_experiment_by_id(experiment.id)
+    assert loaded.status == "completed"
+    assert loaded.metrics == {"accuracy": 0.9}
+    assert restored.count_experiments_by_project(experiment.project_id) == 2
+    # Запуск демо-данных "running" прерван перезапуском: задач прошлого процесса нет
+    assert not restored.get_experiments_by_status("running")
+    assert restored.get_stats() == dict(db.get_stats(), running_experiments=0)
+    restored.verify_counters()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_database_counters_match_full_recount(tmp_path, backend):
+    db = Database(str(tmp_path), backend)
+    before = db.get_stats()
+    experiment = db.add_experiment(Experiment("exp", "XGBoost", "data.csv", db.get_all_projects()[0].id))
+    db.update_experiment_status(experiment.id, "running")
+    db.update_experiment_status(experiment.id, "completed", {"accuracy": 0.9})
+
+    stats = db.get_stats()
+    assert stats["experiments"] == before["experiments"] + 1
+    assert stats["running_experiments"] == before["running_experiments"]
+    assert stats["completed_experiments"] == before["completed_experiments"] + 1
+    db.verify_counters()
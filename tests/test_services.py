@@ -0,0 +1,398 @@
+"""
+Тесты сервисного слоя
+"""
+import asyncio
+import pickle
+import threading
+import time
+
+import numpy as np
+
+from ml_platform.core.entities.sweep import Sweep
+from ml_platform.core.entities.model import TrainedModel
+from ml_platform.core.services.deployment_service import DeploymentService, MicroBatcher
+from ml_platform.core.services.experiment_service import ExperimentRunner, Job, JobCancelled, JobStatus
+from ml_platform.core.services.live_service import LiveHub
+from ml_platform.core.services.monitoring_service import DriftMonitor, MetricsRegistry
+from ml_platform.core.services.sweep_service import SweepService, generate_trials
+from ml_platform.infrastructure.compute.sketches import DataProfile
+from ml_platform.infrastructure.storage.artifact_store import ArtifactStore
+from ml_platform.infrastructure.storage.model_format import save_model
+
+
+def _fast(spec, cancelled):
+    return {"metrics": {"accuracy": spec["accuracy"]}, "history": {"loss": [0.5, 0.3]}}
+
+
+def _broken(spec, cancelled):
+    raise ValueError("плохой датасет")
+
+
+def _until_cancelled(spec, cancelled):
+    for _ in range(1000):
+        if cancelled():
+            raise JobCancelled()
+        time.sleep(0.01)
+    return {}
+
+
+def _wait(job, timeout=30):
+    deadline = time.time() + timeout
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+# ============ ЗАПУСК ЭКСПЕРИМЕНТОВ ============
+
+def test_runner_completes_and_fails_jobs():
+    transitions = []
+    lock = threading.Lock()
+
+    def on_update(job):
+        with lock:
+            transitions.append((job.experiment_id, job.status))
+
+    runner = ExperimentRunner(_fast, max_workers=2, on_update=on_update)
+    ok = _wait(runner.submit("e1", {"accuracy": 0.9}))
+    runner.run_fn = _broken
+    failed = _wait(runner.submit("e2", {}))
+    runner.shutdown()
+
+    assert ok.status == JobStatus.COMPLETED and ok.result == {"accuracy": 0.9}
+    assert ok.history == {"loss": [0.5, 0.3]}
+    assert ok.started_at <= ok.completed_at
+    assert failed.status == JobStatus.FAILED and "плохой датасет" in failed.error
+    assert [s for e, s in transitions if e == "e1"] == ["queued", "running", "completed"]
+    assert [s for e, s in transitions if e == "e2"] == ["queued", "running", "failed"]
+
+
+def test_runner_cancels_queued_and_running_jobs():
+    runner = ExperimentRunner(_until_cancelled, max_workers=1)
+    running = runner.submit("e1", {})
+    queued = runner.submit("e2", {})
+    assert queued.status == JobStatus.QUEUED
+
+    runner.cancel(queued.id)
+    assert queued.status == JobStatus.CANCELLED and queued.started_at is None
+    runner.cancel(running.id)
+    assert _wait(running).status == JobStatus.CANCELLED
+    assert runner.stats()["cancelled"] == 2
+    runner.shutdown()
+
+
+# ============ ПЕРЕБОР ГИПЕРПАРАМЕТРОВ ============
+
+SPACE = {
+    "learning_rate": {"min": 0.001, "max": 1.0, "log": True, "steps": 4},
+    "max_depth": {"min": 2, "max": 8, "type": "int", "steps": 3},
+    "l2": [0.0, 1.0],
+}
+
+
+def test_generate_trials_by_strategy():
+    grid = generate_trials(SPACE, "grid")
+    assert len(grid) == 4 * 3 * 2
+    assert {t["max_depth"] for t in grid} == {2, 5, 8}
+
+    for strategy in ("random", "halton"):
+        trials = generate_trials(SPACE, strategy, budget=50)
+        assert len(trials) == 50
+        assert all(0.001 <= t["learning_rate"] <= 1.0 and 2 <= t["max_depth"] <= 8 for t in trials)
+        assert {t["l2"] for t in trials} == {0.0, 1.0}
+    # Квазислучайные точки не повторяются и покрывают диапазон равномерно
+    rates = sorted(t["learning_rate"] for t in generate_trials(SPACE, "halton", budget=16))
+    assert len(set(rates)) == 16 and rates[0] < 0.01 and rates[-1] > 0.3
+
+
+class _FakeDb:
+    def __init__(self):
+        self.experiments, self.sweeps = {}, {}
+
+    def add_experiments(self, experiments):
+        self.experiments.update((experiment.id, experiment) for experiment in experiments)
+
+    def get_experiment_by_id(self, experiment_id):
+        return self.experiments.get(experiment_id)
+
+    def update_experiment_status(self, experiment_id, status, metrics=None):
+        self.experiments[experiment_id].status = status
+
+    def add_sweep(self, sweep):
+        self.sweeps[sweep.id] = sweep
+
+    def get_running_sweeps(self):
+        return [sweep for sweep in self.sweeps.values() if sweep.status == "running"]
+
+    def training_spec(self, experiment):
+        return {"experiment_id": experiment.id, "hyperparameters": dict(experiment.hyperparameters)}
+
+    update_sweep = add_sweep
+
+
+class _FakeRunner:
+    max_workers = 4
+
+    def __init__(self):
+        self.jobs = []
+        self.service = None
+
+    def submit(self, experiment_id, spec, project_id=None):
+        job = Job(experiment_id, spec, project_id)
+        self.jobs.append(job)
+        self.service.on_job_update(job)
+        return job
+
+    def cancel(self, job_id):
+        pass
+
+
+def test_sweep_service_caps_parallelism_and_tracks_best():
+    runner = _FakeRunner()
+    service = runner.service = SweepService(_FakeDb(), runner)
+    sweep = service.create(Sweep("s", "p1", "XGBoost", "data.csv", SPACE, "random", budget=5, parallelism=2))
+    assert len(runner.jobs) == 2 and sweep.progress["queued"] == 2
+
+    finished = 0
+    while finished < len(runner.jobs):
+        job = runner.jobs[finished]
+        job.status, job.result = JobStatus.COMPLETED, {"accuracy": 0.5 + finished / 10}
+        service.on_job_update(job)
+        finished += 1
+        assert len(runner.jobs) - finished <= 2
+
+    assert len(runner.jobs) == 5
+    assert sweep.status == "completed"
+    assert sweep.progress["completed"] == 5 and sweep.progress["queued"] == 0
+    assert sweep.progress["best"]["experiment_id"] == runner.jobs[-1].experiment_id
+
+
+def test_sweep_service_recovers_interrupted_sweep_after_restart():
+    db, runner = _FakeDb(), _FakeRunner()
+    runner.service = SweepService(db, runner)
+    sweep = runner.service.create(Sweep("s", "p1", "XGBoost", "data.csv", SPACE, "random", budget=5, parallelism=2))
+    first = runner.jobs[0]
+    first.status, first.result = JobStatus.COMPLETED, {"accuracy": 0.7}
+    runner.service.on_job_update(first)
+    # Перезапуск: задачи движка потеряны, хранилище отметило прерванные запуски неуспешными
+    db.experiments[first.experiment_id].status = "completed"
+    for job in runner.jobs[1:]:
+        db.experiments[job.experiment_id].status = "failed"
+
+    restarted = _FakeRunner()
+    restarted.service = SweepService(db, restarted)
+    assert [s.id for s in restarted.service.recover()] == [sweep.id]
+    assert restarted.service.recover() == []
+    assert len(restarted.jobs) == 2
+    assert sweep.progress["completed"] == 1 and sweep.progress["failed"] == 2 and sweep.progress["queued"] == 2
+
+    for job in list(restarted.jobs):
+        job.status, job.result = JobStatus.COMPLETED, {"accuracy": 0.5}
+        restarted.service.on_job_update(job)
+    assert sweep.status == "completed"
+    assert sweep.progress["completed"] == 3 and sweep.progress["best"]["value"] == 0.7
+
+
+# ============ МОНИТОРИНГ ============
+
+def test_metrics_registry_counts_from_threads_and_exposes_text():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Запросы", ("route",))
+    latency = registry.histogram("latency_seconds", "Задержка", buckets=(0.1, 1.0))
+    registry.gauge("queue_depth", "Очередь", function=lambda: 7)
+    assert registry.counter("requests_total", "Запросы", ("route",)) is requests
+
+    def work():
+        for i in range(10_000):
+            requests.labels("/a").inc()
+            latency.observe(0.05 if i % 2 else 5.0)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    text = registry.expose()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="/a"} 40000' in text
+    assert 'latency_seconds_bucket{le="0.1"} 20000' in text
+    assert 'latency_seconds_bucket{le="1"} 20000' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 40000' in text
+    assert "latency_seconds_count 40000" in text
+    assert "queue_depth 7" in text
+
+
+def test_drift_monitor_scores_shift_and_merges_process_profiles():
+    rng = np.random.default_rng(0)
+
+    def sample(n, shift=0.0):
+        X = rng.normal(size=(n, 3))
+        X[:, 1] += shift
+        X[:, 2] = rng.integers(0, 3 + (shift > 0), n)  # категории; при сдвиге появляется новая
+        return X, 1 / (1 + np.exp(-X[:, 0]))
+
+    registry = MetricsRegistry()
+    monitor = DriftMonitor(registry)
+    baseline = DataProfile.fit(*sample(5000))
+    monitor.track("m", baseline)
+    for _ in range(20):
+        monitor.observe("m", *sample(100))
+    stable = monitor.report("m")
+    assert stable["live_rows"] == 2000 and stable["drifted"] == []
+    assert stable["columns"]["feature_2"]["kind"] == "categorical"
+
+    # Другой процесс получает базовый профиль, набирает свой и возвращает его через pickle
+    worker = pickle.loads(pickle.dumps(baseline)).empty()
+    worker.update(*sample(2000, shift=2.0))
+    monitor.merge("m", pickle.loads(pickle.dumps(worker)))
+    shifted = monitor.report("m")
+    assert shifted["live_rows"] == 4000
+    assert set(shifted["drifted"]) == {"feature_1", "feature_2"}
+    assert shifted["columns"]["feature_1"]["ks"] > 0.3
+    assert shifted["columns"]["feature_2"]["unseen_share"] > 0.1
+    assert 'ml_drift_psi{model="m",column="feature_1"}' in registry.expose()
+
+
+# ============ РАЗВЕРТЫВАНИЕ МОДЕЛЕЙ ============
+
+def test_micro_batcher_scores_concurrent_rows_together():
+    sizes = []
+
+    def predict(X):
+        sizes.append(len(X))
+        return X.sum(axis=1)
+
+    async def scenario(batcher):
+        rows = [np.array([i, 1.0]) for i in range(100)]
+        return await asyncio.gather(*(batcher.predict(row) for row in rows))
+
+    batched = MicroBatcher(predict, max_batch_size=32, max_wait_ms=50)
+    assert asyncio.run(scenario(batched)) == [i + 1.0 for i in range(100)]
+    assert sizes == [32, 32, 32, 4]
+    assert batched.stats()["mean_batch_size"] == 25
+
+    sizes.clear()
+    single = MicroBatcher(predict, max_batch_size=1)
+    assert asyncio.run(scenario(single)) == [i + 1.0 for i in range(100)]
+    assert sizes == [1] * 100
+
+
+def test_micro_batcher_fails_only_rows_of_wrong_length():
+    async def scenario():
+        batcher = MicroBatcher(lambda X: X.sum(axis=1), max_batch_size=8, max_wait_ms=20)
+        rows = [np.array([1.0, 2.0]), np.array([1.0, 2.0, 3.0]), np.array([3.0, 4.0])]
+        return await asyncio.gather(*(batcher.predict(row) for row in rows), return_exceptions=True)
+
+    good, bad, other = asyncio.run(scenario())
+    assert (good, other) == (3.0, 7.0)
+    assert isinstance(bad, ValueError)
+
+
+def test_micro_batcher_close_stops_worker_after_pending_requests():
+    async def scenario():
+        batcher = MicroBatcher(lambda X: X.sum(axis=1), max_batch_size=8, max_wait_ms=20)
+        pending = asyncio.ensure_future(batcher.predict(np.array([1.0, 2.0])))
+        await asyncio.sleep(0)
+        task = batcher._task
+        batcher.close()  # запрос уже в очереди - обработчик дождется ответа
+        value = await pending
+        await asyncio.sleep(0.01)
+        return value, task.cancelled(), batcher._task
+
+    value, cancelled, task = asyncio.run(scenario())
+    assert value == 3.0 and cancelled and task is None
+
+
+class _LinearModel:
+    def __init__(self, weights):
+        self.weights = weights
+        self.n_features = len(weights)
+
+    def predict_proba(self, X):
+        return X @ self.weights
+
+
+class _FakeModelDb:
+    def __init__(self, models):
+        self.models = {model.id: model for model in models}
+
+    def get_model_by_id(self, model_id):
+        return self.models.get(model_id)
+
+    def get_deployed_models(self):
+        return [model for model in self.models.values() if model.deployment_status == "deployed"]
+
+    def update_model_deployment(self, model_id, status):
+        self.models[model_id].deployment_status = status
+        return self.models[model_id]
+
+
+def test_model_cache_maps_weights_and_evicts_by_budget(tmp_path):
+    store = ArtifactStore(str(tmp_path / "artifacts"))
+    models = []
+    for i in range(3):
+        model = TrainedModel(f"m{i}", "", "experiment")
+        model.artifact = save_model(_LinearModel(np.full(100_000, float(i))), store).sha256
+        model.deployment_status = "deployed"
+        models.append(model)
+    # В бюджет помещаются две модели по 800 КБ весов
+    service = DeploymentService(_FakeModelDb(models), store, budget_bytes=2_000_000)
+    service.warmup(background=False)
+    stats = service.stats()
+    assert list(stats["models"]) == [models[0].id, models[1].id]
+    assert stats["models"][models[0].id]["mapped_bytes"] == 800_000
+
+    deployment = service.get(models[0].id)
+    # Веса - read-only вид на файл артефакта, а не копия в куче
+    assert not deployment.model.weights.flags.writeable
+    assert asyncio.run(service.predict(models[0].id, np.ones(100_000))) == 0.0
+
+    # Третья модель вытесняет давно не использованную вторую
+    assert asyncio.run(service.predict(models[2].id, np.ones(100_000))) == 200_000.0
+    stats = service.stats()
+    assert set(stats["models"]) == {models[0].id, models[2].id}
+    assert (stats["cache"]["loads"], stats["cache"]["evictions"]) == (3, 1)
+    assert stats["cache"]["hits"] == 2 and stats["cache"]["misses"] == 1
+    assert stats["cache"]["bytes"] <= service.budget_bytes
+
+
+# ============ ЖИВЫЕ ОБНОВЛЕНИЯ ============
+
+def test_live_hub_coalesces_changes_and_keeps_latest_state_per_client():
+    value = {"current": 0}
+    computed = []
+
+    def source(key):
+        computed.append(key)
+        return value["current"]
+
+    hub = LiveHub(min_interval=0.2)
+    hub.register("counter", source)
+
+    def burst():
+        for i in range(1, 101):
+            value["current"] = i
+            hub.publish("counter:a", "counter:nobody")
+
+    async def scenario():
+        subscription = await hub.subscribe(["counter:a"])
+        snapshot = await subscription.next()
+        computed.clear()
+        await asyncio.to_thread(burst)
+        # Клиент не читает поток, пока идут изменения
+        await asyncio.sleep(0.5)
+        backlog = await subscription.next()
+        replaced = hub.stats()["replaced"]
+        hub.unsubscribe(subscription)
+        return snapshot, backlog, replaced
+
+    snapshot, backlog, replaced = asyncio.run(scenario())
+    assert snapshot == [("counter:a", 0)]
+    # Сотня изменений - не больше двух расчетов: сразу и в конце интервала
+    assert 1 <= len(computed) <= 2 and set(computed) == {"a"}
+    # У медленного клиента - одно последнее состояние вместо очереди событий
+    assert backlog == [("counter:a", 100)]
+    assert replaced == len(computed) - 1
+    assert hub.stats()["clients"] == 0
+